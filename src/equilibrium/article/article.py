@@ -2,9 +2,10 @@ from textwrap3 import wrap
 
 from utils.formatting import make_line, bold
 
-import matplotlib.pyplot as plt
 import numpy as np # Math
-import ast         # Literal evaluation
+
+from article.article_store import ArticleStore, join_tags, split_tags # Columnar storage
+from article.metadata_parser import evaluate # Literal evaluation
 
 # For the ease of use, please DO NOT change these.
 # Dynamic rendering has not been implemented, so it's easier to leave it
@@ -20,7 +21,59 @@ PADDING_RIGHT  = 4
 
 HORIZONTAL_LENGTH = SCREEN_WIDTH + PADDING_LEFT + PADDING_RIGHT
 
+
+def column_property(name: str) -> property:
+    """
+    Returns
+    -------
+    property
+        Property reading and writing the article's value of the store's
+        column, as a Python scalar.
+    """
+    
+    def get(article):
+        return article.store.columns[name][article.row].item()
+    
+    def set(article, value):
+        article.store.columns[name][article.row] = value
+        
+    return property(get, set)
+
+
+def estimate_reading_time(content: str) -> float:
+    """
+    Returns
+    -------
+    float
+        Minutes it takes to read the content, at 300 words per minute.
+    """
+    
+    words = content.split(" ")
+    cnt = 0
+    for word in words:
+        if len(word) > 1:
+            cnt += 1
+    
+    return cnt / 300 # 300 wpm
+
+
+def check_formatting(content: str) -> bool:
+    """
+    Checks whether the formatting of the content can be presented the way
+    author created it - every line ought to be shown is shorter than 
+    `SCREEN_WIDTH`, otherwise it would overflow.
+    """
+    
+    return all(len(line) <= SCREEN_WIDTH for line in content.split("\n"))
+
 class Article:
+    # Article is only a view of a row of the ArticleStore - the data itself
+    # is kept in columns, shared by all the articles
+    __slots__ = ("store", "row", "radio_selection")
+    
+    radio_selection_size = 4 # Like, dislike, recommend, save
+    button_names = ["Like", "Dislike", "Recommend", "Save"]
+    
     def __init__(self, 
                  id:           int = 0, 
                  author_id:    int = 0,
@@ -34,51 +87,118 @@ class Article:
                  formatted:    bool = False):
         """
         Returns an instance of Article class.
-        """
         
-        # Setting the relevant data
-        self.id           = id
-        self.author_id    = author_id
-        self.title        = title
-        self.tags         = tags
-        self.content      = content
-        self.likes        = likes
-        self.dislikes     = dislikes
-        self.views        = views
-        self.reading_time = reading_time
-        self.formatted    = formatted
+        Article created this way is kept in a store of its own, until it is
+        appended to the Articles wrapper (see `move_to`).
+        """
         
         # If reading time is not calculated - calculate it
-        if self.reading_time == 0:
-            words = self.content.split(" ")
-            cnt = 0
-            for word in words:
-                if len(word) > 1:
-                    cnt += 1
-            
-            self.reading_time = cnt / 300 # 300 wpm
+        if reading_time == 0:
+            reading_time = estimate_reading_time(content)
         
         
         # Literal-evaluate some useful properties in case they are strings
-        if isinstance(self.tags, str):
-            self.tags = ast.literal_eval(self.tags)  
+        tags     = evaluate(tags)
+        likes    = evaluate(likes)
+        dislikes = evaluate(dislikes)
+        views    = evaluate(views)
         
-        if isinstance(self.likes, str):
-            self.likes    = ast.literal_eval(likes)
+        # Setting the relevant data
+        self.store = ArticleStore(capacity=1)
+        self.row   = self.store.append(id=id,
+                                       author_id=author_id,
+                                       title=title,
+                                       tags=tags,
+                                       content=content,
+                                       likes=likes,
+                                       dislikes=dislikes,
+                                       views=views,
+                                       reading_time=reading_time,
+                                       formatted=formatted)
+        
+        self.radio_selection = 0 # Starting index of radio selection
+        
+        
+    @classmethod
+    def view(cls, store: ArticleStore, row: int):
+        """
+        Returns
+        -------
+        Article
+            View of the row of the store, nothing is copied.
+        """
         
-        if isinstance(self.dislikes, str):
-            self.dislikes = ast.literal_eval(dislikes)
+        article = cls.__new__(cls)
+        article.store = store
+        article.row   = row
+        article.radio_selection = 0
         
-        if isinstance(self.views, str):
-            self.views    = ast.literal_eval(views)
+        return article
+    
+    
+    def move_to(self, store: ArticleStore):
+        """
+        Copies the article into the store, which it is a view of from then on.
+        """
         
-        # Check if article is properly formatted
-        self.well_formatted = self.check_formatting()
+        if self.store is not store:
+            self.row   = store.append(**self.to_dict())
+            self.store = store
+            
+            
+    def to_dict(self) -> dict:
+        """
+        Returns
+        -------
+        dict
+            All the data of the article, as accepted by the constructor.
+        """
         
-        self.radio_selection      = 0 # Starting index of radio selection
-        self.radio_selection_size = 4 # Like, dislike, recommend, save
+        return {"id":           self.id,
+                "author_id":    self.author_id,
+                "title":        self.title,
+                "tags":         self.tags,
+                "content":      self.content,
+                "likes":        self.likes,
+                "dislikes":     self.dislikes,
+                "views":        self.views,
+                "reading_time": self.reading_time,
+                "formatted":    self.formatted}
+    
+    
+    # Numeric properties are read from (and written to) the store's columns
+    id           = column_property("id")
+    author_id    = column_property("author_id")
+    likes        = column_property("likes")
+    dislikes     = column_property("dislikes")
+    views        = column_property("views")
+    reading_time = column_property("reading_time")
+    formatted    = column_property("formatted")
+    
+    
+    @property
+    def title(self) -> str:
+        return self.store.titles[self.row]
+    
+    
+    @property
+    def tags(self) -> list:
+        return split_tags(self.store.tags[self.row])
+    
+    
+    @tags.setter
+    def tags(self, tags: list):
+        self.store.tags[self.row] = join_tags(tags)
         
-        self.button_names = ["Like", "Dislike", "Recommend", "Save"]
+        
+    @property
+    def content(self) -> str:
+        return self.store.contents[self.row] # Might be read from its file only now
+    
+    
+    @property
+    def well_formatted(self) -> bool:
+        return self.check_formatting()
         
         
     def __repr__(self) -> str:
@@ -142,9 +262,7 @@ class Article:
             as described above.
         """
         
-        lines = self.content.split("\n")
-            
-        return all(len(line) <= SCREEN_WIDTH for line in lines)
+        return check_formatting(self.content)
         
 
     def show(self):
@@ -358,6 +476,9 @@ class Article:
         Create a bar plot for likes, dislikes, and views
         """
         
+        # Imported only once statistics are shown, it slows the startup down
+        import matplotlib.pyplot as plt
+        
         fig, ax = plt.subplots(figsize=(8, 5))
         bar_width = 0.5
         bar_positions = np.arange(3)
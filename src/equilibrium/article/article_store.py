@@ -0,0 +1,517 @@
+from collections import OrderedDict # Least recently used order
+import threading # Reading ahead in the background
+import sys       # Sizes of cached contents
+
+import numpy as np # Math
+
+from article.content_segment import ContentSegment # Contents packed into a single file
+
+
+# Numeric columns of the store, and their types
+NUMERIC_COLUMNS = {"id":             np.int64,
+                   "author_id":      np.int64,
+                   "likes":          np.int64,
+                   "dislikes":       np.int64,
+                   "views":          np.int64,
+                   "reading_time":   np.float64,
+                   "formatted":      np.bool_}
+
+TAG_SEPARATOR = "\x1f" # Unit separator, never a part of a tag
+
+
+class PackedStrings:
+    def __init__(self, capacity: int = 16):
+        """
+        Creates an instance of PackedStrings - strings encoded one after
+        another into a single buffer, rather than kept as separate objects.
+
+        A string replaced is written down again at the end of the buffer,
+        the old copy is simply not pointed to anymore.
+        """
+
+        self.buffer = bytearray()
+        self.starts = np.zeros(capacity, dtype=np.int64)
+        self.ends   = np.zeros(capacity, dtype=np.int64)
+
+
+    def __getitem__(self, row: int) -> str:
+        return self.buffer[self.starts[row]:self.ends[row]].decode("utf8")
+
+
+    def __setitem__(self, row: int, value: str):
+        if row >= self.starts.shape[0]:
+            self.reserve(max(row + 1, 2 * self.starts.shape[0]))
+
+        encoded = value.encode("utf8")
+
+        self.starts[row] = len(self.buffer)
+        self.buffer     += encoded
+        self.ends[row]   = len(self.buffer)
+
+
+    def reserve(self, capacity: int):
+        self.starts = np.resize(self.starts, capacity)
+        self.ends   = np.resize(self.ends, capacity)
+
+
+    def extend(self, first_row: int, values: list):
+        """
+        Sets strings of rows from `first_row` on, all written down at once.
+        """
+
+        if first_row + len(values) > self.starts.shape[0]:
+            self.reserve(max(first_row + len(values), 2 * self.starts.shape[0]))
+
+        encoded = [value.encode("utf8") for value in values]
+        lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+        ends    = np.cumsum(lengths) + len(self.buffer)
+
+        rows = slice(first_row, first_row + len(values))
+        self.starts[rows] = ends - lengths
+        self.ends[rows]   = ends
+        self.buffer      += b"".join(encoded)
+
+
+    def copy(self, size: int):
+        """
+        Returns
+        -------
+        PackedStrings
+            Copy of the strings of the first `size` rows.
+        """
+
+        copied = PackedStrings(0)
+        copied.buffer = bytearray(self.buffer)
+        copied.starts = self.starts[:size].copy()
+        copied.ends   = self.ends[:size].copy()
+
+        return copied
+
+
+    def take(self, rows: np.ndarray) -> list:
+        """
+        Returns
+        -------
+        list
+            Strings of given rows.
+        """
+
+        buffer = self.buffer
+        return [buffer[start:end].decode("utf8")
+                for start, end in zip(self.starts[rows].tolist(), self.ends[rows].tolist())]
+
+
+class ArticleStore:
+    def __init__(self, capacity: int = 16):
+        """
+        Creates an instance of ArticleStore - columnar storage of articles'
+        data. Numbers are kept in NumPy arrays, titles and tags are packed
+        into byte buffers, so that an article costs a few dozen bytes
+        (plus its content), rather than an object with a dozen attributes.
+
+        Rows are only ever appended, `Article` objects are views of them.
+        Their values (likes, views, tags, ...) are changed in place, except
+        for contents, which are never replaced.
+
+        Parameters
+        ----------
+        capacity : int, optional
+            Number of rows to reserve up front. The default is 16.
+        """
+
+        self.size = 0 # Number of rows used
+
+        self.columns = {name: np.zeros(capacity, dtype=dtype)
+                        for name, dtype in NUMERIC_COLUMNS.items()}
+
+        self.titles   = PackedStrings(capacity)
+        self.tags     = PackedStrings(capacity)
+        self.contents = [] # Contents are large enough to be kept as they are,
+                           # or `LazyContents`, read from the files once needed
+
+
+    def __len__(self) -> int:
+        return self.size
+
+
+    def append(self,
+               id:           int,
+               author_id:    int,
+               title:        str,
+               tags:         list,
+               content:      str,
+               likes:        int,
+               dislikes:     int,
+               views:        int,
+               reading_time: float,
+               formatted:    bool) -> int:
+        """
+        Appends a row. Content may be `None`, if contents are lazy 
+        (and the article's content is in its file).
+
+        Returns
+        -------
+        int
+            Row the article is stored in.
+        """
+
+        row = self.size
+        if row == self.columns["id"].shape[0]:
+            self.reserve(max(2 * row, 1))
+
+        values = {"id":             id,
+                  "author_id":      author_id,
+                  "likes":          likes,
+                  "dislikes":       dislikes,
+                  "views":          views,
+                  "reading_time":   reading_time,
+                  "formatted":      formatted}
+
+        for name, value in values.items():
+            self.columns[name][row] = value
+
+        self.titles[row] = title
+        self.tags[row]   = join_tags(tags)
+        self.contents.append(content)
+
+        self.size += 1
+
+        return row
+
+
+    def extend(self,
+               id:           list,
+               author_id:    list,
+               title:        list,
+               tags:         list,
+               content:      list,
+               likes:        list,
+               dislikes:     list,
+               views:        list,
+               reading_time: list,
+               formatted:    list) -> range:
+        """
+        Appends many rows at once - every argument is a list of values
+        of the rows, as given to `append`.
+
+        Returns
+        -------
+        range
+            Rows the articles are stored in.
+        """
+
+        first = self.size
+        count = len(id)
+        if first + count > self.columns["id"].shape[0]:
+            self.reserve(max(first + count, 2 * first, 1))
+
+        values = {"id":             id,
+                  "author_id":      author_id,
+                  "likes":          likes,
+                  "dislikes":       dislikes,
+                  "views":          views,
+                  "reading_time":   reading_time,
+                  "formatted":      formatted}
+
+        for name, column_values in values.items():
+            self.columns[name][first:first + count] = column_values
+
+        self.titles.extend(first, title)
+        self.tags.extend(first, [join_tags(article_tags) for article_tags in tags])
+        self.contents.extend(content)
+
+        self.size += count
+
+        return range(first, first + count)
+
+
+    def snapshot(self):
+        """
+        Returns
+        -------
+        ArticleStore
+            Copy of the rows stored so far, unaffected by any change made
+            to the store afterwards. Numeric columns, titles and tags are
+            copied, contents (never replaced) are shared.
+        """
+
+        store_snapshot = ArticleStore(0)
+        store_snapshot.size     = self.size
+        store_snapshot.columns  = {name: column[:self.size].copy() for name, column in self.columns.items()}
+        store_snapshot.titles   = self.titles.copy(self.size)
+        store_snapshot.tags     = self.tags.copy(self.size)
+        store_snapshot.contents = self.contents if isinstance(self.contents, LazyContents) else self.contents[:self.size]
+
+        return store_snapshot
+
+
+    def reserve(self, capacity: int):
+        """
+        Grows the columns to fit `capacity` rows.
+        """
+
+        for name, column in self.columns.items():
+            self.columns[name] = np.resize(column, capacity)
+
+        self.titles.reserve(capacity)
+        self.tags.reserve(capacity)
+
+
+    def take(self, name: str, rows: np.ndarray):
+        """
+        Parameters
+        ----------
+        name : str
+            Name of the column (article's property).
+        rows : np.ndarray
+            Rows to take, in order.
+
+        Returns
+        -------
+        np.ndarray | list
+            Values of the rows - an array for numeric columns,
+            a list otherwise.
+        """
+
+        if name in self.columns:
+            return self.columns[name][rows]
+
+        if name == "title":
+            return self.titles.take(rows)
+
+        if name == "tags":
+            return [split_tags(tags) for tags in self.tags.take(rows)]
+
+        if name == "content":
+            if isinstance(self.contents, LazyContents):
+                return self.contents.take(rows) # Read through, so the cache is not flushed
+
+            contents = self.contents
+            return [contents[row] for row in rows.tolist()]
+
+        raise KeyError(f"Articles have no property {name!r}.")
+
+
+def join_tags(tags: list) -> str:
+    return TAG_SEPARATOR.join(tags)
+
+
+def split_tags(tags: str) -> list:
+    return tags.split(TAG_SEPARATOR) if tags else []
+
+
+class ContentCache:
+    def __init__(self, max_size: int = 64 * 2**20):
+        """
+        Creates an instance of ContentCache - least recently used contents,
+        bounded by their total size (in bytes of memory), rather than by 
+        their number, since contents differ in length a lot.
+
+        Parameters
+        ----------
+        max_size : int, optional
+            Total size of the contents kept. The default is 64 MiB.
+        """
+
+        self.max_size = max_size
+        self.size     = 0
+
+        self.contents = OrderedDict() # key -> content, least recently used first
+        self.lock     = threading.Lock() # Contents are read ahead on other threads
+
+        self.hits   = 0
+        self.misses = 0
+
+
+    def __len__(self) -> int:
+        return len(self.contents)
+
+
+    def __contains__(self, key) -> bool:
+        return key in self.contents
+
+
+    def get(self, key) -> str:
+        """
+        Returns
+        -------
+        str
+            Content kept under the key (now the most recently used one),
+            `None` if it is not kept.
+        """
+
+        with self.lock:
+            content = self.contents.get(key)
+            if content is None:
+                self.misses += 1
+                return None
+
+            self.contents.move_to_end(key)
+            self.hits += 1
+
+            return content
+
+
+    def peek(self, key) -> str:
+        """
+        Returns
+        -------
+        str
+            Content kept under the key, `None` if it is not kept. Neither
+            the order, nor the hit rate is affected.
+        """
+
+        with self.lock:
+            return self.contents.get(key)
+
+
+    def put(self, key, content: str):
+        """
+        Keeps the content, evicting the least recently used ones until
+        the contents fit. Content larger than the whole cache is not kept.
+        """
+
+        size = sys.getsizeof(content)
+        if size > self.max_size:
+            return
+
+        with self.lock:
+            if key in self.contents:
+                self.size -= sys.getsizeof(self.contents.pop(key))
+
+            self.contents[key] = content
+            self.size         += size
+
+            while self.size > self.max_size:
+                _, evicted = self.contents.popitem(last=False)
+                self.size -= sys.getsizeof(evicted)
+
+
+class LazyContents:
+    def __init__(self,
+                 store:   ArticleStore,
+                 segment: ContentSegment = None,
+                 cache:   ContentCache = None):
+        """
+        Creates an instance of LazyContents - contents of the store's rows,
+        read from the content segment on first access and kept in a bounded
+        cache, so that memory does not depend on the total size of contents.
+
+        Parameters
+        ----------
+        store : ArticleStore
+            Store the contents are of (ids of rows identify the contents).
+        segment : ContentSegment, optional
+            Segment the contents are read from. The default is None, 
+            meaning it is set once opened.
+        cache : ContentCache, optional
+            Cache of the contents read. The default is None, meaning a new one.
+        """
+
+        self.store   = store
+        self.segment = segment
+        self.cache   = cache if cache is not None else ContentCache()
+
+        self.size     = 0  # Number of rows
+        self.resident = {} # row -> content, given when appended (never evicted)
+
+
+    def __len__(self) -> int:
+        return self.size
+
+
+    def __getitem__(self, row: int) -> str:
+        if row in self.resident:
+            return self.resident[row]
+
+        content = self.cache.get(row)
+        if content is None:
+            content = self.read(row)
+            self.cache.put(row, content)
+
+        return content
+
+
+    def append(self, content: str = None):
+        """
+        Appends a row, whose content is in its file (if `None`), 
+        or the one given.
+        """
+
+        if content is not None:
+            self.resident[self.size] = content # Might not have been written down yet
+
+        self.size += 1
+
+
+    def extend(self, contents: list):
+        for content in contents:
+            self.append(content)
+
+
+    def read(self, row: int) -> str:
+        """
+        Returns
+        -------
+        str
+            Content of the row, read from the segment - empty, if there is 
+            no (valid) content of the row's article.
+        """
+
+        try:
+            return self.segment.read(int(self.store.columns["id"][row]))
+
+        except (KeyError, ValueError):
+            return ""
+
+
+    def take(self, rows: np.ndarray) -> list:
+        """
+        Returns
+        -------
+        list
+            Contents of the rows, those not cached are read (in a single
+            pass over the segment), but not kept.
+        """
+
+        rows = np.asarray(rows)
+
+        contents = []
+        missing  = [] # Positions of the contents not in memory
+        for position, row in enumerate(rows.tolist()):
+            content = self.resident.get(row)
+            if content is None:
+                content = self.cache.peek(row)
+            if content is None:
+                missing.append(position)
+
+            contents.append(content)
+
+        if missing:
+            article_ids = self.store.columns["id"][rows[missing]].tolist()
+            for position, content in zip(missing, self.segment.read_many(article_ids)):
+                contents[position] = content if content is not None else ""
+
+        return contents
+
+
+    def read_ahead(self, rows: list) -> threading.Thread:
+        """
+        Reads contents of the rows into the cache on a background thread,
+        so that they are there once needed.
+
+        Returns
+        -------
+        threading.Thread
+            Thread reading the contents.
+        """
+
+        def read_all():
+            for row in rows:
+                if row not in self.resident and row not in self.cache:
+                    self.cache.put(row, self.read(row))
+
+        thread = threading.Thread(target=read_all, name="read-ahead", daemon=True)
+        thread.start()
+
+        return thread
@@ -1,12 +1,14 @@
 import numpy as np
-import matplotlib.pyplot as plt
 
-from utils.data_wrapper import DataWrapper
-from utils.parser import parse_csv, write_line_csv
-import os 
-import ast 
+from utils.parser import write_line_csv
+import threading # Contents are read while metadata is parsed
+import time      # Timings of loading phases
 
-from article.article import Article
+from article.article import Article, estimate_reading_time
+from article.metadata_parser import METADATA_COLUMNS, read_metadata # Parsing metadata in parallel
+from article.article_store import ArticleStore, ContentCache, LazyContents # Columnar storage of articles' data
+from article.content_segment import ContentSegment # Contents packed into a single file
+from article.tag_index import TagIndex # Filtering by tags
 from user.user import User
 
 from typing import Tuple
@@ -14,39 +16,74 @@ from typing import Tuple
 class Articles:
     def __init__(self, 
                  path_articles_content:  str = "", 
-                 path_articles_metadata: str = ""):
+                 path_articles_metadata: str = "",
+                 lazy_content:           bool = False,
+                 content_cache_size:     int = 64 * 2**20):
         """
         Creates an instance of Articles wrapper.
+        
+        Parameters
+        ----------
+        path_articles_content : str, optional
+            Folder of the articles' content files.
+        path_articles_metadata : str, optional
+            Articles' metadata .csv file.
+        lazy_content : bool, optional
+            If set to `True`, only metadata is loaded, and the content of 
+            an article is read from the content segment once it is needed, 
+            so that loading does not depend on the size of all the contents.
+            The default is False.
+        content_cache_size : int, optional
+            Total size (bytes) of lazily read contents kept in memory, 
+            the least recently used ones are dropped first. 
+            The default is 64 MiB.
         """
         
         self.path_articles_content  = path_articles_content   # Content folder
         self.path_articles_metadata = path_articles_metadata  # Metadata file
         
-        self.articles = [] # List of all articles as objects
+        self.store    = ArticleStore() # Data of all the articles, in columns
+        self.articles = [] # List of all articles as objects (views of the store's rows)
+        self.by_id    = {} # id -> Article, so that lookups do not scan the list
+        
+        self.segment = None # Contents of all the articles, opened once needed
+        
+        self.lazy_content = lazy_content
+        if lazy_content:
+            self.store.contents = LazyContents(self.store, cache=ContentCache(max_size=content_cache_size))
+        
+        self.row_cache = None # Store's rows of the articles, in order
+        self.next_id   = 0    # Id the next new article gets, ids are never reused
+        
+        self.tag_index = TagIndex() # Ids of articles under each tag
+        
+        self.load_timings = {} # Seconds taken by each phase of loading
         
     
     def __getitem__(self, key):
         # If key is an integer, then retrieve the article with given ID
-        if isinstance(key, int):    
-            for article in self.articles:
-                if article.id == key:
-                    return article
-            return None # Return `None` if the given ID doesn't exist
+        if isinstance(key, (int, np.integer)):    
+            return self.by_id.get(int(key)) # Return `None` if the given ID doesn't exist
         
         # If given a string, return the given property of every single article
+        # (an array for numeric properties), taken from the store's column
         elif isinstance(key, str):
-            result = []
-            for article in self.articles:
-                result.append(getattr(article, key))
-            
-            return result # Properties concatenated
+            return self.store.take(key, self.rows())
     
     
     def __setitem__(self, id: int, new_value: Article):
         """
         Sets a new article, given ID
         """
-        self.articles[id] = new_value
+        
+        old_value = self.by_id[id]
+        new_value.move_to(self.store)
+        self.articles[self.articles.index(old_value)] = new_value
+        self.row_cache = None
+        
+        self.tag_index.remove(id, old_value.tags)
+        self.by_id[id] = new_value
+        self.tag_index.add(id, new_value.tags)
        
         
     def __len__(self) -> int:
@@ -78,76 +115,232 @@ class Articles:
             New article to be appended to the end of the list.
         """
         
+        article.move_to(self.store) # Its data is kept in the wrapper's columns
+        
         self.articles.append(article)
+        self.by_id[article.id] = article
+        self.row_cache = None
+        self.next_id = max(self.next_id, article.id + 1)
+        self.tag_index.add(article.id, article.tags)
+        
+        
+    def allocate_id(self) -> int:
+        """
+        Returns
+        -------
+        int
+            Id for a new article - greater than the id of any article ever
+            appended, so ids of removed articles are not given out again.
+        """
+        
+        new_id = self.next_id
+        self.next_id += 1
+        
+        return new_id
+        
+        
+    def rows(self) -> np.ndarray:
+        """
+        Returns
+        -------
+        np.ndarray
+            Store's rows of all the articles, in order of the articles.
+        """
+        
+        if self.row_cache is None:
+            self.row_cache = np.fromiter((article.row for article in self.articles),
+                                         dtype=np.int64, count=len(self.articles))
+            
+        return self.row_cache
+        
+        
+    def read_ahead(self, article_ids: list):
+        """
+        Reads contents of the articles (those likely to be opened next) 
+        in the background, if contents are lazy.
+        
+        Returns
+        -------
+        threading.Thread
+            Thread reading the contents, `None` if contents are not lazy.
+        """
+        
+        if self.lazy_content:
+            return self.store.contents.read_ahead([article.row for article in self.get_many(article_ids)])
+            
+            
+    def get_many(self, article_ids: list) -> list:
+        """
+        Returns
+        -------
+        list
+            Articles with given ids, in the same order. Ids of articles that
+            do not exist (anymore) are skipped.
+        """
+        
+        return [self.by_id[article_id] for article_id in map(int, article_ids) 
+                if article_id in self.by_id]
+        
+        
+    def set_tags(self, article: Article, tags: list):
+        """
+        Replaces tags of the article, keeping the tag index up to date.
+        """
+        
+        self.tag_index.remove(article.id, article.tags)
+        article.tags = tags
+        self.tag_index.add(article.id, tags)
+        
+        
+    def with_tags(self, tags: list) -> list:
+        """
+        Returns
+        -------
+        list
+            All the articles tagged by all of the tags.
+        """
+        
+        return self.get_many(self.tag_index.lookup(tags).tolist())
+        
+    
+    def snapshot(self):
+        """
+        Copy of the wrapper, unaffected by articles added or removed 
+        afterwards. Its columns (`snapshot["title"]`, ...) are copies too, 
+        unaffected by articles liked or retagged afterwards - only the 
+        Article objects themselves are shared, and show the current values.
+        
+        Returns
+        -------
+        Articles
+            Snapshot of the wrapper.
+        """
+        
+        articles_snapshot = Articles(path_articles_content=self.path_articles_content,
+                                     path_articles_metadata=self.path_articles_metadata,
+                                     lazy_content=self.lazy_content)
+        articles_snapshot.store    = self.store.snapshot()
+        articles_snapshot.segment  = self.segment
+        articles_snapshot.articles = self.articles.copy()
+        articles_snapshot.by_id    = self.by_id.copy()
+        articles_snapshot.next_id  = self.next_id
+        articles_snapshot.tag_index = self.tag_index.copy()
+        
+        return articles_snapshot
+        
+    
+    def open_segment(self) -> ContentSegment:
+        """
+        Returns
+        -------
+        ContentSegment
+            Segment of the articles' contents, opened (or, the first time,
+            built from the content files) if it has not been yet.
+        """
+        
+        if self.segment is None:
+            self.segment = ContentSegment(self.path_articles_content)
+            
+            if self.lazy_content:
+                self.store.contents.segment = self.segment
+                
+        return self.segment
         
     
-    def load(self):
+    def load(self, workers: int = None):
         """
         Loads articles into wrapper.
+        
+        Contents are read (in a single pass over the segment) on another 
+        thread, while metadata is parsed - in chunks, across worker processes,
+        if there are many articles. Both are then put together in order 
+        of the metadata file.
+        
+        Parameters
+        ----------
+        workers : int, optional
+            Number of processes parsing the metadata. The default is None,
+            meaning as many as there are cores, if there are enough articles.
         """
         
         print("[Articles Wrapper]: Starting to load articles.")
-        articles_metadata_parsed  = parse_csv(self.path_articles_metadata)
-        articles_metadata_wrapped = DataWrapper(articles_metadata_parsed) 
-
+        timings = {} # phase -> seconds
         
-        articles_num = articles_metadata_wrapped.shape[1]
+        # All the contents are read in a single pass over the segment
+        # (lazy content is read once needed)
+        segment  = self.open_segment()
+        contents = {} # id -> content
         
-        # For each article
-        for id in range(articles_num):
-            content = "" # Set the content to empty
-            # Try loading the content from separate file
-            try:
-                content_path = self.path_articles_content / f"article_{id}.txt"
-                content = open(content_path, encoding="utf8").read()
-                
-            except Exception as err:
-                # Article's content can not be loaded, 
-                # most likely because it does not exist
-                print(f"[ARTICLE LOADING ERROR] {err}: Can't find content for article {id}.")
-                
-                
-            (_, 
-            author_id, 
-            title, 
-            tags, 
-            likes, 
-            dislikes, 
-            views, 
-            reading_time, 
-            formatted) = articles_metadata_wrapped[id].values() # Unpack metadata
+        def read_contents():
+            start = time.perf_counter()
             
-            # Literally evaluate for the sake of program's logic
-            # title = ast.literal_eval(title)
-            if title[0] != '"':
-                title = '"' + title
+            content_ids = segment.live_ids().tolist()
+            contents.update(zip(content_ids, segment.read_many(content_ids)))
             
-            if title[-1] != '"':
-                title = title + '"'
-
-            # Literally evaluate everything
-            author_id = ast.literal_eval(author_id) 
-            tags = ast.literal_eval(tags)
-            likes = ast.literal_eval(likes)
-            dislikes = ast.literal_eval(dislikes)
-            views = ast.literal_eval(views)
-            reading_time = ast.literal_eval(reading_time)
-            formatted = ast.literal_eval(formatted)
+            timings["contents"] = time.perf_counter() - start
             
-            new_article = Article(id=id,
-                                  title=title,
-                                  author_id=author_id,
-                                  tags=tags,
-                                  content=content,
-                                  likes=likes,
-                                  dislikes=dislikes,
-                                  views=views,
-                                  reading_time=reading_time,
-                                  formatted=formatted)
+        reader = None
+        if not self.lazy_content:
+            reader = threading.Thread(target=read_contents, name="content-reader", daemon=True)
+            reader.start()
+        
+        start = time.perf_counter()
+        metadata = read_metadata(self.path_articles_metadata, workers) # Rows, in order of the file
+        timings["metadata"] = time.perf_counter() - start
+        
+        if reader is not None:
+            reader.join()
+        
+        # Data goes straight into the columns, article is only a view
+        start = time.perf_counter()
+        columns = [list(column) for column in zip(*metadata)] or [[] for _ in METADATA_COLUMNS]
+        (ids, 
+         author_ids, 
+         titles, 
+         tags, 
+         likes, 
+         dislikes, 
+         views, 
+         reading_times, 
+         formatted) = columns
+        
+        article_contents = []
+        for row, id in enumerate(ids):
+            content = None
+            if not self.lazy_content:
+                content = contents.get(id)
+                
+                if content is None:
+                    # Article's content can not be loaded, 
+                    # most likely because it does not exist
+                    print(f"[ARTICLE LOADING ERROR]: Can't find content for article {id}.")
+                    content = "" # Set the content to empty
+                    
+                if not reading_times[row]:
+                    reading_times[row] = estimate_reading_time(content)
+                    
+            article_contents.append(content)
             
-            self.append(new_article)
+        store_rows = self.store.extend(id=ids,
+                                       author_id=author_ids,
+                                       title=titles,
+                                       tags=tags,
+                                       content=article_contents,
+                                       likes=likes,
+                                       dislikes=dislikes,
+                                       views=views,
+                                       reading_time=reading_times,
+                                       formatted=formatted)
+        
+        for store_row in store_rows:
+            self.append(Article.view(self.store, store_row))
             
-        print("[Articles Wrapper]: Articles successfully loaded.")
+        timings["assembling"] = time.perf_counter() - start
+        
+        self.load_timings = timings
+        print("[Articles Wrapper]: Articles successfully loaded "
+              f"({len(ids)} articles; " + 
+              ", ".join(f"{phase} {seconds:.2f} s" for phase, seconds in timings.items()) + ").")
 
 
     def show_platform_statistics_interactions(self, num_users: int = 1):
@@ -161,9 +354,11 @@ class Articles:
             Needs to be passed from User wrapper.
         """
         
-        all_likes    = sum([article.likes    for article in self.articles])
-        all_dislikes = sum([article.dislikes for article in self.articles])
-        all_views    = sum([article.views    for article in self.articles])
+        import matplotlib.pyplot as plt # Imported only when needed (slow)
+        
+        all_likes    = int(self["likes"].sum())
+        all_dislikes = int(self["dislikes"].sum())
+        all_views    = int(self["views"].sum())
         
         fig, ax = plt.subplots(figsize=(8, 5))
         bar_width = 0.5
@@ -194,14 +389,8 @@ class Articles:
         """
         
         
-        # Counts each keyword present in all the articles
-        keywords_cnt = {}
-        for article in self.articles:
-            for tag in article.tags:
-                if tag not in keywords_cnt:
-                    keywords_cnt[tag] = 1
-                else:
-                    keywords_cnt[tag] += 1
+        # Number of articles under each tag, kept by the tag index
+        keywords_cnt = self.tag_index.counts()
                     
         # Sorts the keywords and swaps them
         keywords_cnt_sorted = sorted(keywords_cnt.items(), key=lambda x: x[1], reverse=True)[:20]
@@ -209,6 +398,8 @@ class Articles:
         
         
         # Plotting part
+        import matplotlib.pyplot as plt # Imported only when needed (slow)
+        
         plt.barh(tags, values, color='skyblue')
         
         plt.xlabel('Frequency')
@@ -241,7 +432,7 @@ class Articles:
             Otherwise, return False (`user` has already liked this article).
         """
         
-        target_article = self.articles[article_id] # Get the target article
+        target_article = self[article_id] # Get the target article
         
         if article_id not in user.articles_liked:     # If article is not liked
             if article_id in user.articles_disliked:  # Remove from disliked
@@ -276,7 +467,7 @@ class Articles:
             Otherwise, return False (`user` has already liked this article).
         """
         
-        target_article = self.articles[article_id] # Get the target article 
+        target_article = self[article_id] # Get the target article 
         
         if article_id not in user.articles_disliked: # If article is not disliked
             if article_id in user.articles_liked:    # Remove from liked
@@ -327,9 +518,9 @@ class Articles:
             Complete data needed to create a new instance of Article class.
         """
         
-        # New article's id is the maximum article's id + 1, 
+        # New article's id is greater than any id given out so far,
         # so no two articles can possible have the same id
-        new_article_id = max(self.articles, key=lambda article: article.id).id + 1
+        new_article_id = self.allocate_id()
         
         # Creates a new Article instance
         new_article = Article(id=new_article_id,
@@ -342,16 +533,12 @@ class Articles:
                               formatted=True)
         
         # Adds it into the wrapper
-        self.articles.append(new_article)
+        self.append(new_article)
         
         
         # Tries writing the data (should go smoothly)
         try:
-            content_path = self.path_articles_content / f"article_{new_article_id}.txt"
-            content_file = open(content_path, "w", encoding="utf8")
-            content_file.write(new_article_data["content"])
-            
-            content_file.close()
+            self.open_segment().write(new_article_id, new_article_data["content"])
             
         except Exception as err:
             print(f"[ARTICLE CONTENT SAVING ERROR] {err}: Could not write down content for newly created file")
@@ -372,18 +559,27 @@ class Articles:
             ID of the article to be removed.
         """
         
-        found_idx = 0
-        for idx, article in enumerate(self.articles):
-            if article.id == article_id:
-                found_idx = idx # Article has been found on index `idx`
-                break
-            
-        self.articles.pop(found_idx)     # Remove the article from the wrapper
+        removed_article = self.by_id.pop(article_id) # Remove the article from the wrapper
+        self.articles.remove(removed_article)
+        self.row_cache = None
+        self.tag_index.remove(removed_article.id, removed_article.tags)
         
         self.write_metadata()            # Rewrite metadata of all articles
         self.destroy_article(article_id) # Clear all article data from storage
         
     
+    def iter_contents(self, batch_size: int = 1000):
+        """
+        Yields contents of all the articles, in order of the articles.
+        Lazy contents are read a batch at a time (and not kept), so that 
+        they are never all in memory at once.
+        """
+        
+        rows = self.rows()
+        for start in range(0, rows.shape[0], batch_size):
+            yield from self.store.take("content", rows[start:start + batch_size])
+            
+            
     def get_title_text_pairs(self) -> list[Tuple[str, str]]:
         """
         Returns
@@ -392,12 +588,7 @@ class Articles:
             List of (title, text) pairs for each article in the wrapper.
         """
         
-        result = []
-        for article in self.articles:
-            result.append((article.title, article.content))
-        
-        
-        return result
+        return list(zip(self["title"], self["content"]))
     
     def write_metadata(self):
         """
@@ -414,13 +605,10 @@ class Articles:
         Deletes the article from storage.
         """
         
-        # Path of the article to be deleted
-        content_path = self.path_articles_content / f"article_{id}.txt"
-        
         try:
-            # Delete the file
-            os.remove(content_path)
+            # Remove the content file (and its content from the segment)
+            self.open_segment().remove(id)
             print("Article has been successfully deleted.")
             
-        except OSError as err:
+        except (KeyError, OSError) as err:
             print(f"[DESTROYING ARTICLE ERROR]: {err}")
\ No newline at end of file
@@ -0,0 +1,506 @@
+from pathlib import Path
+import threading # Contents are read ahead on other threads
+import mmap      # Reading records without copying the segment
+import zlib      # Checksums
+import time
+import os
+import re
+
+import numpy as np # Math
+
+
+# Fixed-width record of the index - where the content of an article is
+INDEX_ENTRY = np.dtype([("id",       "<i8"),
+                        ("offset",   "<i8"), # -1 marks a removed article
+                        ("length",   "<i8"),
+                        ("checksum", "<u4")])
+
+
+# Number of bytes read in bulk, after which the pages read are released
+RELEASE_SIZE = 16 * 2**20
+
+# File whose modification time is when the segment was last synced with the content files
+SYNC_STAMP_NAME = "contents.synced"
+
+
+class ContentSegment:
+    def __init__(self,
+                 path_contents:        str,
+                 compaction_threshold: float = 0.5,
+                 min_compaction_size:  int = 2**20):
+        """
+        Creates an instance of ContentSegment - contents of all the articles
+        packed one after another into a single append-only file (segment),
+        found through a fixed-width index of (id, offset, length, checksum)
+        records, and read through a memory map.
+
+        Adding an article appends its content to the segment and a record
+        to the index, removing it appends a tombstone record - the latest
+        record of an id is the valid one. Space of removed (and replaced)
+        contents is reclaimed by compaction, which writes the live records
+        into a new generation of files.
+
+        Content files (article_{id}.txt) of the folder remain the store
+        of the contents - the segment is only a cache of them, which can be
+        deleted at any time. Writing or removing a content writes or removes
+        its file as well. Once opened, the segment is synced with the files
+        changed (by modification time), added or removed since it was last
+        opened, and built from all of them, if there is no segment yet.
+
+        Parameters
+        ----------
+        path_contents : str
+            Folder of the segment (contents_{generation}.seg and .idx).
+        compaction_threshold : float, optional
+            Share of the segment taken by dead contents that triggers
+            compaction. The default is 0.5.
+        min_compaction_size : int, optional
+            Number of dead bytes below which the segment is never compacted.
+            The default is 1 MiB.
+        """
+
+        self.path_contents        = Path(path_contents)
+        self.compaction_threshold = compaction_threshold
+        self.min_compaction_size  = min_compaction_size
+
+        self.lock = threading.RLock()
+
+        self.memory_map = None
+        self.open()
+
+
+    def __len__(self) -> int:
+        return len(self.live_ids())
+
+
+    def __contains__(self, article_id: int) -> bool:
+        return self.find(article_id) is not None
+
+
+    def path(self, generation: int, extension: str) -> Path:
+        return self.path_contents / f"contents_{generation}.{extension}"
+
+
+    def open(self):
+        """
+        Opens the newest complete generation of the segment (building
+        the first one from content files, if there is none), removing
+        files of any other generation, and syncs it with the content files.
+        """
+
+        with self.lock:
+            self.path_contents.mkdir(parents=True, exist_ok=True)
+            sync_started = time.time_ns()
+
+            # Index is renamed into place once its segment is written down,
+            # so a generation is complete if it has an index
+            generations = sorted(int(re.fullmatch(r"contents_(\d+)\.idx", path.name).group(1))
+                                 for path in self.path_contents.glob("contents_*.idx"))
+
+            if generations:
+                self.generation = generations[-1]
+            else:
+                self.generation = 0
+                self.write_generation(0, self.content_files())
+
+            for path in self.path_contents.glob("contents_*"):
+                if path.name not in (self.path(self.generation, "seg").name,
+                                     self.path(self.generation, "idx").name):
+                    path.unlink() # Left behind by an interrupted compaction
+
+            self.load_index()
+
+            if generations:
+                self.sync(sync_started)
+            else:
+                os.utime(self.touch_sync_stamp(), ns=(sync_started, sync_started))
+
+
+    def touch_sync_stamp(self) -> Path:
+        path = self.path_contents / SYNC_STAMP_NAME
+        path.touch()
+        return path
+
+
+    def content_path(self, article_id: int) -> Path:
+        return self.path_contents / f"article_{article_id}.txt"
+
+
+    def sync(self, sync_started: int):
+        """
+        Brings the segment up to date with the content files - caches
+        files added or modified since the last sync, and drops contents
+        whose files are gone. Only the changed files are read.
+
+        Parameters
+        ----------
+        sync_started : int
+            Time (in nanoseconds) the sync has started at, kept as the time
+            of the sync. Files modified while syncing get synced again.
+        """
+
+        try:
+            last_synced = (self.path_contents / SYNC_STAMP_NAME).stat().st_mtime_ns
+        except FileNotFoundError:
+            last_synced = None # Every file is read again
+
+        file_ids = []
+        for entry in os.scandir(self.path_contents):
+            match = re.fullmatch(r"article_(\d+)\.txt", entry.name)
+            if not match:
+                continue
+
+            article_id = int(match.group(1))
+            file_ids.append(article_id)
+
+            if (article_id not in self or last_synced is None or
+                entry.stat().st_mtime_ns >= last_synced):
+                self.append_content(article_id, Path(entry.path).read_text(encoding="utf8"))
+
+        for article_id in np.setdiff1d(self.live_ids(), np.array(file_ids, dtype=np.int64)).tolist():
+            self.append_tombstone(article_id)
+
+        os.utime(self.touch_sync_stamp(), ns=(sync_started, sync_started))
+        self.compact_if_needed()
+
+
+    def content_files(self):
+        """
+        Yields
+        ------
+        tuple
+            (id, content) of every content file of the folder, ordered by id.
+        """
+
+        files = []
+        for path in self.path_contents.glob("article_*.txt"):
+            match = re.fullmatch(r"article_(\d+)\.txt", path.name)
+            if match:
+                files.append((int(match.group(1)), path))
+
+        for article_id, path in sorted(files):
+            yield article_id, path.read_text(encoding="utf8")
+
+
+    def write_generation(self, generation: int, records):
+        """
+        Writes the records ((id, content) pairs) into the segment and
+        the index of the given generation.
+        """
+
+        entries = []
+        with open(self.path(generation, "seg"), "wb") as segment_file:
+            for article_id, content in records:
+                encoded = content.encode("utf8") if isinstance(content, str) else content
+
+                entries.append((article_id, segment_file.tell(), len(encoded), zlib.crc32(encoded)))
+                segment_file.write(encoded)
+
+            segment_file.flush()
+            os.fsync(segment_file.fileno())
+
+        temporary_path = self.path(generation, "idx.tmp")
+        np.array(entries, dtype=INDEX_ENTRY).tofile(temporary_path)
+        os.replace(temporary_path, self.path(generation, "idx"))
+
+
+    def load_index(self):
+        """
+        Reads the index, keeping the latest record of every id.
+        """
+
+        entries = np.fromfile(self.path(self.generation, "idx"), dtype=INDEX_ENTRY)
+
+        # Latest record of an id wins - unique of the reversed ids finds them
+        _, last = np.unique(entries["id"][::-1], return_index=True)
+        entries = entries[entries.shape[0] - 1 - last]
+        entries = entries[entries["offset"] >= 0] # Removed articles
+
+        self.ids       = entries["id"].copy() # Sorted by unique
+        self.offsets   = entries["offset"].copy()
+        self.lengths   = entries["length"].copy()
+        self.checksums = entries["checksum"].copy()
+
+        self.recent = {} # id -> (offset, length, checksum), or None if removed, since loaded
+
+        self.segment_size = self.path(self.generation, "seg").stat().st_size
+        self.live_size    = int(self.lengths.sum())
+
+        self.remap()
+
+
+    def remap(self):
+        """
+        Maps the segment (again, once it has grown) into memory.
+        """
+
+        if self.memory_map is not None:
+            self.memory_map.close()
+            self.memory_map = None
+
+        if self.segment_size:
+            with open(self.path(self.generation, "seg"), "rb") as segment_file:
+                self.memory_map = mmap.mmap(segment_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+    def close(self):
+        with self.lock:
+            if self.memory_map is not None:
+                self.memory_map.close()
+                self.memory_map = None
+
+
+    def find(self, article_id: int) -> tuple:
+        """
+        Returns
+        -------
+        tuple
+            (offset, length, checksum) of the article's content,
+            `None` if there is none.
+        """
+
+        if article_id in self.recent:
+            return self.recent[article_id]
+
+        position = np.searchsorted(self.ids, article_id)
+        if position < self.ids.shape[0] and self.ids[position] == article_id:
+            return (int(self.offsets[position]), int(self.lengths[position]),
+                    int(self.checksums[position]))
+
+        return None
+
+
+    def live_ids(self) -> np.ndarray:
+        """
+        Returns
+        -------
+        np.ndarray
+            Sorted ids of all the articles with content.
+        """
+
+        with self.lock:
+            added   = [article_id for article_id, entry in self.recent.items() if entry is not None]
+            removed = [article_id for article_id, entry in self.recent.items() if entry is None]
+
+            return np.setdiff1d(np.union1d(self.ids, np.array(added, dtype=np.int64)),
+                                np.array(removed, dtype=np.int64))
+
+
+    def read(self, article_id: int) -> str:
+        """
+        Returns
+        -------
+        str
+            Content of the article.
+
+        Raises
+        ------
+        KeyError
+            If the segment holds no content of the article.
+        ValueError
+            If the content does not match its checksum (is corrupted).
+        """
+
+        with self.lock:
+            entry = self.find(article_id)
+            if entry is None:
+                raise KeyError(f"No content of article {article_id}.")
+
+            offset, length, checksum = entry
+            if offset + length > (len(self.memory_map) if self.memory_map is not None else 0):
+                self.remap() # Appended after the segment has been mapped
+
+            encoded = self.memory_map[offset:offset + length] if length else b""
+
+        if zlib.crc32(encoded) != checksum:
+            raise ValueError(f"Content of article {article_id} is corrupted (checksum mismatch).")
+
+        return encoded.decode("utf8")
+
+
+    def read_many(self, article_ids: list) -> list:
+        """
+        Reads contents of many articles in a single sequential pass over
+        the segment (in order of their offsets).
+
+        Returns
+        -------
+        list
+            Contents of the articles, in the same order - `None` for those
+            without (valid) content.
+        """
+
+        contents = [None] * len(article_ids)
+
+        with self.lock:
+            entries = [(self.find(int(article_id)), position)
+                       for position, article_id in enumerate(article_ids)]
+            entries = sorted((entry, position) for entry, position in entries if entry is not None)
+
+            if entries and (self.memory_map is None or len(self.memory_map) < self.segment_size):
+                self.remap() # Appended after the segment has been mapped
+
+            memory_map = self.memory_map
+            released   = 0 # Mapped pages before this offset have been released
+            for (offset, length, checksum), position in entries:
+                encoded = memory_map[offset:offset + length] if length else b""
+                if zlib.crc32(encoded) == checksum:
+                    contents[position] = encoded.decode("utf8")
+
+                # Contents are copied out, so pages read are not needed anymore - they
+                # stay in the page cache, but do not add up in memory of the process
+                if offset - released >= RELEASE_SIZE and hasattr(mmap, "MADV_DONTNEED"):
+                    end = offset - offset % mmap.PAGESIZE
+                    memory_map.madvise(mmap.MADV_DONTNEED, released, end - released)
+                    released = end
+
+        return contents
+
+
+    def append_entry(self, entry: tuple):
+        with open(self.path(self.generation, "idx"), "ab") as index_file:
+            index_file.write(np.array([entry], dtype=INDEX_ENTRY).tobytes())
+
+
+    def append_content(self, article_id: int, content: str):
+        """
+        Appends the article's content to the segment only (replacing its
+        previous content, if there is any).
+        """
+
+        encoded = content.encode("utf8")
+
+        with self.lock:
+            previous = self.find(article_id)
+
+            with open(self.path(self.generation, "seg"), "ab") as segment_file:
+                offset = segment_file.seek(0, os.SEEK_END)
+                segment_file.write(encoded)
+
+            # Record is only valid once its content is written down
+            checksum = zlib.crc32(encoded)
+            self.append_entry((article_id, offset, len(encoded), checksum))
+
+            self.recent[article_id] = (offset, len(encoded), checksum)
+            self.segment_size = offset + len(encoded)
+            self.live_size   += len(encoded) - (previous[1] if previous is not None else 0)
+
+
+    def append_tombstone(self, article_id: int):
+        """
+        Removes the article's content from the segment only.
+        """
+
+        with self.lock:
+            previous = self.find(article_id)
+            if previous is None:
+                return
+
+            self.append_entry((article_id, -1, 0, 0))
+
+            self.recent[article_id] = None
+            self.live_size -= previous[1]
+
+
+    def write(self, article_id: int, content: str):
+        """
+        Writes the article's content into its content file, and appends it
+        to the segment (replacing its previous content, if there is any).
+        """
+
+        with self.lock:
+            # File is written aside and renamed into place, so it is never left half-written
+            content_path   = self.content_path(article_id)
+            temporary_path = content_path.with_name(content_path.name + ".tmp")
+            temporary_path.write_text(content, encoding="utf8")
+            os.replace(temporary_path, content_path)
+
+            self.append_content(article_id, content)
+
+        self.compact_if_needed()
+
+
+    def remove(self, article_id: int):
+        """
+        Removes the article's content file and its content from the
+        segment - a tombstone is appended, the space is reclaimed
+        by compaction.
+
+        Raises
+        ------
+        KeyError
+            If there is no content of the article.
+        """
+
+        with self.lock:
+            try:
+                self.content_path(article_id).unlink()
+                had_file = True
+            except FileNotFoundError:
+                had_file = False
+
+            if self.find(article_id) is None:
+                if not had_file:
+                    raise KeyError(f"No content of article {article_id}.")
+            else:
+                self.append_tombstone(article_id)
+
+        self.compact_if_needed()
+
+
+    def dead_size(self) -> int:
+        """
+        Returns
+        -------
+        int
+            Number of bytes of the segment taken by removed or replaced contents.
+        """
+
+        return self.segment_size - self.live_size
+
+
+    def compact_if_needed(self) -> bool:
+        """
+        Compacts the segment, once dead contents take too much of it.
+
+        Returns
+        -------
+        bool
+            Whether the segment has been compacted.
+        """
+
+        dead_size = self.dead_size()
+        if (dead_size >= self.min_compaction_size and
+            dead_size >= self.compaction_threshold * self.segment_size):
+            self.compact()
+            return True
+
+        return False
+
+
+    def compact(self):
+        """
+        Writes live contents into a new generation of the segment (ordered
+        by id, so reading all of them is sequential), and removes the old one.
+        """
+
+        with self.lock:
+            article_ids = self.live_ids()
+            old_generation = self.generation
+
+            def records(batch_size: int = 10000):
+                # Read in batches, so that contents are never all in memory at once
+                for start in range(0, article_ids.shape[0], batch_size):
+                    batch = article_ids[start:start + batch_size].tolist()
+                    for article_id, content in zip(batch, self.read_many(batch)):
+                        if content is not None:
+                            yield article_id, content
+
+            self.write_generation(old_generation + 1, records())
+
+            self.close()
+            self.generation = old_generation + 1
+            self.load_index()
+
+            self.path(old_generation, "seg").unlink(missing_ok=True)
+            self.path(old_generation, "idx").unlink(missing_ok=True)
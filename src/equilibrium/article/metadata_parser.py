@@ -0,0 +1,205 @@
+"""
+Parsing of articles' metadata .csv file.
+
+Every row is parsed by a typed fast path, which knows the columns' types
+and splits the row from both ends, rather than matching it by a regular
+expression and literal-evaluating every value. Rows it can not parse
+exactly are parsed the way they always have been.
+
+Large files are parsed in chunks, across worker processes.
+"""
+
+import ast # Literal evaluation (slow path)
+import os
+
+from utils.parser import parse_csv_line
+
+
+METADATA_COLUMNS = ["id", "author_id", "title", "tags", "likes",
+                    "dislikes", "views", "reading_time", "formatted"]
+
+BOOLEANS = {"True": True, "False": False}
+
+# Number of rows, below which the file is parsed in this process -
+# starting the workers would take longer than parsing
+PARALLEL_THRESHOLD = 20000
+
+
+def evaluate(value):
+    """
+    Literal-evaluates the value, in case it is a string.
+    """
+
+    return ast.literal_eval(value) if isinstance(value, str) else value
+
+
+def fix_title(title: str) -> str:
+    """
+    Titles are kept in quotes.
+    """
+
+    if title[0] != '"':
+        title = '"' + title
+
+    if title[-1] != '"':
+        title = title + '"'
+
+    return title
+
+
+def parse_tags(tags: str) -> list:
+    """
+    Parses the list of tags written down by `str(tags)`, e.g. "['a', 'b']".
+
+    Raises
+    ------
+    ValueError
+        If the tags are not written down that way (any tag quoted
+        differently, for example).
+    """
+
+    if tags == "[]":
+        return []
+
+    if not (tags.startswith("['") and tags.endswith("']")):
+        raise ValueError(f"Tags are not a simple list: {tags}")
+
+    parsed_tags = tags[2:-2].split("', '")
+    if str(parsed_tags) != tags:
+        raise ValueError(f"Tags are not a simple list: {tags}")
+
+    return parsed_tags
+
+
+def parse_typed(line: str) -> tuple:
+    """
+    Fast path - parses the row knowing its columns:
+        id,author_id,title,"[tags]","likes","dislikes","views",reading_time,formatted
+    Title is the only column that may contain anything, so the row
+    is split around it.
+
+    Raises
+    ------
+    ValueError
+        If the row does not look that way.
+    """
+
+    rest, likes, dislikes, views, reading_time, formatted = line.rstrip("\n").rsplit(",", 5)
+
+    tags_start = rest.rindex(',"[')
+    tags = rest[tags_start + 1:]
+    if not tags.endswith(']"'):
+        raise ValueError(f"Tags are not a list: {tags}")
+
+    id, author_id, title = rest[:tags_start].split(",", 2)
+    if not title or '"' in title[1:-1].replace('""', ""):
+        raise ValueError(f"Title needs the slow path: {title}") # Quotes might split it
+
+    return (int(id),
+            int(author_id),
+            fix_title(title.replace('""', '"')),
+            parse_tags(tags[1:-1]),
+            int(likes.strip('"')),
+            int(dislikes.strip('"')),
+            int(views.strip('"')),
+            float(reading_time),
+            BOOLEANS[formatted])
+
+
+def parse_literal(line: str) -> tuple:
+    """
+    Slow path - parses the row as a general .csv row, and literal-evaluates
+    every value (some are quoted twice).
+    """
+
+    (id,
+     author_id,
+     title,
+     tags,
+     likes,
+     dislikes,
+     views,
+     reading_time,
+     formatted) = parse_csv_line(line)
+
+    return (int(ast.literal_eval(id)),
+            ast.literal_eval(author_id),
+            fix_title(title),
+            evaluate(ast.literal_eval(tags)),
+            evaluate(ast.literal_eval(likes)),
+            evaluate(ast.literal_eval(dislikes)),
+            evaluate(ast.literal_eval(views)),
+            ast.literal_eval(reading_time),
+            ast.literal_eval(formatted))
+
+
+def parse_metadata_line(line: str) -> tuple:
+    """
+    Returns
+    -------
+    tuple
+        Values of the row, typed, in order of `METADATA_COLUMNS`.
+    """
+
+    try:
+        return parse_typed(line)
+    except (ValueError, KeyError):
+        return parse_literal(line)
+
+
+def parse_metadata_lines(lines: list) -> list:
+    """
+    Returns
+    -------
+    list
+        Parsed rows (tuples of values), in order.
+    """
+
+    return [parse_metadata_line(line) for line in lines]
+
+
+def read_metadata(path: str, workers: int = None) -> list:
+    """
+    Reads and parses the metadata file.
+
+    Parameters
+    ----------
+    path : str
+        Path to the metadata .csv file.
+    workers : int, optional
+        Number of worker processes parsing the rows. The default is None,
+        meaning as many as there are cores, if there are enough rows.
+
+    Returns
+    -------
+    list
+        Parsed rows (tuples of values, in order of `METADATA_COLUMNS`),
+        in the same order as in the file.
+    """
+
+    with open(path, encoding="utf8") as metadata_file:
+        lines = metadata_file.readlines()
+
+    header = parse_csv_line(lines[0])
+    if header != METADATA_COLUMNS:
+        raise ValueError(f"Unexpected columns of {path}: {header}")
+
+    lines = [line for line in lines[1:] if line.strip("\n")]
+
+    if workers is None:
+        workers = (os.cpu_count() or 1) if len(lines) >= PARALLEL_THRESHOLD else 1
+
+    if workers <= 1:
+        return parse_metadata_lines(lines)
+
+    from concurrent.futures import ProcessPoolExecutor # Imported only when needed (slow)
+    import multiprocessing
+
+    # Chunks are parsed in parallel, and put together in their order.
+    # Workers are spawned (not forked), since loading runs on a thread
+    chunk_size = -(-len(lines) // workers)
+    chunks     = [lines[start:start + chunk_size] for start in range(0, len(lines), chunk_size)]
+
+    with ProcessPoolExecutor(max_workers=workers,
+                             mp_context=multiprocessing.get_context("spawn")) as executor:
+        return [row for rows in executor.map(parse_metadata_lines, chunks) for row in rows]
@@ -0,0 +1,113 @@
+import numpy as np # Math
+
+
+class TagIndex:
+    def __init__(self):
+        """
+        Creates an instance of TagIndex (tag -> ids of articles tagged by it).
+        Ids of every tag are kept as a sorted array, so that filtering by
+        several tags is an intersection of sorted arrays, rather than
+        a scan of all the articles' tags.
+        Ids added one by one are collected first, and merged into the array
+        once the tag is looked up.
+        """
+
+        self.ids     = {} # tag -> sorted np.ndarray of ids
+        self.pending = {} # tag -> list of ids added since the last lookup
+
+
+    def __len__(self) -> int:
+        return len(set(self.ids) | set(self.pending))
+
+
+    def __contains__(self, tag: str) -> bool:
+        return len(self[tag]) > 0
+
+
+    def __getitem__(self, tag: str) -> np.ndarray:
+        """
+        Returns
+        -------
+        np.ndarray
+            Sorted ids of the articles tagged by the tag.
+        """
+
+        pending = self.pending.pop(tag, None)
+        if pending:
+            self.ids[tag] = np.union1d(self.ids.get(tag, np.empty(0, dtype=np.int64)),
+                                       np.array(pending, dtype=np.int64))
+
+        return self.ids.get(tag, np.empty(0, dtype=np.int64))
+
+
+    def copy(self):
+        """
+        Returns
+        -------
+        TagIndex
+            Copy of the index, unaffected by changes made to this one.
+        """
+
+        index_copy = TagIndex()
+        index_copy.ids     = dict(self.ids) # Arrays are replaced, never modified
+        index_copy.pending = {tag: list(ids) for tag, ids in self.pending.items()}
+
+        return index_copy
+
+
+    def add(self, article_id: int, tags: list):
+        """
+        Adds the article under each of its tags.
+        """
+
+        for tag in set(tags):
+            self.pending.setdefault(tag, []).append(article_id)
+
+
+    def remove(self, article_id: int, tags: list):
+        """
+        Removes the article from under each of its tags.
+        """
+
+        for tag in set(tags):
+            ids = self[tag]
+
+            position = np.searchsorted(ids, article_id)
+            if position < len(ids) and ids[position] == article_id:
+                ids = np.delete(ids, position)
+
+            if len(ids):
+                self.ids[tag] = ids
+            else:
+                self.ids.pop(tag, None)
+
+
+    def lookup(self, tags: list) -> np.ndarray:
+        """
+        Returns
+        -------
+        np.ndarray
+            Sorted ids of the articles tagged by all of the tags.
+        """
+
+        # Intersecting from the rarest tag keeps the intermediate results small
+        postings = sorted((self[tag] for tag in set(tags)), key=len)
+        if not postings:
+            return np.empty(0, dtype=np.int64)
+
+        ids = postings[0]
+        for tag_ids in postings[1:]:
+            ids = np.intersect1d(ids, tag_ids, assume_unique=True)
+
+        return ids
+
+
+    def counts(self) -> dict:
+        """
+        Returns
+        -------
+        dict
+            Number of articles tagged by every tag.
+        """
+
+        return {tag: len(self[tag]) for tag in set(self.ids) | set(self.pending)}
@@ -0,0 +1,129 @@
+"""
+Reports recall@k and latency of approximate recommendation (random-projection
+LSH) against the exact search, on synthetic corpora made of topics.
+
+Run from `src/equilibrium`:
+    python -m benchmark.ann_benchmark --sizes 10000 100000 --tables 8 16 32
+"""
+
+import argparse
+import time
+
+import numpy as np # Math
+
+from sklearn.preprocessing import normalize # Normalization
+from scipy.sparse import csr_matrix         # Synthetic corpora
+
+from model.lsh import RandomProjectionLSH
+
+
+def make_topic_corpus(num_articles:      int,
+                      num_features:      int,
+                      num_topics:        int,
+                      terms_per_article: int,
+                      rng: np.random.Generator) -> csr_matrix:
+    """
+    Creates a synthetic TF-IDF matrix, where every article mixes terms of 
+    its topic with background (Zipfian) terms - so that articles of the same
+    topic are similar to each other, like in a real corpus.
+
+    Returns
+    -------
+    csr_matrix
+        L2-normalised matrix (num_articles x num_features).
+    """
+
+    topic_terms = rng.integers(0, num_features, size=(num_topics, 200))
+    topics      = rng.integers(0, num_topics, size=num_articles)
+
+    topical    = terms_per_article // 2
+    background = terms_per_article - topical
+
+    chosen = topic_terms[topics[:, None], 
+                         (rng.zipf(1.5, size=(num_articles, topical)) - 1) % 200]
+    noise  = (rng.zipf(1.3, size=(num_articles, background)) - 1) % num_features
+
+    terms = np.hstack([chosen, noise]).ravel()
+    rows  = np.repeat(np.arange(num_articles), terms_per_article)
+    data  = rng.random(terms.shape[0], dtype=np.float32)
+
+    matrix = csr_matrix((data, (rows, terms)), shape=(num_articles, num_features))
+    matrix.sum_duplicates()
+
+    return normalize(matrix, norm="l2", axis=1)
+
+
+def exact_top_k(tfidf_matrix: csr_matrix, row: int, k: int) -> np.ndarray:
+    """
+    Exact top-`k` most similar articles - scores every single article.
+    """
+
+    scores = (tfidf_matrix @ tfidf_matrix[row].T).toarray().ravel()
+    scores[row] = -np.inf
+
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--features", type=int, default=20_000)
+    parser.add_argument("--topics", type=int, default=500)
+    parser.add_argument("--terms-per-article", type=int, default=60)
+    parser.add_argument("--tables", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--probes", type=int, nargs="+", default=[0, 2])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+
+    print(f"{'articles':>9} {'backend':>16} {'build':>9} {'candidates':>11} "
+          f"{'p50':>9} {'p95':>9} {f'recall@{args.k}':>10}")
+
+    for size in args.sizes:
+        tfidf_matrix = make_topic_corpus(size, args.features, args.topics,
+                                         args.terms_per_article, rng)
+        rows = rng.choice(size, size=min(args.queries, size), replace=False)
+
+        # Exact path - also the ground truth
+        latencies = []
+        truth = {}
+        for row in rows:
+            start = time.perf_counter()
+            truth[row] = exact_top_k(tfidf_matrix, row, args.k)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        print(f"{size:>9} {'exact':>16} {'-':>9} {size - 1:>11} "
+              f"{np.median(latencies):>6.2f} ms {np.percentile(latencies, 95):>6.2f} ms "
+              f"{1.0:>10.3f}")
+
+        for num_tables in args.tables:
+            start = time.perf_counter()
+            lsh = RandomProjectionLSH.build(tfidf_matrix, num_tables=num_tables)
+            build_time = time.perf_counter() - start
+
+            for num_probes in args.probes:
+                latencies, recalls, candidates = [], [], []
+                for row in rows:
+                    vector = tfidf_matrix[row]
+
+                    start = time.perf_counter()
+                    found, _ = lsh.query(vector, tfidf_matrix, k=args.k, 
+                                         exclude=row, num_probes=num_probes)
+                    latencies.append((time.perf_counter() - start) * 1000)
+
+                    recalls.append(len(np.intersect1d(found, truth[row])) / args.k)
+                    candidates.append(len(lsh.candidates(vector, num_probes=num_probes)))
+
+                backend = f"lsh {num_tables}x{lsh.num_bits} p{num_probes}"
+                print(f"{size:>9} {backend:>16} {build_time:>7.2f} s {np.mean(candidates):>11.0f} "
+                      f"{np.median(latencies):>6.2f} ms {np.percentile(latencies, 95):>6.2f} ms "
+                      f"{np.mean(recalls):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
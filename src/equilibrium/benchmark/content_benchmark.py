@@ -0,0 +1,128 @@
+"""
+Measures loading of articles with eager content (every content file read
+up front) and lazy content (only metadata read, contents read once needed),
+on synthetic corpora of growing size - time to load, peak memory, and
+the latency of opening an article (cold, cached and read ahead).
+
+Every run starts a fresh interpreter, so that memory is measured alone.
+
+Run from `src/equilibrium`:
+    python -m benchmark.content_benchmark --sizes 5000 20000 --content-size 8000
+"""
+
+from pathlib import Path
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np # Math
+
+from article.articles import Articles
+from article.content_segment import ContentSegment
+
+
+def make_corpus(path: Path, num_articles: int, content_size: int, rng: np.random.Generator):
+    """
+    Writes metadata and content files of a synthetic corpus into the folder.
+    """
+
+    words = np.array(["data", "model", "market", "bitcoin", "learning", "network",
+                      "company", "product", "research", "system", "people", "time"])
+
+    content_folder = path / "content"
+    content_folder.mkdir(parents=True, exist_ok=True)
+
+    with open(path / "metadata.csv", "w", encoding="utf8") as metadata_file:
+        metadata_file.write("id,author_id,title,tags,likes,dislikes,views,reading_time,formatted\n")
+        for article_id in range(num_articles):
+            content = " ".join(rng.choice(words, size=content_size // 7))
+            (content_folder / f"article_{article_id}.txt").write_text(content, encoding="utf8")
+
+            title = " ".join(rng.choice(words, size=6)).title()
+            tags  = rng.choice(words, size=3, replace=False).tolist()
+            metadata_file.write(f'{article_id},0,"{title}","{tags}","0","0","0",'
+                                f'{len(content.split()) / 300:.2f},False\n')
+
+
+def run_child(path: Path, lazy: bool):
+    """
+    Loads the corpus and prints the timings (seconds) and peak memory (MiB)
+    as JSON.
+    """
+
+    start = time.perf_counter()
+
+    articles = Articles(path_articles_content=path / "content",
+                        path_articles_metadata=path / "metadata.csv",
+                        lazy_content=lazy)
+    articles.load()
+    loaded = time.perf_counter()
+
+    # Opening an article for the first time, and once again
+    article = articles[len(articles) // 2]
+    cold = time.perf_counter()
+    article.content
+    cold = time.perf_counter() - cold
+
+    warm = time.perf_counter()
+    article.content
+    warm = time.perf_counter() - warm
+
+    # Opening an article read ahead
+    if lazy:
+        articles.read_ahead([0, 1, 2]).join()
+    ahead = time.perf_counter()
+    articles[1].content
+    ahead = time.perf_counter() - ahead
+
+    print(json.dumps({"load":     loaded - start,
+                      "cold_ms":  cold * 1000,
+                      "warm_ms":  warm * 1000,
+                      "ahead_ms": ahead * 1000,
+                      "peak_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5000, 20000])
+    parser.add_argument("--content-size", type=int, default=8000, help="Characters per article")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--lazy", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(Path(args.child), args.lazy)
+        return
+
+    rng = np.random.default_rng(0)
+
+    print(f"{'articles':>9} | {'mode':>5} | {'load (s)':>9} | {'peak (MiB)':>10} | "
+          f"{'cold (ms)':>9} | {'warm (ms)':>9} | {'ahead (ms)':>10}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as folder:
+            make_corpus(Path(folder), size, args.content_size, rng)
+
+            # Content files are packed into the segment once, the first load would do it
+            packing = time.perf_counter()
+            ContentSegment(Path(folder) / "content").close()
+            print(f"{size:>9} | packed content files into the segment in {time.perf_counter() - packing:.2f} s")
+
+            for mode in ["eager", "lazy"]:
+                command = [sys.executable, "-m", "benchmark.content_benchmark", "--child", folder]
+                if mode == "lazy":
+                    command.append("--lazy")
+
+                output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+                timing = json.loads(output.strip().splitlines()[-1])
+
+                print(f"{size:>9} | {mode:>5} | {timing['load']:9.2f} | {timing['peak_mib']:10.1f} | "
+                      f"{timing['cold_ms']:9.3f} | {timing['warm_ms']:9.3f} | {timing['ahead_ms']:10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Measures loading of articles on synthetic corpora of growing size - parsing
+the metadata by the old (literal-evaluating) parser, by the typed parser
+on a single process, and across worker processes, and the phases of
+a whole load (contents read while metadata is parsed, then assembled).
+
+Run from `src/equilibrium`:
+    python -m benchmark.load_benchmark --sizes 20000 100000 --workers 4
+"""
+
+from pathlib import Path
+import argparse
+import tempfile
+import time
+
+import numpy as np # Math
+
+from article.articles import Articles
+from article.content_segment import ContentSegment
+from article.metadata_parser import parse_literal, read_metadata
+from benchmark.content_benchmark import make_corpus
+
+
+def measure(function, *args) -> float:
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20000, 100000])
+    parser.add_argument("--workers", type=int, default=4, help="Processes parsing the metadata")
+    parser.add_argument("--content-size", type=int, default=500, help="Characters per article")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+
+    print(f"{'articles':>9} | {'literal (s)':>11} | {'typed (s)':>9} | {f'typed x{args.workers} (s)':>14} | "
+          f"{'load (s)':>8} | phases")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as folder:
+            make_corpus(Path(folder), size, args.content_size, rng)
+            ContentSegment(Path(folder) / "content").close() # Packed once, the first load would do it
+
+            metadata_path = Path(folder) / "metadata.csv"
+            with open(metadata_path, encoding="utf8") as metadata_file:
+                lines = metadata_file.readlines()[1:]
+
+            literal  = measure(lambda: [parse_literal(line) for line in lines])
+            typed    = measure(read_metadata, metadata_path, 1)
+            parallel = measure(read_metadata, metadata_path, args.workers)
+
+            articles = Articles(path_articles_content=Path(folder) / "content",
+                                path_articles_metadata=metadata_path)
+            load = measure(articles.load, args.workers)
+
+            phases = ", ".join(f"{phase} {seconds:.2f}" for phase, seconds in articles.load_timings.items())
+            print(f"{size:>9} | {literal:11.2f} | {typed:9.2f} | {parallel:14.2f} | {load:8.2f} | {phases}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Compares latency of the two search scorers - TF-IDF cosine similarity
+(inverted index) and BM25 (inverted index over term frequencies) - on the
+same queries, over synthetic corpora of different sizes. Overlap of their
+results is reported too, to show how differently they rank.
+
+Run from `src/equilibrium`:
+    python -m benchmark.scorer_benchmark --sizes 10000 100000 1000000
+"""
+
+import argparse
+
+import numpy as np # Math
+
+from scipy.sparse import csr_matrix # Synthetic corpora
+
+from benchmark.search_benchmark import time_queries
+from model.inverted_index import InvertedIndex
+from model.bm25 import BM25Index
+from model.vectorizer import normalize_rows
+
+
+def make_term_frequencies(num_articles: int,
+                          num_features: int,
+                          terms_per_article: int,
+                          rng: np.random.Generator) -> csr_matrix:
+    """
+    Creates synthetic term counts, whose terms follow Zipf's law and
+    whose articles' lengths vary (log-normally) around `terms_per_article`.
+
+    Returns
+    -------
+    csr_matrix
+        Counts (num_articles x num_features).
+    """
+
+    lengths = np.maximum(rng.lognormal(np.log(terms_per_article), 0.5, size=num_articles), 1).astype(np.int64)
+
+    terms = (rng.zipf(1.3, size=int(lengths.sum())) - 1) % num_features
+    rows  = np.repeat(np.arange(num_articles), lengths)
+
+    matrix = csr_matrix((np.ones(terms.shape[0], dtype=np.float32), (rows, terms)),
+                        shape=(num_articles, num_features))
+    matrix.sum_duplicates()
+
+    return matrix
+
+
+def tfidf(counts: csr_matrix, idf: np.ndarray) -> csr_matrix:
+    """
+    Returns
+    -------
+    csr_matrix
+        L2-normalised TF-IDF matrix of the counts.
+    """
+
+    weighted = counts.astype(np.float64)
+    weighted.data *= idf[weighted.indices]
+
+    return normalize_rows(weighted)
+
+
+def make_queries(num_queries: int,
+                 num_features: int,
+                 rng: np.random.Generator) -> list:
+    """
+    Creates keyword queries of 1 to 3 terms, drawn with the same
+    distribution as the corpus.
+
+    Returns
+    -------
+    list
+        List of query counts (1 x num_features).
+    """
+
+    queries = []
+    for _ in range(num_queries):
+        terms = np.unique((rng.zipf(1.3, size=rng.integers(1, 4)) - 1) % num_features)
+        queries.append(csr_matrix((np.ones(len(terms)), (np.zeros(len(terms), dtype=int), terms)),
+                                  shape=(1, num_features)))
+
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--features", type=int, default=50_000)
+    parser.add_argument("--terms-per-article", type=int, default=60)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--quantity", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    queries = make_queries(args.queries, args.features, rng)
+
+    print(f"{'articles':>10} {'tfidf p50':>10} {'tfidf p95':>10} "
+          f"{'bm25 p50':>10} {'bm25 p95':>10} {'overlap':>8}")
+
+    for size in args.sizes:
+        counts = make_term_frequencies(size, args.features, args.terms_per_article, rng)
+
+        bm25 = BM25Index.build(counts)
+
+        # Smoothed IDF, the way the vectorizer weights the terms
+        document_frequencies = np.diff(bm25.pointers)
+        idf = np.log((size + 1) / (document_frequencies + 1)) + 1
+
+        index = InvertedIndex.build(tfidf(counts, idf))
+        query_vectors = [tfidf(query, idf) for query in queries]
+
+        tfidf_latencies = time_queries(lambda query: index.top_k(query, args.quantity),
+                                       query_vectors)
+        bm25_latencies  = time_queries(lambda query: bm25.top_k(query, args.quantity),
+                                       queries)
+
+        overlap = np.mean([len(set(index.top_k(query_vector, args.quantity)[0]) &
+                               set(bm25.top_k(query, args.quantity)[0])) / args.quantity
+                           for query_vector, query in zip(query_vectors, queries)])
+
+        print(f"{size:>10} "
+              f"{np.median(tfidf_latencies):>7.2f} ms {np.percentile(tfidf_latencies, 95):>7.2f} ms "
+              f"{np.median(bm25_latencies):>7.2f} ms {np.percentile(bm25_latencies, 95):>7.2f} ms "
+              f"{overlap:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
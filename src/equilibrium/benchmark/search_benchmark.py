@@ -0,0 +1,134 @@
+"""
+Compares latency of the exhaustive search (cosine similarity against every
+article, followed by sorting) with the inverted index search, on synthetic 
+corpora of different sizes.
+
+Run from `src/equilibrium`:
+    python -m benchmark.search_benchmark --sizes 10000 100000 1000000
+"""
+
+import argparse
+import time
+
+import numpy as np # Math
+
+from sklearn.metrics.pairwise import cosine_similarity # Exhaustive search
+from sklearn.preprocessing import normalize            # Normalization
+from scipy.sparse import csr_matrix                    # Synthetic corpora
+
+from model.inverted_index import InvertedIndex
+
+
+def make_corpus(num_articles: int, 
+                num_features: int, 
+                terms_per_article: int,
+                rng: np.random.Generator) -> csr_matrix:
+    """
+    Creates a synthetic TF-IDF matrix, whose term frequencies follow 
+    Zipf's law, just like in natural language.
+
+    Returns
+    -------
+    csr_matrix
+        L2-normalised matrix (num_articles x num_features).
+    """
+    
+    terms = (rng.zipf(1.3, size=num_articles * terms_per_article) - 1) % num_features
+    rows  = np.repeat(np.arange(num_articles), terms_per_article)
+    data  = rng.random(num_articles * terms_per_article, dtype=np.float32)
+    
+    matrix = csr_matrix((data, (rows, terms)), shape=(num_articles, num_features))
+    matrix.sum_duplicates()
+    
+    return normalize(matrix, norm="l2", axis=1)
+
+
+def make_queries(num_queries: int, 
+                 num_features: int, 
+                 rng: np.random.Generator) -> list:
+    """
+    Creates keyword queries of 1 to 3 terms, drawn with the same
+    distribution as the corpus.
+    
+    Returns
+    -------
+    list
+        List of L2-normalised query vectors (1 x num_features).
+    """
+    
+    queries = []
+    for _ in range(num_queries):
+        terms = np.unique((rng.zipf(1.3, size=rng.integers(1, 4)) - 1) % num_features)
+        query = csr_matrix((np.ones(len(terms)), (np.zeros(len(terms), dtype=int), terms)),
+                           shape=(1, num_features))
+        queries.append(normalize(query, norm="l2", axis=1))
+        
+    return queries
+
+
+def search_exhaustive(tfidf_matrix: csr_matrix, query: csr_matrix, quantity: int) -> list:
+    """
+    Search the way Model used to do it - scores every single article.
+    """
+    
+    similarities = cosine_similarity(query, tfidf_matrix)[0]
+    article_scores = list(enumerate(similarities))
+    sorted_articles = sorted(article_scores, key=lambda x: x[1], reverse=True)
+    
+    return [index for index, _ in sorted_articles[:quantity]]
+
+
+def time_queries(search, queries: list) -> np.ndarray:
+    """
+    Returns
+    -------
+    np.ndarray
+        Latency (in milliseconds) of each query.
+    """
+    
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+        
+    return np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--features", type=int, default=50_000)
+    parser.add_argument("--terms-per-article", type=int, default=60)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--quantity", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(args.seed)
+    queries = make_queries(args.queries, args.features, rng)
+    
+    print(f"{'articles':>10} {'postings/query':>15} "
+          f"{'exhaustive p50':>15} {'exhaustive p95':>15} "
+          f"{'index p50':>10} {'index p95':>10} {'speed-up':>9}")
+    
+    for size in args.sizes:
+        tfidf_matrix = make_corpus(size, args.features, args.terms_per_article, rng)
+        index = InvertedIndex.build(tfidf_matrix)
+        
+        postings = np.mean([np.diff(index.pointers)[query.indices].sum() for query in queries])
+        
+        exhaustive = time_queries(lambda query: search_exhaustive(tfidf_matrix, query, args.quantity), 
+                                  queries)
+        inverted   = time_queries(lambda query: index.top_k(query, args.quantity), 
+                                  queries)
+        
+        print(f"{size:>10} {postings:>15.0f} "
+              f"{np.median(exhaustive):>12.2f} ms {np.percentile(exhaustive, 95):>12.2f} ms "
+              f"{np.median(inverted):>7.2f} ms {np.percentile(inverted, 95):>7.2f} ms "
+              f"{np.median(exhaustive) / np.median(inverted):>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
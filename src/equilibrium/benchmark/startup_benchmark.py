@@ -0,0 +1,103 @@
+"""
+Measures the startup of the program - time until the first prompt is drawn
+(time-to-first-frame) and time until articles and the model are loaded.
+Lazy startup (the program as it is - heavy libraries imported when first
+needed, data loaded in the background) is compared with the eager one
+(everything imported and loaded before the first prompt is drawn).
+
+Every run starts a fresh interpreter, so that nothing is imported already.
+
+Run from `src/equilibrium`:
+    python -m benchmark.startup_benchmark --runs 5
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import subprocess
+import sys
+import time
+
+import numpy as np # Math
+
+
+def run_child(mode: str):
+    """
+    Starts the program (without its main loop) in the given mode, and prints
+    the timings (seconds since the interpreter has started importing) as JSON.
+    """
+
+    start = time.perf_counter()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        import main
+
+        if mode == "eager":
+            # What used to be imported before the first prompt
+            import matplotlib.pyplot
+            import sklearn.feature_extraction.text
+            import sklearn.decomposition
+            import nltk.corpus
+            import model.model
+
+        imported = time.perf_counter()
+
+        if mode == "eager":
+            # ... and loaded
+            main.load_users()
+            main.load_articles()
+            main.articles.load()
+            main.load_model()
+        else:
+            main.setup()
+
+        main.MainPrompt("main").show()
+        first_frame = time.perf_counter()
+
+        if mode == "lazy":
+            main.ensure_loaded()
+        loaded = time.perf_counter()
+
+    print(json.dumps({"import":      imported - start,
+                      "first_frame": first_frame - start,
+                      "loaded":      loaded - start}))
+
+
+def measure(mode: str, runs: int) -> dict:
+    """
+    Returns
+    -------
+    dict
+        Median of every timing over the runs, in seconds.
+    """
+
+    timings = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-m", "benchmark.startup_benchmark", "--child", mode],
+                                capture_output=True, text=True, check=True).stdout
+        timings.append(json.loads(output.strip().splitlines()[-1]))
+
+    return {key: float(np.median([timing[key] for timing in timings])) for key in timings[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--child", choices=["lazy", "eager"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child)
+        return
+
+    print(f"{'mode':>6} | {'import (ms)':>12} | {'first frame (ms)':>17} | {'loaded (ms)':>12}")
+    for mode in ["eager", "lazy"]:
+        timing = measure(mode, args.runs)
+        print(f"{mode:>6} | {timing['import'] * 1000:12.1f} | "
+              f"{timing['first_frame'] * 1000:17.1f} | {timing['loaded'] * 1000:12.1f}")
+
+
+if __name__ == "__main__":
+    main()
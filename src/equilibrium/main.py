@@ -3,6 +3,8 @@ from utils.keypress_detector import capture_keypress, exit
 from utils.formatting        import clear_screen
 import os
 import time
+import threading # Loading data in the background
+import argparse
 
 # Prompts
 from prompt.main_prompt            import MainPrompt
@@ -13,12 +15,13 @@ from prompt.search_prompt          import SearchPrompt
 
 from user.users import Users # Users wrapper
 
+from server.protocol import ServerError # Failed requests (client mode)
+
 # Articles
 from article.articles        import Articles        # Articles wrapper
 from article.article_listing import ArticleListing 
 
-# Model
-from model.model import Model
+# Model (imported by `load_model`, on the loading thread, since it is slow)
 import numpy as np            # Math 
 
 # Loading paths from .env file
@@ -53,6 +56,7 @@ def load_users():
                               "Saved Articles",
                               "Platform Statistics (Interactions)",
                               "Platform Statistics (Tags)",
+                              "Retag Articles",
                               "Exit"]
 
 
@@ -60,14 +64,15 @@ PATH_ARTICLES_CONTENT  = os.getenv("PATH_ARTICLES_CONTENT")
 PATH_ARTICLES_METADATA = os.getenv("PATH_ARTICLES_METADATA")
 def load_articles():
     """
-    Parses article data from files and loads it into the Articles wrapper instance.
+    Creates the Articles wrapper instance. Article data is parsed
+    from files by `load_in_background`.
     """
     
     global articles
+    # Session reads only a handful of articles, so contents are read once needed
     articles = Articles(path_articles_content=PROJECT_ROOT / PATH_ARTICLES_CONTENT,
-                        path_articles_metadata=PROJECT_ROOT / PATH_ARTICLES_METADATA)
-    
-    articles.load()        # Loads all the created articles into a wrapper object
+                        path_articles_metadata=PROJECT_ROOT / PATH_ARTICLES_METADATA,
+                        lazy_content=True)
     
     # Possible responses from an article shown
     global ARTICLE_RESPONSES
@@ -78,28 +83,189 @@ def load_articles():
                          "Save"]
 
 
-PATH_TFIDF_VECTORIZER          = os.getenv("PATH_TFIDF_VECTORIZER")
-PATH_TFIDF_MATRIX              = os.getenv("PATH_TFIDF_MATRIX")
-PATH_TFIDF_COSINE_SIMILARITIES = os.getenv("PATH_TFIDF_COSINE_SIMILARITIES")
+PATH_MODEL = os.getenv("PATH_MODEL")
 def load_model():
     """
     Loads TF-IDF model that is used for recommending similar articles.
     """
     
-    global model
-    model = Model(path_tfidf_vectorizer=PROJECT_ROOT / PATH_TFIDF_VECTORIZER,
-                  path_tfidf_matrix=PROJECT_ROOT / PATH_TFIDF_MATRIX,
-                  path_tfidf_cosine_similarities=PROJECT_ROOT / PATH_TFIDF_COSINE_SIMILARITIES)
+    from model.model import Model
+    from model.refit_scheduler import RefitScheduler
+    
+    model = Model(path_model=PROJECT_ROOT / PATH_MODEL)
+    
+    # No model has been saved yet - train one from the articles
+    if not model.trained:
+        model.refit(articles=articles)
+    
+    # Refits are run in the background - `refit_scheduler.model` is always
+    # the model to be used, since it gets swapped once a refit is done
+    global refit_scheduler
+    refit_scheduler = RefitScheduler(model=model, articles=articles)
+    
+    # Saved model might be missing articles added (or still hold those removed)
+    # before the program last exited
+    refit_scheduler.catch_up()
+
+
+def load_in_background():
+    """
+    Loads articles (into the wrapper) and the model on a background thread,
+    so that main and login prompts are usable while they load.
+    `ensure_loaded` has to be called before either of them is used.
+    """
+    
+    global loaded, loading_error
+    loaded        = threading.Event() # Set once loading is over (successful or not)
+    loading_error = None              # Exception loading has failed with
+    
+    def load():
+        global loading_error
+        try:
+            articles.load() # Loads all the created articles into a wrapper object
+            load_model()    # Load TF-IDF model, used for recommendation
+        except BaseException as err:
+            loading_error = err
+        finally:
+            loaded.set()
+    
+    threading.Thread(target=load, name="loader", daemon=True).start()
+
+
+def ensure_loaded():
+    """
+    Waits for the background loading to finish.
+    Exception it has failed with is raised here.
+    """
+    
+    if client is not None:
+        return # Nothing is loaded in client mode
+    
+    if not loaded.is_set():
+        print("Loading articles and the model...")
+        loaded.wait()
+        
+    if loading_error is not None:
+        raise loading_error
+
+
+type_ahead = None # Built when searching for the first time
+def get_type_ahead():
+    """
+    Returns type-ahead of the current model. It is only built again
+    once the model or the articles change.
+    """
+    
+    global type_ahead
+    
+    if type_ahead is None or not type_ahead.is_current(refit_scheduler.model, articles):
+        from model.type_ahead import TypeAhead
+        type_ahead = TypeAhead(refit_scheduler=refit_scheduler, articles=articles)
+        
+    return type_ahead
+
+
+# Set in client mode only - everything is served by the model server
+client       = None
+remote_model = None
+def setup_client(address=None):
+    """
+    Connects to the model server, which then stands in for users, articles
+    and the model - nothing is loaded locally.
+    
+    Parameters
+    ----------
+    address : str | tuple, optional
+        Path of the server's Unix socket, or its (host, port).
+        The default is None, meaning the default socket.
+    """
+    
+    from server.client import ModelClient, RemoteModel, RemoteArticles, RemoteUsers
+    
+    global client, remote_model, users, articles
+    client       = ModelClient(address)
+    remote_model = RemoteModel(client)
+    users        = RemoteUsers(client)
+    articles     = RemoteArticles(client)
+    
+    global session
+    session = None # In the beggining, there is no active session (User)
+    
+    global USER_PROFILE_RESPONSES, ARTICLE_RESPONSES
+    USER_PROFILE_RESPONSES = ["Add New Article",
+                              "Search Articles",
+                              "My Articles",
+                              "Saved Articles",
+                              "Platform Statistics (Interactions)",
+                              "Platform Statistics (Tags)",
+                              "Retag Articles",
+                              "Exit"]
+    ARTICLE_RESPONSES = ["Like", 
+                         "Dislike", 
+                         "Recommend", 
+                         "Comment", 
+                         "Save"]
+
+
+# Responses needing local articles and model, ignored in client mode
+LOCAL_RESPONSES = ["Add New Article",
+                   "Platform Statistics (Interactions)",
+                   "Platform Statistics (Tags)",
+                   "Retag Articles",
+                   "delete article",
+                   "delete from saved"]
+
+
+def current_model():
+    """
+    Returns the model to be used - the one served (in client mode), 
+    or the one swapped in by the latest refit.
+    """
+    
+    return remote_model if client is not None else refit_scheduler.model
+
+
+def read_ahead_recommendations(article_id: int):
+    """
+    Reads ahead contents of the articles recommended for the one being
+    shown - those are likely to be opened next.
+    """
+    
+    if client is not None:
+        return # Served articles are fetched whole
+    
+    try:
+        articles.read_ahead(refit_scheduler.model.recommend(article_id=article_id, quantity=10))
+    except KeyError:
+        pass # Not a part of the model (yet)
+
+
+def shut_down():
+    """
+    Writes everything down (users, articles and the model) and exits.
+    """
+    
+    if client is not None:
+        client.close() # Server has written everything down
+        exit()
+        
+    ensure_loaded()
+    users.rewrite_csv()
+    articles.write_metadata()
+    refit_scheduler.save() # Keep articles added incrementally
+    exit()
 
 
 def setup():
     """
     Loads all the data needed for proper functioning of the program.
+    Only users are loaded before the first prompt is shown - everything else 
+    is loaded in the background.
     """
     
-    load_users()    # Load users into an "Users" wrapper
-    load_articles() # Load articles into an "Articles" wrapper
-    load_model()    # Load TF-IDF model, used for recommendation
+    load_users()         # Load users into an "Users" wrapper
+    load_articles()      # Create an "Articles" wrapper
+    load_in_background() # Load articles and TF-IDF model, used for recommendation
 
      
 def main():
@@ -111,10 +277,19 @@ def main():
     
     # model.refit(articles)
     
+    # Type-ahead results are drawn from its own thread, once they are ready
+    screen_lock = threading.Lock()
+    def redraw():
+        with screen_lock:
+            if isinstance(current_prompt, SearchPrompt):
+                clear_screen()
+                current_prompt.show()
+    
     while True: 
         time.sleep(0.00000001) # Refresh rate is set to THIS of a second
-        clear_screen()        
-        current_prompt.show() 
+        with screen_lock:
+            clear_screen()        
+            current_prompt.show() 
 
         key = capture_keypress()
         if key is not None:
@@ -134,14 +309,19 @@ def main():
                     user_found = users.validate_login(username, password) 
                     if user_found != None: # If user exists, load next prompt    
                         session = user_found                        
+                        
+                        # Everything past the login needs articles and the model
+                        ensure_loaded()
+                        
                         USER_PROFILE = "admin_profile" if session.id == 0 else "user_profile"
                         
                         current_prompt = UserProfilePrompt(USER_PROFILE)
                         
                 # Sign up user and check if everything is alright
                 elif response == "validate sign up": 
+                    data_path = PROJECT_ROOT / PATH_USERS_DATA_CSV if client is None else None
                     successfully_signed_up = users.sign_up_user(current_prompt.entered_values,
-                                                                data_path=PROJECT_ROOT / PATH_USERS_DATA_CSV)
+                                                                data_path=data_path)
                     if successfully_signed_up:  
                         current_prompt = LoginPrompt("login")
                 
@@ -151,16 +331,29 @@ def main():
                    
                     
                 elif response == "terminate":
-                    users.rewrite_csv()
-                    articles.write_metadata()
-                    exit()
+                    shut_down()
+                    
+                    
+                elif response in LOCAL_RESPONSES and client is not None:
+                    pass # Not available in client mode
                 
                 
                 elif response == "search keywords":
-                    keywords = current_prompt.keywords
-                    found_articles = model.search(articles=articles,
-                                                  keywords=keywords,
-                                                  quantity=5)
+                    # Keywords starting with "#" are tags the search is filtered by
+                    tags     = [keyword[1:].strip() for keyword in current_prompt.keywords 
+                                if keyword.startswith("#")]
+                    keywords = [keyword for keyword in current_prompt.keywords 
+                                if not keyword.startswith("#")]
+                    
+                    if tags and not any(keywords):
+                        # Nothing to search for - all the articles with the tags are listed
+                        found_articles = articles.with_tags(tags)
+                    else:
+                        found_articles = current_model().search(articles=articles,
+                                                                keywords=keywords,
+                                                                quantity=5,
+                                                                tags=tags)
+                    articles.read_ahead([article.id for article in found_articles])
                     clear_screen()
                     
                     current_prompt = ArticleListing(articles=found_articles,
@@ -184,18 +377,23 @@ def main():
                         
                     if response == "recommend":
                         # Recommend top 10 similar articles
-                        articles_recommended = model.recommend(article_id=article_id,
-                                                               quantity=10)
-                      
-                        # Select one recommendation randomly
-                        random_idx = int(np.random.randint(low=0, 
-                                                           high=10))
+                        try:
+                            articles_recommended = current_model().recommend(article_id=article_id,
+                                                                             quantity=10)
+                        except (KeyError, ServerError):
+                            articles_recommended = [] # Article is not a part of the model (yet)
                         
-                        # Get the random top-10 generation
-                        random_article_id = int(articles_recommended[random_idx])
+                        # Articles removed in the meantime are skipped
+                        articles_recommended = articles.get_many(articles_recommended)
                         
-                        # Show the recommendation
-                        current_prompt = articles[random_article_id]
+                        if articles_recommended:
+                            # Select one recommendation randomly
+                            random_idx = int(np.random.randint(low=0, 
+                                                               high=len(articles_recommended)))
+                            
+                            # Show the recommendation
+                            current_prompt = articles_recommended[random_idx]
+                            read_ahead_recommendations(current_prompt.id)
                         
                         
                     elif response == "dislike":
@@ -229,14 +427,19 @@ def main():
                     
                     elif response == "Search Articles":
                         # Heaven to implement
-                        current_prompt = SearchPrompt("search") 
+                        search_type_ahead = None
+                        if client is None:
+                            search_type_ahead = get_type_ahead()
+                            search_type_ahead.on_update = redraw
+                        
+                        current_prompt = SearchPrompt("search", type_ahead=search_type_ahead) 
                     
                     
                     elif response == "My Articles":  
                         if session.id == 0:
                             articles_created = articles.articles.copy()
                         else:
-                            articles_created = [articles[idx] for idx in session.articles_created]
+                            articles_created = articles.get_many(session.articles_created)
                             
                         current_prompt = ArticleListing(articles=articles_created,
                                                         show_delete=True,
@@ -246,7 +449,7 @@ def main():
                     
                     
                     elif response == "Saved Articles":
-                        articles_saved = [articles[idx] for idx in session.articles_saved]
+                        articles_saved = articles.get_many(session.articles_saved)
                         current_prompt = ArticleListing(articles=articles_saved,
                                                         show_delete=True,
                                                         saved_articles=True)
@@ -257,24 +460,39 @@ def main():
                         
                     
                     elif response == "Platform Statistics (Tags)":
-                        articles.show_platform_statistics_tags(keywords=model.features)
+                        articles.show_platform_statistics_tags(keywords=refit_scheduler.model.features)
+                    
+                    elif response == "Retag Articles":
+                        # Tags of every article are replaced by its top terms
+                        with refit_scheduler.lock:
+                            refit_scheduler.model.retag(articles)
+                        articles.write_metadata()
                     
                     elif response == "Exit":
-                        exit()
+                        shut_down()
                         
                         
                 elif response == "new article ready":
                     new_article_data = current_prompt.entered_values
                     
-                    # Add new article to the collection
-                    articles.add_new_article(new_article_data=new_article_data)
+                    # Article without tags gets tagged by its top terms
+                    if not new_article_data["tags"]:
+                        new_article_data["tags"] = refit_scheduler.model.suggest_tags(title=new_article_data["title"],
+                                                                                      content=new_article_data["content"])
+                    
+                    # Add new article to the collection (type-ahead might be
+                    # searching through it on another thread)
+                    with refit_scheduler.lock:
+                        articles.add_new_article(new_article_data=new_article_data)
                     
                     # Add created article to the list of curren't users articles
                     users.add_new_article(new_article=articles.articles[-1],
                                           user_id=session.id)
                     
-                    # Refit the model to account for new article
-                    model.refit(articles=articles)
+                    # Add the new article to the model without retraining it.
+                    # Full refit is scheduled only once the vocabulary drifts too far.
+                    refit_scheduler.catch_up()
+                    refit_scheduler.save()
                     
                     # Return back to the User Profile Prompt
                     current_prompt = UserProfilePrompt(USER_PROFILE)
@@ -288,19 +506,28 @@ def main():
                 
                 option_selected, article_id = response
 
-                if option_selected == "show":
+                if option_selected in LOCAL_RESPONSES and client is not None:
+                    pass # Not available in client mode
+                
+                elif option_selected == "show":
                     current_prompt = articles[article_id]
                     current_prompt.increment_views()
+                    read_ahead_recommendations(article_id)
                     
                     
                 elif option_selected == "delete article":
                     # Remove article from the collection, including the files
-                    articles.remove_article(article_id)
+                    with refit_scheduler.lock:
+                        articles.remove_article(article_id)
                     
                     users.rewrite_csv()
                     session.articles_created.remove(article_id)
                     
-                    model.refit(articles)
+                    # Article stops being served at once, the model gets
+                    # compacted in the background. Its tombstone is saved 
+                    # right away, so the article is not served after a restart.
+                    refit_scheduler.remove_article(article_id)
+                    refit_scheduler.save()
                     
                     # Return back to the User Profile Prompt
                     current_prompt = ArticleListing(articles=articles,
@@ -312,7 +539,7 @@ def main():
                     session.articles_saved.remove(article_id) 
                     users.rewrite_csv()
                     
-                    new_articles_saved = [articles[idx] for idx in session.articles_saved]
+                    new_articles_saved = articles.get_many(session.articles_saved)
                     current_prompt = ArticleListing(articles=new_articles_saved,
                                                     show_delete=True,
                                                     saved_articles=True)
@@ -324,5 +551,17 @@ def main():
 
 
 if __name__ == "__main__":
-    setup() # Setup everything necessary for program's intended functionality
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--client", action="store_true", 
+                        help="Use the model server (python -m server.model_server), "
+                             "rather than loading everything locally")
+    parser.add_argument("--socket", help="Path of the model server's Unix socket")
+    parser.add_argument("--port", type=int, help="Port of the model server (localhost)")
+    args = parser.parse_args()
+    
+    if args.client:
+        setup_client(("127.0.0.1", args.port) if args.port else args.socket)
+    else:
+        setup() # Setup everything necessary for program's intended functionality
+        
     main()  # Call the main drawing loop
\ No newline at end of file
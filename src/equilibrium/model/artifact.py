@@ -0,0 +1,258 @@
+import numpy as np # Math
+
+from pathlib import Path
+import hashlib # Checksums
+import json    # Manifest
+import os
+import shutil   # Removing old versions
+import tempfile # Unique names of versions
+import time
+
+# Version of the on-disk layout. Bumped whenever the layout changes,
+# so that older programs refuse to load artifacts they do not understand.
+# Version 1 kept the arrays next to the manifest, rather than in a version directory.
+FORMAT_VERSION = 2
+SUPPORTED_FORMAT_VERSIONS = (1, 2)
+
+MANIFEST_NAME = "manifest.json"
+
+VERSION_PREFIX = "version-"
+
+# Leftovers (of crashed or outraced saves) older than this (in seconds) are removed
+STALE_AFTER = 60 * 60
+
+
+class ArtifactError(Exception):
+    """
+    Raised when the model artifact is missing, incompatible or corrupted.
+    """
+
+
+def checksum(path: Path) -> str:
+    """
+    Returns
+    -------
+    str
+        SHA-256 checksum of the file, read in chunks.
+    """
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def read_manifest(path: Path) -> dict:
+    """
+    Returns
+    -------
+    dict
+        Manifest of the artifact in given directory.
+
+    Raises
+    ------
+    ArtifactError
+        If the manifest can't be read.
+    """
+
+    try:
+        with open(path / MANIFEST_NAME, encoding="utf8") as manifest_file:
+            return json.load(manifest_file)
+    except (OSError, ValueError) as err:
+        raise ArtifactError(f"Can't read manifest of {path}: {err}")
+
+
+def remove_version(path: Path, manifest: dict):
+    """
+    Removes files of the version of the artifact described by the manifest.
+    Processes that have them memory-mapped keep reading them unharmed
+    (where the OS lets them be removed at all).
+    """
+
+    directory = manifest.get("directory")
+    if directory:
+        shutil.rmtree(path / directory, ignore_errors=True)
+        return
+
+    for description in manifest.get("arrays", {}).values():
+        try:
+            os.remove(path / description["file"])
+        except OSError:
+            pass
+
+
+def remove_stale(path: Path, current_directory: str):
+    """
+    Removes versions (and temporary files) left behind by saves
+    that crashed or got outraced by another save.
+    """
+
+    stale_before = time.time() - STALE_AFTER
+    for entry in path.iterdir():
+        if (not (entry.name.startswith(VERSION_PREFIX) or entry.name.endswith(".tmp")) or
+            entry.name == current_directory):
+            continue
+
+        try:
+            if entry.stat().st_mtime >= stale_before:
+                continue # Might be a save still in progress
+
+            if entry.is_dir():
+                shutil.rmtree(entry, ignore_errors=True)
+            else:
+                os.remove(entry)
+        except OSError:
+            pass
+
+
+def save_artifact(path: str, arrays: dict, metadata: dict):
+    """
+    Saves the model artifact - every array is stored as a raw ".npy" file
+    (no pickles involved), described by a manifest with versions,
+    shapes, data types and checksums.
+
+    Arrays are written into a new, uniquely named version directory, which
+    the manifest points to. Version is switched to by a single rename
+    of the manifest, so a crash (or another save running at the same time)
+    never leaves behind a mix of two versions - a load sees either the old
+    version or the new one, complete. Previous version is removed afterwards,
+    processes that have it memory-mapped keep reading it unharmed.
+
+    Parameters
+    ----------
+    path : str
+        Directory of the artifact. Created if it does not exist.
+    arrays : dict
+        Arrays to be stored, by name.
+    metadata : dict
+        Any other (JSON serializable) data needed to restore the model.
+    """
+
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+
+    directory = Path(tempfile.mkdtemp(prefix=VERSION_PREFIX, dir=path))
+
+    manifest = {"format_version": FORMAT_VERSION,
+                "numpy_version":  np.__version__,
+                "created":        time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "directory":      directory.name,
+                "arrays":         {},
+                "metadata":       metadata}
+
+    try:
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            file_name = f"{name}.npy"
+
+            with open(directory / file_name, "wb") as file:
+                np.save(file, array, allow_pickle=False)
+                file.flush()
+                os.fsync(file.fileno())
+
+            manifest["arrays"][name] = {"file":   file_name,
+                                        "dtype":  array.dtype.str,
+                                        "shape":  list(array.shape),
+                                        "sha256": checksum(directory / file_name)}
+
+        with tempfile.NamedTemporaryFile("w", encoding="utf8", dir=path,
+                                         suffix=".tmp", delete=False) as manifest_file:
+            json.dump(manifest, manifest_file, indent=4)
+            manifest_file.flush()
+            os.fsync(manifest_file.fileno())
+
+    except BaseException:
+        shutil.rmtree(directory, ignore_errors=True)
+        raise
+
+    try:
+        previous_manifest = read_manifest(path)
+    except ArtifactError:
+        previous_manifest = None # First save (or a broken one)
+
+    os.replace(manifest_file.name, path / MANIFEST_NAME)
+
+    if previous_manifest is not None and previous_manifest.get("directory") != directory.name:
+        remove_version(path, previous_manifest)
+
+    remove_stale(path, directory.name)
+
+
+def load_version(path: Path, manifest: dict, verify: bool) -> dict:
+    """
+    Returns
+    -------
+    dict
+        Arrays of the version of the artifact described by the manifest,
+        checked against it.
+    """
+
+    directory = path / manifest.get("directory", "")
+
+    arrays = {}
+    for name, description in manifest["arrays"].items():
+        array_path = directory / description["file"]
+
+        if verify and checksum(array_path) != description["sha256"]:
+            raise ArtifactError(f"Checksum mismatch for {array_path}.")
+
+        try:
+            array = np.load(array_path, mmap_mode="r", allow_pickle=False)
+        except (OSError, ValueError) as err:
+            raise ArtifactError(f"Can't load {array_path}: {err}")
+
+        if (array.dtype.str != description["dtype"] or
+            list(array.shape) != description["shape"]):
+            raise ArtifactError(f"{array_path} does not match the manifest.")
+
+        arrays[name] = array
+
+    return arrays
+
+
+def load_artifact(path: str, verify: bool = False) -> tuple:
+    """
+    Loads the model artifact. Arrays are memory-mapped (read-only),
+    so loading is nearly instant and all processes using the same artifact
+    share its pages through the OS page cache.
+
+    Parameters
+    ----------
+    path : str
+        Directory of the artifact.
+    verify : bool, optional
+        If set to `True`, checksums of all the files are verified too.
+        It requires reading every file completely. Data types and shapes
+        are always checked. The default is False.
+
+    Raises
+    ------
+    ArtifactError
+        If the artifact is missing, of unsupported version or corrupted.
+
+    Returns
+    -------
+    tuple
+        (arrays, metadata), the way they were passed to `save_artifact`.
+    """
+
+    path = Path(path)
+
+    # Version might get replaced (and removed) by a save while being loaded,
+    # the load is then repeated with the new one
+    for _ in range(3):
+        manifest = read_manifest(path)
+
+        if manifest.get("format_version") not in SUPPORTED_FORMAT_VERSIONS:
+            raise ArtifactError(f"Unsupported format version {manifest.get('format_version')} "
+                                f"(expected {FORMAT_VERSION}).")
+
+        try:
+            return load_version(path, manifest, verify), manifest["metadata"]
+        except ArtifactError:
+            if read_manifest(path) == manifest:
+                raise
+
+    raise ArtifactError(f"{path} keeps changing while being loaded.")
@@ -0,0 +1,147 @@
+import numpy as np # Math
+
+from scipy.sparse import csr_matrix, csc_matrix, vstack # Sparse storage of term frequencies
+
+from model.inverted_index import InvertedIndex # Postings
+
+
+class BM25Index(InvertedIndex):
+    def __init__(self,
+                 pointers:    np.ndarray,
+                 rows:        np.ndarray,
+                 frequencies: np.ndarray,
+                 lengths:     np.ndarray,
+                 k1:          float = 1.2,
+                 b:           float = 0.75):
+        """
+        Creates an instance of BM25Index - inverted index scoring articles
+        by Okapi BM25, rather than cosine similarity. Postings hold raw term
+        frequencies, and the length norm of every article is precomputed,
+        so scoring a query only gathers the postings of its terms.
+
+        Parameters
+        ----------
+        pointers : np.ndarray
+            Start of each term's postings (features + 1 elements).
+        rows : np.ndarray
+            Articles (rows) of all the postings, stored as int32.
+        frequencies : np.ndarray
+            Term frequencies (counts) of all the postings, stored as float32.
+        lengths : np.ndarray
+            Length of every article - number of its vocabulary terms.
+        k1 : float, optional
+            Saturation of term frequencies. The default is 1.2.
+        b : float, optional
+            Strength of the length normalisation, from 0 to 1.
+            The default is 0.75.
+        """
+
+        super().__init__(pointers, rows, frequencies, lengths.shape[0])
+
+        self.lengths = lengths
+        self.k1      = k1
+        self.b       = b
+
+        # Statistics are those of the articles the index has been built from,
+        # articles appended later are scored with them too
+        self.average_length = float(lengths.mean()) if lengths.shape[0] else 1.0
+        self.norms = self.length_norms(lengths)
+
+        document_frequencies = np.diff(pointers)
+        self.idf = np.log(1 + (self.num_articles - document_frequencies + 0.5) /
+                              (document_frequencies + 0.5)).astype(np.float32)
+
+
+    @classmethod
+    def build(cls, term_frequencies: csr_matrix, k1: float = 1.2, b: float = 0.75):
+        """
+        Builds the index from the term frequency matrix.
+
+        Parameters
+        ----------
+        term_frequencies : csr_matrix
+            Counts of vocabulary terms in the articles (articles x features).
+
+        Returns
+        -------
+        BM25Index
+            Index of all the terms in the matrix.
+        """
+
+        postings = term_frequencies.tocsc()
+        postings.sort_indices()
+
+        lengths = np.asarray(term_frequencies.sum(axis=1), dtype=np.float32).ravel()
+
+        return cls(postings.indptr,
+                   postings.indices.astype(np.int32),
+                   postings.data.astype(np.float32),
+                   lengths,
+                   k1=k1, b=b)
+
+
+    def length_norms(self, lengths: np.ndarray) -> np.ndarray:
+        """
+        Returns
+        -------
+        np.ndarray
+            k1 * (1 - b + b * length / average length) of every article,
+            added to its term frequencies when saturating them.
+        """
+
+        return (self.k1 * (1 - self.b + self.b * lengths / max(self.average_length, 1e-9))
+                ).astype(np.float32)
+
+
+    def term_frequencies(self) -> csr_matrix:
+        """
+        Returns
+        -------
+        csr_matrix
+            Term frequency matrix of all the articles, appended ones included.
+        """
+
+        matrix = csc_matrix((self.weights, self.rows, self.pointers),
+                            shape=(self.num_articles, self.num_features)).tocsr()
+
+        return vstack([matrix, self.tail], format="csr")
+
+
+    def score(self, query_counts: csr_matrix, allowed: np.ndarray = None) -> tuple:
+        """
+        Scores only the articles sharing at least one term with the query.
+
+        Parameters
+        ----------
+        query_counts : csr_matrix
+            Counts of vocabulary terms in the query (1 x features).
+        allowed : np.ndarray, optional
+            Rows (marked `True`) the articles are restricted to. Postings of
+            other rows are never scored. The default is None, meaning all rows.
+
+        Returns
+        -------
+        tuple
+            (rows, scores) of matching articles, in no particular order.
+        """
+
+        terms       = query_counts.indices
+        query_terms = (self.idf[terms] * query_counts.data).astype(np.float32)
+
+        # Rows that are not a part of the postings yet
+        tail        = self.tail[:, terms].tocoo()
+        tail_norms  = self.length_norms(np.asarray(self.tail.sum(axis=1)).ravel())
+        tail_scores = np.bincount(tail.row,
+                                  weights=(query_terms[tail.col] * tail.data * (self.k1 + 1) /
+                                           (tail.data + tail_norms[tail.row])),
+                                  minlength=self.tail.shape[0])
+
+        # Gather postings of the query terms only
+        positions, matched_rows, matched_terms = self.match(terms, query_terms, allowed)
+
+        matched_frequencies = self.weights[positions]
+        matched_scores      = (matched_terms * matched_frequencies * (self.k1 + 1) /
+                               (matched_frequencies + self.norms[matched_rows]))
+
+        # Accumulate the scores of terms for every matched article
+        return self.collect(matched_rows, matched_scores, tail_scores, allowed)
@@ -0,0 +1,241 @@
+import numpy as np # Math
+
+from scipy.sparse import csr_matrix, vstack # Sparse storage of TF-IDF rows
+
+
+def gather(pointers: np.ndarray, terms: np.ndarray) -> np.ndarray:
+    """
+    Gathers postings of the terms, without looping over them.
+
+    Returns
+    -------
+    np.ndarray
+        Positions of all the postings of the terms (in order of the terms).
+    """
+
+    starts  = pointers[terms]
+    lengths = pointers[terms + 1] - starts
+
+    # Position of every posting is its term's start, plus its offset in the term
+    offsets = np.cumsum(lengths) - lengths
+
+    return np.repeat(starts - offsets, lengths) + np.arange(int(lengths.sum()))
+
+
+class InvertedIndex:
+    def __init__(self, 
+                 pointers:     np.ndarray,
+                 rows:         np.ndarray,
+                 weights:      np.ndarray,
+                 num_articles: int):
+        """
+        Creates an instance of InvertedIndex (term -> postings).
+        Postings of a term are the articles containing it, together with
+        the term's (precomputed, L2-normalised) TF-IDF weight in each of them.
+        Postings of term `t` are stored in [pointers[t], pointers[t + 1]).
+
+        Parameters
+        ----------
+        pointers : np.ndarray
+            Start of each term's postings (features + 1 elements).
+        rows : np.ndarray
+            Articles (rows) of all the postings, stored as int32.
+        weights : np.ndarray
+            TF-IDF weights of all the postings, stored as float32.
+        num_articles : int
+            Number of articles (rows) the index has been built from.
+        """
+
+        self.pointers = pointers
+        self.rows     = rows
+        self.weights  = weights
+
+        self.num_articles = num_articles
+        self.num_features = pointers.shape[0] - 1
+        
+        # Rows appended after the index has been built. They are few, so they
+        # are scored directly, until the index gets rebuilt with them.
+        self.tail = csr_matrix((0, self.num_features), dtype=np.float32)
+
+
+    def __len__(self) -> int:
+        return self.num_features
+
+
+    @classmethod
+    def build(cls, tfidf_matrix: csr_matrix):
+        """
+        Builds the index from the TF-IDF matrix.
+
+        Parameters
+        ----------
+        tfidf_matrix : csr_matrix
+            TF-IDF matrix (articles x features), whose rows are L2-normalised.
+
+        Returns
+        -------
+        InvertedIndex
+            Index of all the terms in the matrix.
+        """
+
+        # Column-major layout of the matrix is exactly an inverted index
+        postings = tfidf_matrix.tocsc()
+        postings.sort_indices()
+
+        return cls(postings.indptr,
+                   postings.indices.astype(np.int32),
+                   postings.data.astype(np.float32),
+                   tfidf_matrix.shape[0])
+
+
+    def append(self, row: csr_matrix):
+        """
+        Appends a new article (row of the TF-IDF matrix) to the index.
+        """
+
+        self.tail = vstack([self.tail, row], format="csr")
+        
+        
+    def postings(self, term: int) -> tuple:
+        """
+        Returns
+        -------
+        tuple
+            (rows, weights) of all articles containing the term.
+        """
+
+        start, end = self.pointers[term], self.pointers[term + 1]
+        return self.rows[start:end], self.weights[start:end]
+
+
+    def match(self, 
+              terms:        np.ndarray, 
+              term_weights: np.ndarray, 
+              allowed:      np.ndarray = None) -> tuple:
+        """
+        Gathers postings of the terms, leaving out those of articles 
+        not allowed, before anything gets scored.
+
+        Returns
+        -------
+        tuple
+            (positions, rows, term weights) of every posting gathered.
+        """
+
+        lengths   = self.pointers[terms + 1] - self.pointers[terms]
+        positions = gather(self.pointers, terms)
+
+        rows    = self.rows[positions]
+        weights = np.repeat(term_weights, lengths)
+
+        if allowed is not None:
+            kept = allowed[rows]
+            positions, rows, weights = positions[kept], rows[kept], weights[kept]
+
+        return positions, rows, weights
+
+
+    def collect(self, 
+                matched_rows:   np.ndarray, 
+                matched_scores: np.ndarray, 
+                tail_scores:    np.ndarray,
+                allowed:        np.ndarray = None) -> tuple:
+        """
+        Accumulates scores of the postings for every matched article, 
+        and adds the matching rows of the tail.
+
+        Returns
+        -------
+        tuple
+            (rows, scores) of matching articles, in no particular order.
+        """
+
+        if allowed is not None:
+            tail_scores = np.where(allowed[self.num_articles:], tail_scores, 0)
+
+        tail_rows   = np.flatnonzero(tail_scores).astype(np.int32)
+        tail_scores = tail_scores[tail_rows].astype(np.float32)
+        tail_rows  += self.num_articles
+
+        rows, inverse = np.unique(matched_rows, return_inverse=True)
+        scores        = np.bincount(inverse, weights=matched_scores).astype(np.float32)
+
+        return (np.concatenate([rows.astype(np.int32), tail_rows]), 
+                np.concatenate([scores, tail_scores]))
+
+
+    def score(self, query_vector: csr_matrix, allowed: np.ndarray = None) -> tuple:
+        """
+        Scores only the articles sharing at least one term with the query.
+
+        Parameters
+        ----------
+        query_vector : csr_matrix
+            L2-normalised TF-IDF vector of the query (1 x features).
+        allowed : np.ndarray, optional
+            Rows (marked `True`) the articles are restricted to, e.g. those 
+            having some tags. Postings of other rows are never scored.
+            The default is None, meaning all rows.
+
+        Returns
+        -------
+        tuple
+            (rows, scores) of matching articles, in no particular order.
+        """
+
+        # Scores of the rows that are not a part of the postings yet
+        tail_scores = (self.tail @ query_vector.T).toarray().ravel()
+
+        # Gather postings of the query terms only
+        positions, matched_rows, query_weights = self.match(query_vector.indices, 
+                                                            query_vector.data, 
+                                                            allowed)
+
+        # Accumulate the dot product for every matched article
+        return self.collect(matched_rows, self.weights[positions] * query_weights, 
+                            tail_scores, allowed)
+
+
+    def top_k(self, 
+              query_vector: csr_matrix, 
+              k:            int, 
+              deleted:      np.ndarray = None,
+              allowed:      np.ndarray = None) -> tuple:
+        """
+        Finds top-`k` articles most similar to the query.
+
+        Parameters
+        ----------
+        query_vector : csr_matrix
+            L2-normalised TF-IDF vector of the query (1 x features).
+        k : int
+            Number of articles to find.
+        deleted : np.ndarray, optional
+            Tombstones - rows marked `True` are left out of the result.
+            The default is None.
+        allowed : np.ndarray, optional
+            Rows the result is restricted to, see `score`. The default is None.
+
+        Returns
+        -------
+        tuple
+            (rows, scores) of at most `k` matching articles,
+            sorted by descending similarity.
+        """
+
+        if k <= 0:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+        
+        rows, scores = self.score(query_vector, allowed)
+
+        if deleted is not None:
+            alive = ~deleted[rows]
+            rows, scores = rows[alive], scores[alive]
+
+        if rows.shape[0] > k:
+            # Unordered top-k in linear time, only k elements get sorted
+            chosen = np.argpartition(-scores, k - 1)[:k]
+            rows, scores = rows[chosen], scores[chosen]
+
+        order = np.lexsort((rows, -scores)) # Ties broken by row, like stable sort
+        return rows[order], scores[order]
@@ -0,0 +1,260 @@
+import numpy as np # Math
+
+from scipy.sparse import csr_matrix # Typehinting
+
+
+def normalize(embeddings: np.ndarray) -> np.ndarray:
+    """
+    Returns
+    -------
+    np.ndarray
+        Embeddings with L2-normalised rows. Rows of zeros stay zeros.
+    """
+
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+
+    return embeddings / norms
+
+
+class LSAEmbedding:
+    def __init__(self,
+                 components: np.ndarray,
+                 embeddings: np.ndarray,
+                 scales:     np.ndarray = None):
+        """
+        Creates an instance of LSAEmbedding - dense, reduced-dimension
+        representation of the articles (latent semantic analysis).
+        Every article takes up a fixed number of bytes, no matter how large
+        the vocabulary is, and similarities are plain BLAS products.
+
+        Parameters
+        ----------
+        components : np.ndarray
+            Projection from TF-IDF features (dimensions x features), float32.
+        embeddings : np.ndarray
+            L2-normalised embeddings of the articles (articles x dimensions).
+            Either float32, or int8 quantised with per-row `scales`.
+        scales : np.ndarray, optional
+            Per-row scales of int8 quantised embeddings. The default is None,
+            meaning that embeddings are not quantised.
+        """
+
+        self.components = components
+        self.embeddings = embeddings
+        self.scales     = scales
+
+
+    def __len__(self) -> int:
+        return self.embeddings.shape[0]
+
+
+    @property
+    def quantized(self) -> bool:
+        return self.scales is not None
+
+
+    @classmethod
+    def build(cls,
+              tfidf_matrix: csr_matrix,
+              n_components: int = 128,
+              quantize:     bool = False,
+              seed:         int = 0):
+        """
+        Builds the embeddings through truncated SVD of the TF-IDF matrix.
+
+        Parameters
+        ----------
+        tfidf_matrix : csr_matrix
+            TF-IDF matrix (articles x features).
+        n_components : int, optional
+            Number of dimensions. The default is 128.
+        quantize : bool, optional
+            If set to `True`, embeddings are stored as int8 with per-row
+            scales (4x less memory). The default is False.
+        seed : int, optional
+            Seed of the randomized SVD. The default is 0.
+
+        Returns
+        -------
+        LSAEmbedding
+            Embeddings of all the articles in the matrix.
+        """
+
+        # Only needed for training, and slow to import
+        from sklearn.decomposition import TruncatedSVD # Latent semantic analysis
+
+        n_components = max(min(n_components, min(tfidf_matrix.shape) - 1), 1)
+
+        svd = TruncatedSVD(n_components=n_components, random_state=seed)
+        embeddings = svd.fit_transform(tfidf_matrix)
+
+        embedding = cls(np.ascontiguousarray(svd.components_, dtype=np.float32),
+                        np.empty((0, n_components), dtype=np.float32))
+        embedding.embeddings, embedding.scales = embedding.store(embeddings, quantize)
+
+        return embedding
+
+
+    @staticmethod
+    def store(embeddings: np.ndarray, quantize: bool) -> tuple:
+        """
+        Brings embeddings into the form they are stored in.
+
+        Returns
+        -------
+        tuple
+            (embeddings, scales) - L2-normalised contiguous float32 embeddings
+            and no scales, or int8 embeddings and their per-row float32 scales.
+        """
+
+        embeddings = normalize(np.asarray(embeddings, dtype=np.float32))
+
+        if not quantize:
+            return np.ascontiguousarray(embeddings), None
+
+        scales = np.abs(embeddings).max(axis=1) / 127
+        scales[scales == 0] = 1
+
+        quantized = np.rint(embeddings / scales[:, None]).astype(np.int8)
+
+        return quantized, scales.astype(np.float32)
+
+
+    def transform(self, vectors: csr_matrix) -> np.ndarray:
+        """
+        Returns
+        -------
+        np.ndarray
+            L2-normalised embeddings of TF-IDF vectors (vectors x dimensions).
+        """
+
+        embeddings = np.asarray(vectors @ self.components.T, dtype=np.float32)
+        return normalize(embeddings)
+
+
+    def append(self, vector: csr_matrix):
+        """
+        Appends a new article (TF-IDF row) to the embeddings.
+        """
+
+        embedding, scale = self.store(self.transform(vector), self.quantized)
+
+        self.embeddings = np.vstack([self.embeddings, embedding])
+        if self.quantized:
+            self.scales = np.concatenate([self.scales, scale])
+
+
+    def vector(self, row: int) -> np.ndarray:
+        """
+        Returns
+        -------
+        np.ndarray
+            Embedding of the article, as float32.
+        """
+
+        if self.quantized:
+            return self.embeddings[row].astype(np.float32) * self.scales[row]
+
+        return np.asarray(self.embeddings[row])
+
+
+    def similarities(self, query: np.ndarray, block_size: int = 65536) -> np.ndarray:
+        """
+        Cosine similarity of the query embedding with all articles.
+
+        Parameters
+        ----------
+        query : np.ndarray
+            L2-normalised embedding (dimensions,).
+        block_size : int, optional
+            Number of quantised rows converted to float32 at once.
+            The default is 65536.
+
+        Returns
+        -------
+        np.ndarray
+            Similarity with each article.
+        """
+
+        query = np.asarray(query, dtype=np.float32).ravel()
+
+        if not self.quantized:
+            return self.embeddings @ query
+
+        similarities = np.empty(len(self), dtype=np.float32)
+        for start in range(0, len(self), block_size):
+            block = self.embeddings[start:start + block_size].astype(np.float32)
+            similarities[start:start + block_size] = block @ query
+
+        return similarities * self.scales
+
+
+    def similarities_many(self, queries: np.ndarray) -> np.ndarray:
+        """
+        Cosine similarity of many query embeddings with all articles,
+        through a single matrix-matrix product.
+
+        Parameters
+        ----------
+        queries : np.ndarray
+            L2-normalised embeddings (queries x dimensions).
+
+        Returns
+        -------
+        np.ndarray
+            Similarities (queries x articles).
+        """
+
+        queries = np.asarray(queries, dtype=np.float32)
+
+        if not self.quantized:
+            return queries @ self.embeddings.T
+
+        return (queries @ self.embeddings.T.astype(np.float32)) * self.scales
+
+
+    def top_k(self, 
+              query:   np.ndarray, 
+              k:       int, 
+              exclude: int = -1, 
+              deleted: np.ndarray = None) -> tuple:
+        """
+        Finds top-`k` articles most similar to the query embedding.
+
+        Parameters
+        ----------
+        query : np.ndarray
+            L2-normalised embedding (dimensions,).
+        k : int
+            Number of articles to find.
+        exclude : int, optional
+            Row to leave out of the result (the article itself).
+            The default is -1 (nothing is left out).
+        deleted : np.ndarray, optional
+            Tombstones - rows marked `True` are left out of the result.
+            The default is None.
+
+        Returns
+        -------
+        tuple
+            (rows, scores) of at most `k` articles, sorted by descending similarity.
+        """
+
+        scores = self.similarities(query)
+        if exclude >= 0:
+            scores[exclude] = -np.inf
+
+        num_left_out = int(exclude >= 0)
+        if deleted is not None:
+            scores[deleted] = -np.inf
+            num_left_out = int(np.count_nonzero(np.isneginf(scores)))
+
+        k = min(k, len(self) - num_left_out)
+        if k <= 0:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+
+        rows = np.argpartition(-scores, k - 1)[:k]
+        rows = rows[np.lexsort((rows, -scores[rows]))]
+
+        return rows.astype(np.int32), scores[rows]
@@ -0,0 +1,229 @@
+import numpy as np # Math
+
+from scipy.sparse import csr_matrix # Typehinting
+
+
+class RandomProjectionLSH:
+    def __init__(self,
+                 planes:       np.ndarray,
+                 order:        np.ndarray,
+                 sorted_codes: np.ndarray):
+        """
+        Creates an instance of RandomProjectionLSH - approximate nearest
+        neighbour index for cosine similarity.
+        Every table hashes an article into a bucket by the signs of its
+        projections onto random hyperplanes - similar articles tend to land
+        in the same bucket. Only articles from the query's buckets get scored.
+
+        Parameters
+        ----------
+        planes : np.ndarray
+            Random hyperplanes (features x tables x bits), stored as float32.
+        order : np.ndarray
+            Rows of articles sorted by their bucket, per table (tables x articles).
+        sorted_codes : np.ndarray
+            Bucket codes of the articles in `order`, per table (tables x articles).
+        """
+
+        self.planes       = planes
+        self.order        = order
+        self.sorted_codes = sorted_codes
+
+        self.num_features, self.num_tables, self.num_bits = planes.shape
+        self.num_articles = order.shape[1]
+
+        # Articles inserted after the index has been built
+        self.tail_codes = np.empty((0, self.num_tables), dtype=np.int64)
+
+
+    def __len__(self) -> int:
+        return self.num_articles + self.tail_codes.shape[0]
+
+
+    @classmethod
+    def build(cls,
+              tfidf_matrix: csr_matrix,
+              num_tables:   int = 16,
+              num_bits:     int = None,
+              seed:         int = 0,
+              block_size:   int = 65536):
+        """
+        Builds the index from L2-normalised TF-IDF matrix.
+
+        Parameters
+        ----------
+        tfidf_matrix : csr_matrix
+            TF-IDF matrix (articles x features).
+        num_tables : int, optional
+            Number of hash tables. More tables - better recall, more
+            candidates to score. The default is 16.
+        num_bits : int, optional
+            Number of hyperplanes per table. More bits - smaller buckets.
+            The default is None, meaning that it is chosen so that buckets
+            hold around 16 articles on average.
+        seed : int, optional
+            Seed of random hyperplanes. The default is 0.
+        block_size : int, optional
+            Number of rows hashed at once, bounding the memory used
+            for projections. The default is 65536.
+
+        Returns
+        -------
+        RandomProjectionLSH
+            Index of all the articles in the matrix.
+        """
+
+        if num_bits is None:
+            num_bits = int(np.clip(np.log2(max(tfidf_matrix.shape[0], 1) / 16), 1, 62))
+        
+        rng = np.random.default_rng(seed)
+        planes = rng.standard_normal((tfidf_matrix.shape[1], num_tables, num_bits),
+                                     dtype=np.float32)
+
+        index = cls(planes,
+                    np.empty((num_tables, 0), dtype=np.int32),
+                    np.empty((num_tables, 0), dtype=np.int64))
+
+        codes = np.vstack([index.hash(tfidf_matrix[start:start + block_size]) # (articles x tables)
+                           for start in range(0, tfidf_matrix.shape[0], block_size)] or
+                          [np.empty((0, num_tables), dtype=np.int64)])
+        order = np.argsort(codes, axis=0, kind="stable").T.astype(np.int32)
+
+        index.order        = order
+        index.sorted_codes = np.take_along_axis(codes.T, order, axis=1)
+        index.num_articles = tfidf_matrix.shape[0]
+
+        return index
+
+
+    def project(self, vectors: csr_matrix) -> np.ndarray:
+        """
+        Returns
+        -------
+        np.ndarray
+            Projections of the vectors onto all hyperplanes (vectors x tables x bits).
+        """
+
+        # Hyperplanes are laid out so that this is a view, not a copy
+        flat_planes = self.planes.reshape(self.num_features, -1)
+        projections = vectors @ flat_planes
+
+        return np.asarray(projections).reshape(-1, self.num_tables, self.num_bits)
+
+
+    def hash(self, vectors: csr_matrix) -> np.ndarray:
+        """
+        Returns
+        -------
+        np.ndarray
+            Bucket code of every vector in every table (vectors x tables).
+        """
+
+        bits = self.project(vectors) > 0
+        powers = np.left_shift(1, np.arange(self.num_bits, dtype=np.int64))
+
+        return (bits * powers).sum(axis=2)
+
+
+    def insert(self, vector: csr_matrix):
+        """
+        Inserts a new article into the index. It gets the next row.
+        """
+
+        self.tail_codes = np.vstack([self.tail_codes, self.hash(vector)])
+
+
+    def candidates(self, vector: csr_matrix, num_probes: int = 2) -> np.ndarray:
+        """
+        Finds all articles sharing a bucket with the vector, in any table.
+
+        Parameters
+        ----------
+        vector : csr_matrix
+            L2-normalised TF-IDF vector (1 x features).
+        num_probes : int, optional
+            Besides the vector's own bucket, also probes the buckets whose
+            code differs in one of the `num_probes` least certain bits
+            (the smallest projections). Improves recall without more tables.
+            The default is 2.
+
+        Returns
+        -------
+        np.ndarray
+            Candidate rows, without duplicates.
+        """
+
+        projections = self.project(vector)[0]          # (tables x bits)
+        powers = np.left_shift(1, np.arange(self.num_bits, dtype=np.int64))
+        codes  = ((projections > 0) * powers).sum(axis=1)
+
+        # Neighbouring buckets - flip the least certain bits, one at a time
+        num_probes   = min(num_probes, self.num_bits)
+        uncertain    = np.argsort(np.abs(projections), axis=1)[:, :num_probes]
+        probe_codes  = np.column_stack([codes, codes[:, None] ^ powers[uncertain]])
+
+        found = []
+        for table in range(self.num_tables):
+            starts = np.searchsorted(self.sorted_codes[table], probe_codes[table], side="left")
+            ends   = np.searchsorted(self.sorted_codes[table], probe_codes[table], side="right")
+
+            for start, end in zip(starts, ends):
+                found.append(self.order[table, start:end])
+
+        # Inserted articles are few, so their codes are compared directly
+        tail_found = np.any(self.tail_codes[:, :, None] == probe_codes[None, :, :], axis=(1, 2))
+        found.append(self.num_articles + np.flatnonzero(tail_found))
+
+        return np.unique(np.concatenate(found).astype(np.int32))
+
+
+    def query(self,
+              vector:       csr_matrix,
+              tfidf_matrix: csr_matrix,
+              k:            int,
+              exclude:      int = -1,
+              num_probes:   int = 2,
+              deleted:      np.ndarray = None) -> tuple:
+        """
+        Finds (approximately) top-`k` articles most similar to the vector.
+        Candidates from the buckets are re-ranked by exact similarity.
+
+        Parameters
+        ----------
+        vector : csr_matrix
+            L2-normalised TF-IDF vector (1 x features).
+        tfidf_matrix : csr_matrix
+            TF-IDF matrix the candidates are scored against.
+        k : int
+            Number of articles to find.
+        exclude : int, optional
+            Row to leave out of the result (the article itself).
+            The default is -1 (nothing is left out).
+        num_probes : int, optional
+            Number of neighbouring buckets probed per table. The default is 2.
+        deleted : np.ndarray, optional
+            Tombstones - rows marked `True` are left out of the result.
+            The default is None.
+
+        Returns
+        -------
+        tuple
+            (rows, scores) of at most `k` articles, sorted by descending similarity.
+        """
+
+        if k <= 0:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+        
+        rows = self.candidates(vector, num_probes=num_probes)
+        rows = rows[rows != exclude]
+        if deleted is not None:
+            rows = rows[~deleted[rows]]
+
+        scores = (tfidf_matrix[rows] @ vector.T).toarray().ravel()
+
+        if rows.shape[0] > k:
+            chosen = np.argpartition(-scores, k - 1)[:k]
+            rows, scores = rows[chosen], scores[chosen]
+
+        order = np.lexsort((rows, -scores))
+        return rows[order], scores[order]
@@ -1,22 +1,43 @@
 import numpy as np # Math
+import copy        # Training a new model next to the current one
+import itertools   # Model generations
+from pathlib import Path
 
-from sklearn.metrics.pairwise import cosine_similarity      # Measuring the similarity
-from sklearn.feature_extraction.text import TfidfVectorizer # Vectorizing the articles
-from sklearn.preprocessing import normalize                 # Normalization
-from nltk.corpus import stopwords # Removing stopwords (preprocessing)
-
-from scipy.sparse import csr_matrix # Typehinting
+from scipy.sparse import csr_matrix, vstack # Sparse storage of TF-IDF rows
 
 from article.articles import Articles # Articles wrapper
+from article.article import Article   # Incremental updates
+from model.neighbours import NeighbourTable # Top-K similar articles
+from model.inverted_index import InvertedIndex # Searching
+from model.bm25 import BM25Index                # Searching, ranked by BM25
+from model.lsh import RandomProjectionLSH       # Approximate recommendation
+from model.lsa import LSAEmbedding              # Dense embeddings
+from model.search_cache import SearchCache      # Repeated searches
+from model.term_count_cache import TermCountCache    # Tokenizing only changed articles
+from model.vectorizer import FrozenVectorizer, normalize_rows # Vectorizing without scikit-learn
+
+from model.artifact import save_artifact, load_artifact, ArtifactError # Storage
 
-from joblib import dump, load         # Saving data onto the disk
+# scikit-learn (and NLTK) take the better part of a second to import, 
+# and are only needed for training - they are imported by `create_model` and `fit`.
+
+# Every change of any model's data gets a new, never reused generation,
+# so results computed by a model can not be mistaken for another's
+generations = itertools.count()
 
 
 class Model:
     def __init__(self, 
-                 path_tfidf_vectorizer:          str, 
-                 path_tfidf_matrix:              str, 
-                 path_tfidf_cosine_similarities: str):
+                 path_model:        str, 
+                 refit_threshold:   float = 0.1,
+                 recommend_backend: str = "exact",
+                 search_backend:    str = "index",
+                 search_scorer:     str = "tfidf",
+                 lsa_components:    int = 128,
+                 lsa_quantize:      bool = False,
+                 search_cache_size: int = 1024,
+                 search_cache_ttl:  float = 300.0,
+                 num_workers:       int = None):
         """
         Creates an instance of Model used for article recommendations.
         Model is implementing a TF-IDF vectorizer, combined with
@@ -24,38 +45,111 @@ class Model:
 
         Parameters
         ----------
-        path_tfidf_vectorizer : str
-            Path to TF-IDF vectorizer.
-        path_tfidf_matrix : TYPE
-            Path to TF-IDF file.
-        path_tfidf_cosine_similarities : TYPE
-            Path to cosine similarities file.
+        path_model : str
+            Path to the directory containing model artifact.
+        refit_threshold : float, optional
+            Vocabulary drift (share of articles the vocabulary and IDF 
+            weights have not been fitted on) after which the model 
+            needs a full refit. The default is 0.1.
+        recommend_backend : str, optional
+            How similar articles are found:
+                "exact" - precomputed table of top-K neighbours (all pairs)
+                "lsh"   - approximate search through locality-sensitive 
+                          hashing, for corpora too large for the former
+                "lsa"   - dense, reduced-dimension embeddings (LSA)
+            The default is "exact".
+        search_backend : str, optional
+            How articles matching keywords are found:
+                "index" - inverted index over TF-IDF matrix
+                "lsa"   - dense, reduced-dimension embeddings (LSA)
+            The default is "index".
+        search_scorer : str, optional
+            How articles matching keywords are ranked, unless a search
+            asks for another scorer:
+                "tfidf" - cosine similarity of TF-IDF vectors, 
+                          through `search_backend`
+                "bm25"  - Okapi BM25 over term frequencies, normalised 
+                          by the length of articles
+            The default is "tfidf".
+        lsa_components : int, optional
+            Number of dimensions of LSA embeddings. The default is 128.
+        lsa_quantize : bool, optional
+            If set to `True`, LSA embeddings are stored as int8, with per-row
+            scales. The default is False.
+        search_cache_size : int, optional
+            Maximal number of search results cached. The default is 1024.
+        search_cache_ttl : float, optional
+            Number of seconds a cached search result stays valid. 
+            The default is 300.0.
+        num_workers : int, optional
+            Number of processes articles are tokenized by (and threads 
+            similarities are computed by) during training.
+            The default is None, meaning the number of CPUs.
         """
         
         self.model_name = "Article TF-IDF MODEL"
-    
-        # Loading vectorizer
-        try:    
-            self.vectorizer = load(path_tfidf_vectorizer)    
-            self.features =  np.array(self.vectorizer.get_feature_names_out()) 
-            
-        except Exception as err:
-            self.inform(f"[TF-IDF VECTORIZER LOADING ERROR]: {err}")
-
-        # Loading TF-IDF matrix
-        try: 
-            self.tfidf_matrix = load(path_tfidf_matrix).toarray()
-        except Exception as err:
-            # Matrix can not be loaded, most likely because it does not exist
-            self.inform(f"[TF-IDF MATRIX LOADING ERRROR]: {err}")
-
-        # Loading TF-IDF cosine similarities
-        try:
-            self.cosine_similarities = load(path_tfidf_cosine_similarities)
-        except Exception as err:
-            self.inform(f"[TF-IDF COSINE SIMILARITIES LOADING ERROR]: {err}") 
         
-        self.num_articles, self.num_features = self.tfidf_matrix.shape
+        # The model is saved to the same place it has been loaded from
+        self.path_model = path_model
+        
+        # Number of similar articles kept for each article.
+        # Recommendation can never ask for more than this.
+        self.NUM_NEIGHBOURS = 32
+        
+        # Number of articles whose similarities are computed at once,
+        # when building the neighbour table. Bounds the memory used.
+        self.SIMILARITY_BLOCK_SIZE = 1024
+        
+        # Number of queries scored at once by batch methods.
+        # Bounds the memory used for a block of (queries x articles) scores.
+        self.BATCH_SIZE = 256
+        
+        self.refit_threshold = refit_threshold
+        self.num_workers     = num_workers
+        
+        self.recommend_backend = recommend_backend
+        self.neighbours = None # Used by "exact" backend
+        self.lsh        = None # Used by "lsh" backend
+        
+        self.search_backend = search_backend
+        self.search_scorer  = search_scorer
+        self.bm25 = None # Used by "bm25" scorer
+        self.lsa_components = lsa_components
+        self.lsa_quantize   = lsa_quantize
+        self.lsa = None # Used by "lsa" backends
+        
+        # Article ids of the rows, rows of the article ids (-1 if none)
+        # and tombstones - rows of deleted articles, kept until compaction
+        self.row_ids     = np.empty(0, dtype=np.int64)
+        self.id_rows     = np.empty(0, dtype=np.int64)
+        self.deleted     = np.empty(0, dtype=bool)
+        self.num_deleted = 0
+        
+        # Term counts of articles, cached between refits
+        self.term_count_cache = None
+        
+        # Version of scikit-learn the vectorizer has been trained with
+        self.sklearn_version = None
+        
+        # Articles added incrementally, since the last full fit
+        self.num_articles_added = 0
+        
+        # Whether the model has been loaded (or trained) and is ready for use
+        self.trained = False
+        
+        # Share of the neighbour table built (while training), from 0 to 1
+        self.training_progress = 0.0
+        
+        # Changes whenever the model's data does (load, fit, added article).
+        # Cached search results are valid only for the generation they come from.
+        self.generation   = next(generations)
+        self.search_cache = SearchCache(max_size=search_cache_size, ttl=search_cache_ttl)
+        
+        try:
+            self.load()
+        except ArtifactError as err:
+            # Model can not be loaded, most likely because it does not exist
+            self.inform(f"[MODEL LOADING ERROR]: {err}")
 
     
     def __str__(self):
@@ -67,7 +161,13 @@ class Model:
     
     
     def __setitem__(self, pos: int, val: csr_matrix): 
-        self.tfidf_matrix[pos] = val
+        # Assigning directly into CSR matrix changes its sparsity structure,
+        # so the matrix is rather stacked back together around the new row
+        self.tfidf_matrix = vstack([self.tfidf_matrix[:pos],
+                                    self.prepare_matrix(val),
+                                    self.tfidf_matrix[pos + 1:]],
+                                   format="csr")
+        self.generation = next(generations)
         
     
     def recommend(self, article_id: int, quantity: int = 5) -> list:    
@@ -85,46 +185,47 @@ class Model:
         Returns
         -------
         list
-            List of top-`quantity` similar articles.
+            List of ids of top-`quantity` similar articles.
 
         """
         
-        # Get the indices of the top `quantity` most similar articles 
-        # It is also needed to remove the article itself
-        most_similar_ids = np.argsort(self.cosine_similarities[article_id])[-quantity-1:-1][::-1]
+        row = self.row(article_id)
+        deleted = self.deleted if self.num_deleted else None # Skipping dead rows
         
-        return most_similar_ids
-    
-    
-    def calculate_similarities_keywords_article(self, keywords: list) -> list:
-        """
-        Returns
-        -------
-        list
-            List of the most similar articles, given certain keywords. 
-            Used for searching.
-        """
-        keyword_vector = self.vectorizer.transform([' '.join(keywords)])
-
-        # Calculate cosine similarity between the keyword vector and all article vectors
-        similarities = cosine_similarity(keyword_vector, self.tfidf_matrix)
-
-        # Extract the similarity scores for each article
-        article_similarities = similarities[0]
-
-        # Combine article indices with their similarity scores
-        article_scores = list(enumerate(article_similarities))
-
-        # Sort the articles by similarity score in descending order
-        sorted_articles = sorted(article_scores, key=lambda x: x[1], reverse=True)
-
-        return sorted_articles
+        if self.recommend_backend == "lsa":
+            most_similar_rows, _ = self.lsa.top_k(self.lsa.vector(row),
+                                                  k=quantity,
+                                                  exclude=row,
+                                                  deleted=deleted)
+            
+        elif self.recommend_backend == "lsh":
+            # Only articles hashed into the same buckets get scored
+            most_similar_rows, _ = self.lsh.query(self.tfidf_matrix[row],
+                                                  self.tfidf_matrix,
+                                                  k=quantity,
+                                                  exclude=row,
+                                                  deleted=deleted)
+            
+        else:
+            # Get the indices of the top `quantity` most similar articles.
+            # They are precomputed (and sorted), so this is just a lookup.
+            most_similar_rows = self.neighbours.neighbours(row, quantity, deleted)
+            
+            # Too many of the neighbours have been deleted - until the table 
+            # is compacted, the neighbours are found by scoring all articles
+            if len(most_similar_rows) < min(quantity, self.num_live_articles - 1):
+                most_similar_rows = self.top_k_many(self.score_rows, np.array([row]), 
+                                                    quantity, exclude_self=True)[0][0]
+        
+        return self.row_ids[most_similar_rows]
     
     
     def search(self, 
                articles: Articles, 
                keywords: list, 
-               quantity: int = 5) -> list:
+               quantity: int = 5,
+               scorer:   str = None,
+               tags:     list = None) -> list:
         """
         Search for top-`quantity` similar articles, given keywords.
 
@@ -137,6 +238,12 @@ class Model:
         quantity : int, optional
             The number of articles to be returned after searching. 
             The default is 5.
+        scorer : str, optional
+            "tfidf" or "bm25", see `search_scorer`. The default is None, 
+            meaning `search_scorer`.
+        tags : list, optional
+            If given, only articles tagged by all of the tags are searched
+            through (and scored). The default is None.
             
         Returns
         -------
@@ -144,20 +251,356 @@ class Model:
             Search result.
         """
         
-        similarities = self.calculate_similarities_keywords_article(keywords)
+        scorer = scorer or self.search_scorer
+        tags   = tuple(sorted(set(tags))) if tags else ()
+        
+        # Popular searches repeat, so their results are cached.
+        # Tags of articles can change without the model knowing,
+        # so searches filtered by tags are not.
+        key = self.search_cache.key(keywords, quantity) + (scorer,)
+        recommended_indices = self.search_cache.get(key, self.generation) if not tags else None
+        
+        if tags:
+            allowed = self.rows_of(articles.tag_index.lookup(tags))
+            recommended_indices = self.search_indices(keywords, quantity, scorer, allowed=allowed)
+            
+        elif recommended_indices is None:
+            recommended_indices = self.search_indices(keywords, quantity, scorer)
+            self.search_cache.put(key, self.generation, recommended_indices)
 
-        # Get the top N recommendations
-        top_recommendations = similarities[:quantity]
+        # Get the actual articles based on the indices (rows)
+        recommended_articles = articles.get_many([self.row_ids[index] for index in recommended_indices])
+            
+        return recommended_articles
+    
+    
+    def search_indices(self, 
+                       keywords: list, 
+                       quantity: int, 
+                       scorer:   str = "tfidf",
+                       allowed:  np.ndarray = None) -> tuple:
+        """
+        Parameters
+        ----------
+        allowed : np.ndarray, optional
+            Rows (marked `True`) the search is restricted to, which are never
+            deleted ones. The default is None, meaning all live rows.
+            
+        Returns
+        -------
+        tuple
+            Indices of top-`quantity` articles matching the keywords.
+        """
+        
+        deleted = self.deleted if self.num_deleted else None # Skipping dead rows
+        if allowed is not None:
+            deleted = None
+        
+        if scorer == "bm25":
+            top_indices, _ = self.bm25_index().top_k(self.vectorizer.count([' '.join(keywords)]),
+                                                     quantity, 
+                                                     deleted=deleted,
+                                                     allowed=allowed)
+            return tuple(self.fill_up([int(index) for index in top_indices], quantity, allowed))
+        
+        keyword_vector = self.vectorize_keywords(keywords)
+        
+        if self.search_backend == "lsa":
+            top_indices, _ = self.lsa.top_k(self.lsa.transform(keyword_vector)[0], 
+                                            k=quantity,
+                                            deleted=deleted if allowed is None else ~allowed)
+            
+        else:
+            # Only articles containing some of the keywords get scored
+            top_indices, _ = self.inverted_index.top_k(keyword_vector, quantity, 
+                                                       deleted=deleted,
+                                                       allowed=allowed)
+            
+        return tuple(self.fill_up([int(index) for index in top_indices], quantity, allowed))
+    
+    
+    def rows_of(self, article_ids: np.ndarray) -> np.ndarray:
+        """
+        Returns
+        -------
+        np.ndarray
+            Mask of the rows of the articles with given ids,
+            leaving out those not in the model, or deleted.
+        """
+        
+        article_ids = np.asarray(article_ids, dtype=np.int64)
+        article_ids = article_ids[(article_ids >= 0) & (article_ids < self.id_rows.shape[0])]
+        
+        rows = self.id_rows[article_ids]
+        
+        allowed = np.zeros(self.num_articles, dtype=bool)
+        allowed[rows[rows >= 0]] = True
+        allowed &= ~self.deleted
+        
+        return allowed
+    
+    
+    def fill_up(self, indices: list, quantity: int, allowed: np.ndarray = None) -> list:
+        """
+        If too few articles match, the rest is filled up with the first 
+        articles, just as if they were sorted by (zero) similarity.
+        If `allowed` rows are given, only those are filled up with.
+
+        Returns
+        -------
+        list
+            Indices, filled up to `quantity` (if there are enough articles).
+        """
+        
+        if len(indices) < quantity:
+            found_indices = set(indices)
+            candidates = range(self.num_articles) if allowed is None else np.flatnonzero(allowed).tolist()
+            for index in candidates:
+                if len(indices) == quantity:
+                    break
+                if index not in found_indices and not self.deleted[index]:
+                    indices.append(index)
+                    
+        return indices
+    
+    
+    def recommend_many(self, article_ids: list, quantity: int = 5) -> np.ndarray:
+        """
+        Batch version of `recommend` - recommends top-`quantity` similar 
+        articles for each of the given articles at once.
 
-        # Extract the article indices from the recommendations
-        recommended_indices = [index for index, _ in top_recommendations]
+        Parameters
+        ----------
+        article_ids : list
+            Articles whose similar articles are to be found.
+        quantity : int, optional
+            The number of articles to recommend for each. The default is 5.
 
-        # Get the actual articles based on the indices
-        recommended_articles = [articles[index] for index in recommended_indices]
+        Returns
+        -------
+        np.ndarray
+            Matrix (articles x quantity) of ids of similar articles, 
+            the most similar first.
+        """
+        
+        rows = np.array([self.row(article_id) for article_id in article_ids], dtype=np.int64)
+        
+        # Neighbours are precomputed, so this is just a gather
+        # (unless some of them might have been deleted)
+        if self.recommend_backend == "exact" and not self.num_deleted:
+            return self.row_ids[self.neighbours.ids[rows, :quantity]]
+        
+        if self.recommend_backend == "lsa":
+            def score_block(block_rows):
+                query_embeddings = np.vstack([self.lsa.vector(row) for row in block_rows])
+                return self.lsa.similarities_many(query_embeddings)
+        
+        else:
+            # One sparse matrix-matrix product per block of articles.
+            # Scoring all articles is exact, so LSH candidates are not needed.
+            score_block = self.score_rows
             
-        return recommended_articles
+        top_indices, _ = self.top_k_many(score_block, rows, quantity, exclude_self=True)
+        
+        return self.row_ids[top_indices]
+    
+    
+    def score_rows(self, rows: np.ndarray) -> np.ndarray:
+        """
+        Returns
+        -------
+        np.ndarray
+            Similarities of given rows to all articles (rows x articles).
+        """
+        
+        return (self.tfidf_matrix[rows] @ self.tfidf_matrix.T).toarray()
+    
+    
+    def search_many(self, 
+                    articles:      Articles,
+                    keywords_list: list,
+                    quantity:      int = 5,
+                    scorer:        str = None) -> list:
+        """
+        Batch version of `search` - searches for top-`quantity` similar 
+        articles for each of the given keyword lists at once.
+        All the keywords are vectorized in a single call.
+
+        Parameters
+        ----------
+        articles : Articles
+            All articles available on platform, loaded into a wrapper.
+        keywords_list : list
+            List of keyword lists.
+        quantity : int, optional
+            The number of articles to be returned for each keyword list. 
+            The default is 5.
+        scorer : str, optional
+            "tfidf" or "bm25", see `search_scorer`. The default is None, 
+            meaning `search_scorer`.
+
+        Returns
+        -------
+        list
+            Search result for each keyword list.
+        """
+        
+        scorer = scorer or self.search_scorer
+        texts  = [' '.join(keywords) for keywords in keywords_list]
+        
+        if scorer == "bm25":
+            bm25         = self.bm25_index()
+            query_counts = self.vectorizer.count(texts)
+            def score_block(block_rows):
+                block = np.zeros((len(block_rows), self.num_articles), dtype=np.float32)
+                for position, row in enumerate(block_rows):
+                    rows, scores = bm25.score(query_counts[row])
+                    block[position, rows] = scores
+                return block
+        
+        elif self.search_backend == "lsa":
+            keyword_vectors  = self.prepare_matrix(self.vectorizer.transform(texts))
+            query_embeddings = self.lsa.transform(keyword_vectors)
+            def score_block(block_rows):
+                return self.lsa.similarities_many(query_embeddings[block_rows])
+            
+        else:
+            keyword_vectors   = self.prepare_matrix(self.vectorizer.transform(texts))
+            matrix_transposed = self.tfidf_matrix.T.tocsr()
+            def score_block(block_rows):
+                return (keyword_vectors[block_rows] @ matrix_transposed).toarray()
+            
+        top_indices, top_scores = self.top_k_many(score_block, np.arange(len(keywords_list)), quantity)
+        
+        # Articles not matching at all are ordered the same way `search` orders them
+        if scorer == "bm25" or self.search_backend != "lsa":
+            top_indices = [indices[similarities > 0] 
+                           for indices, similarities in zip(top_indices, top_scores)]
+            
+        results = []
+        for indices in top_indices:
+            recommended_indices = self.fill_up([int(index) for index in indices], quantity)
+            results.append(articles.get_many([self.row_ids[index] for index in recommended_indices]))
+            
+        return results
     
     
+    def top_k_many(self, 
+                   score_block, 
+                   rows:         np.ndarray, 
+                   quantity:     int,
+                   exclude_self: bool = False) -> tuple:
+        """
+        Selects top-`quantity` articles for many queries, one block 
+        of queries at a time.
+
+        Parameters
+        ----------
+        score_block : callable
+            Given rows of a block of queries, returns dense matrix of 
+            their scores (queries x articles).
+        rows : np.ndarray
+            Rows of all the queries.
+        quantity : int
+            The number of articles to select per query.
+        exclude_self : bool, optional
+            If set to `True`, query `row` never selects article `row`.
+            The default is False.
+        
+        Deleted articles are never selected.
+
+        Returns
+        -------
+        tuple
+            (ids, scores) - matrices (queries x quantity) of selected 
+            articles and their scores, best first.
+        """
+        
+        quantity = max(min(quantity, self.num_live_articles - exclude_self), 0)
+        
+        ids    = np.empty((len(rows), quantity), dtype=np.int32)
+        scores = np.empty((len(rows), quantity), dtype=np.float32)
+        
+        for start in range(0, len(rows), self.BATCH_SIZE):
+            block_rows = rows[start:start + self.BATCH_SIZE]
+            
+            block = score_block(block_rows)
+            if self.num_deleted:
+                block[:, self.deleted] = -np.inf
+            
+            exclude = block_rows if exclude_self else None
+            block_ids, block_scores = NeighbourTable.select_top_k(block, quantity, 
+                                                                  exclude=exclude)
+            ids[start:start + self.BATCH_SIZE]    = block_ids
+            scores[start:start + self.BATCH_SIZE] = block_scores
+            
+        return ids, scores
+        
+    
+    def vectorize_keywords(self, keywords: list) -> csr_matrix:
+        """
+        Returns
+        -------
+        csr_matrix
+            L2-normalised TF-IDF vector of the keywords (1 x features).
+        """
+        
+        return self.prepare_matrix(self.vectorizer.transform([' '.join(keywords)]))
+    
+    
+    def build_index(self):
+        """
+        Builds the inverted index (term -> articles) used for searching.
+        """
+        
+        self.inverted_index = InvertedIndex.build(self.tfidf_matrix)
+        
+        
+    def bm25_index(self) -> BM25Index:
+        """
+        Returns
+        -------
+        BM25Index
+            Index used by "bm25" scorer.
+            
+        Raises
+        ------
+        ValueError
+            If the model has been saved without one (before BM25 has been 
+            added) - term frequencies are only known after a refit.
+        """
+        
+        if self.bm25 is None:
+            raise ValueError("Model has no term frequencies for BM25 - it needs to be refitted.")
+            
+        return self.bm25
+        
+        
+    @property
+    def uses_lsa(self) -> bool:
+        """
+        Returns
+        -------
+        bool
+            Whether any of the backends works on LSA embeddings.
+        """
+        
+        return self.recommend_backend == "lsa" or self.search_backend == "lsa"
+    
+    
+    def build_embeddings(self):
+        """
+        Builds LSA embeddings of the articles, if any backend needs them.
+        """
+        
+        if self.uses_lsa:
+            self.lsa = LSAEmbedding.build(self.tfidf_matrix,
+                                          n_components=self.lsa_components,
+                                          quantize=self.lsa_quantize)
+        else:
+            self.lsa = None
+        
+        
     def refit(self, articles: Articles):
         """
         Refits the model by creating a new one and retraining it, 
@@ -171,7 +614,275 @@ class Model:
         """
         
         self.create_new_model(articles=articles)
+        self.save()
+        
+    
+    def retrained(self, articles: Articles):
+        """
+        Trains a new model on given articles, leaving this one untouched,
+        so it can keep serving while the training is running.
+
+        Parameters
+        ----------
+        articles : Articles
+            Articles wrapper (or its snapshot) to train the new model on.
+
+        Returns
+        -------
+        Model
+            Newly trained model, sharing paths and settings with this one.
+            It is not saved - that is up to whoever swaps it in.
+        """
+        
+        # Every trained part is reassigned (not modified) during training,
+        # so shallow copy is enough to keep the models apart
+        new_model = copy.copy(self)
+        new_model.create_new_model(articles=articles)
+        
+        return new_model
+        
+    
+    def add_article(self, article: Article):
+        """
+        Adds a new article to the model, without retraining it.
+        Article is vectorized against the existing vocabulary and IDF weights,
+        appended as a new row and only the neighbour lists it enters 
+        are updated.
+
+        Parameters
+        ----------
+        article : Article
+            Newly created article, the last one in the Articles wrapper.
+        """
+        
+        text = self.join_title_content(article.title, article.content)
+        new_counts = self.vectorizer.count([text])
+        new_row = self.prepare_matrix(self.vectorizer.weight(new_counts.copy()))
+        
+        self.tfidf_matrix = vstack([self.tfidf_matrix, new_row], format="csr")
+        self.num_articles += 1
+        
+        deleted = self.deleted # Tombstones of the existing rows
+        self.set_rows(np.append(self.row_ids, article.id), np.append(self.deleted, False))
+        
+        if self.lsa is not None:
+            self.lsa.append(new_row)
+            
+        if self.recommend_backend == "lsh":
+            self.lsh.insert(new_row)
+        
+        elif self.recommend_backend == "exact":
+            # Similarities of the new article to all articles (itself included)
+            similarities = (self.tfidf_matrix @ new_row.T).toarray().ravel()
+            similarities[:-1][deleted] = -np.inf # Deleted articles are nobody's neighbours
+            self.neighbours.append(similarities)
+            
+        self.inverted_index.append(new_row)
+        
+        if self.bm25 is not None:
+            self.bm25.append(new_counts.astype(np.float32))
+        
+        self.num_articles_added += 1
+        self.generation = next(generations)
+        
+        
+    def remove_article(self, article_id: int):
+        """
+        Removes the article from the model, without retraining it.
+        Its row is only marked as deleted (tombstone) and skipped from then 
+        on, until the model gets compacted.
+
+        Parameters
+        ----------
+        article_id : int
+            ID of the article to be removed.
+        """
+        
+        self.deleted[self.row(article_id)] = True
+        self.num_deleted += 1
+        self.generation = next(generations)
+        
+        
+    def row(self, article_id: int) -> int:
+        """
+        Returns
+        -------
+        int
+            Row of the article with given ID.
+            
+        Raises
+        ------
+        KeyError
+            If the article is not a part of the model (or has been deleted).
+        """
+        
+        if 0 <= article_id < self.id_rows.shape[0]:
+            row = int(self.id_rows[article_id])
+            
+            if row >= 0 and not self.deleted[row]:
+                return row
+            
+        raise KeyError(f"Article {article_id} is not a part of the model.")
+        
+        
+    def set_rows(self, row_ids: np.ndarray, deleted: np.ndarray = None):
+        """
+        Sets the articles' ids of the rows (and their tombstones), 
+        building the reverse mapping too.
+        """
         
+        self.row_ids = np.asarray(row_ids, dtype=np.int64)
+        self.deleted = (np.zeros(self.row_ids.shape[0], dtype=bool) if deleted is None 
+                        else np.array(deleted, dtype=bool)) # Copied, might be memory-mapped
+        self.num_deleted = int(np.count_nonzero(self.deleted))
+        
+        num_ids = int(self.row_ids.max()) + 1 if self.row_ids.shape[0] else 0
+        self.id_rows = np.full(num_ids, -1, dtype=np.int64)
+        self.id_rows[self.row_ids] = np.arange(self.row_ids.shape[0])
+        
+        
+    @property
+    def num_live_articles(self) -> int:
+        return self.num_articles - self.num_deleted
+    
+    
+    def live_ids(self) -> np.ndarray:
+        """
+        Returns
+        -------
+        np.ndarray
+            Ids of all the articles in the model, except for deleted ones.
+        """
+        
+        return self.row_ids[~self.deleted]
+        
+        
+    def needs_compaction(self) -> bool:
+        return self.num_deleted > 0
+    
+    
+    def snapshot(self):
+        """
+        Returns
+        -------
+        Model
+            Copy of the model, unaffected by changes (added or removed 
+            articles) made to this one afterwards. Arrays are shared,
+            since changes never modify them in place.
+        """
+        
+        model_snapshot = copy.copy(self)
+        model_snapshot.deleted = self.deleted.copy()
+        
+        if self.neighbours is not None:
+            model_snapshot.neighbours = NeighbourTable(self.neighbours.ids, self.neighbours.scores)
+            
+        if self.lsa is not None:
+            model_snapshot.lsa = LSAEmbedding(self.lsa.components, self.lsa.embeddings, 
+                                              self.lsa.scales)
+            
+        # Appending reassigns the tail, so a shallow copy does not see it
+        if self.bm25 is not None:
+            model_snapshot.bm25 = copy.copy(self.bm25)
+            
+        # Both get rebuilt by compaction, so they are left out
+        model_snapshot.lsh            = None
+        model_snapshot.inverted_index = None
+            
+        return model_snapshot
+        
+        
+    def compact(self):
+        """
+        Removes the rows of deleted articles for good. Unlike refit, 
+        the vocabulary and IDF weights stay the same - only the neighbours 
+        that have been deleted are replaced and the indices rebuilt.
+        Meant to be run on a snapshot, in the background.
+        """
+        
+        alive = ~self.deleted
+        
+        self.tfidf_matrix = self.tfidf_matrix[alive]
+        self.num_articles = self.tfidf_matrix.shape[0]
+        
+        if self.recommend_backend == "exact":
+            self.neighbours = self.neighbours.compacted(alive, self.tfidf_matrix, 
+                                                        block_size=self.SIMILARITY_BLOCK_SIZE)
+            
+        elif self.recommend_backend == "lsh":
+            self.lsh = RandomProjectionLSH.build(self.tfidf_matrix)
+            
+        if self.lsa is not None:
+            self.lsa = LSAEmbedding(self.lsa.components,
+                                    np.ascontiguousarray(self.lsa.embeddings[alive]),
+                                    self.lsa.scales[alive] if self.lsa.quantized else None)
+        
+        self.build_index()
+        
+        if self.bm25 is not None:
+            self.bm25 = BM25Index.build(self.bm25.term_frequencies()[alive], 
+                                        k1=self.bm25.k1, b=self.bm25.b)
+        
+        self.set_rows(self.row_ids[alive])
+        self.generation = next(generations)
+        
+        
+    @property
+    def vocabulary_drift(self) -> float:
+        """
+        Returns
+        -------
+        float
+            Share of articles that vocabulary and IDF weights have not been
+            fitted on. The more of them, the less representative the model is.
+        """
+        
+        return self.num_articles_added / max(self.num_articles, 1)
+    
+    
+    def needs_refit(self) -> bool:
+        """
+        Returns
+        -------
+        bool
+            Whether the vocabulary has drifted far enough for a full refit.
+        """
+        
+        return self.vocabulary_drift > self.refit_threshold
+    
+    
+    @staticmethod
+    def join_title_content(title: str, content: str) -> str:
+        """
+        Returns
+        -------
+        str
+            Text of an article, the way it is fed into the vectorizer.
+        """
+        
+        return title + "" + content
+    
+    
+    def prepare_matrix(self, matrix) -> csr_matrix:
+        """
+        Converts the matrix into the form the model works with.
+
+        Parameters
+        ----------
+        matrix :
+            TF-IDF matrix (or a single row), sparse or dense.
+
+        Returns
+        -------
+        csr_matrix
+            CSR matrix whose rows are L2-normalised, so cosine similarity
+            becomes a plain (sparse) dot product.
+        """
+        
+        matrix = csr_matrix(matrix, dtype=np.float64)
+        
+        return normalize_rows(matrix)
+    
     
     def inform(self, text: str):
         """
@@ -188,7 +899,7 @@ class Model:
     
     def create_new_model(self, articles: Articles):
         """
-        Creates a totally new model and saves it onto the disk.
+        Creates a totally new model (without saving it).
 
         Parameters
         ----------
@@ -201,8 +912,8 @@ class Model:
         self.create_model()
         self.fit()
         self.calculate_similarities()
-        
-        self.save()
+        self.build_index()
+        self.build_embeddings()
         
         
     def load_data(self, articles: Articles):
@@ -217,7 +928,14 @@ class Model:
         
         self.article_ids      = articles["id"]
         self.article_titles   = articles["title"]
-        self.article_contents = articles["content"]
+        self.article_contents = articles.iter_contents # Streamed once per pass, never all in memory
+        
+        # Term counts of the articles are cached next to the articles' data
+        self.path_term_counts = None
+        if articles.path_articles_metadata:
+            self.path_term_counts = Path(articles.path_articles_metadata).parent / "term_counts.npz"
+        
+        from nltk.corpus import stopwords # Removing stopwords (preprocessing)
         
         self.stopwords = stopwords.words("english")
         
@@ -228,9 +946,14 @@ class Model:
         The model is also used for searching.
         """
         
+        import sklearn
+        from sklearn.feature_extraction.text import TfidfVectorizer # Vectorizing the articles
+        
         # This is something to play with. 1000 works fine in this case.
         self.MAX_FEATURES = 1000
         
+        self.sklearn_version = sklearn.__version__
+        
         # A new instance of TfidfVectorizer
         self.vectorizer = TfidfVectorizer(analyzer='word',
                                       ngram_range=(1, 2),
@@ -245,11 +968,42 @@ class Model:
         Train the model to fit onto the new data.
         """
         
-        title_text_pairs = ((title + "" + content) 
-                            for title, content in 
-                            zip(self.article_titles, self.article_contents))
+        # Articles are streamed twice (counting, then vectorizing), 
+        # in chunks, across a pool of processes
+        title_text_pairs = lambda: (self.join_title_content(title, content)
+                                    for title, content in 
+                                    zip(self.article_titles, self.article_contents()))
+        
+        from model.tfidf_builder import ParallelTfidfBuilder # Training across cores
+        
+        builder = ParallelTfidfBuilder(self.vectorizer, num_workers=self.num_workers)
+        
+        # Only new and edited articles need to be tokenized again.
+        # Cache is kept in memory between refits, once it has been read.
+        cache = self.term_count_cache
+        if self.path_term_counts is None:
+            cache = None
+        elif (cache is None or cache.path != self.path_term_counts or 
+              cache.signature != builder.signature()):
+            cache = TermCountCache(self.path_term_counts, builder.signature())
         
-        self.tfidf_matrix = self.vectorizer.fit_transform(title_text_pairs)
+        self.tfidf_matrix = self.prepare_matrix(builder.fit_transform(title_text_pairs, cache=cache))
+        
+        if cache is not None:
+            cache.save()
+        self.term_count_cache = cache
+        
+        self.features = self.vectorizer.get_feature_names_out()
+        self.bm25     = BM25Index.build(builder.term_frequencies)
+        
+        # Trained vectorizer is only used for transforming from now on
+        self.vectorizer = FrozenVectorizer.from_vectorizer(self.vectorizer)
+        
+        self.num_articles, self.num_features = self.tfidf_matrix.shape
+        self.set_rows(self.article_ids)
+        self.num_articles_added = 0
+        self.trained = True
+        self.generation = next(generations)
         
         
     def get_top_words(self):
@@ -258,38 +1012,305 @@ class Model:
         The number of words is discussable, but 5 worked well in this case.
         """
         
-        self.tfidf_feature_names = np.array(self.vectorizer.get_feature_names_out())
-        self.dense_tfidf_matrix = self.tfidf_matrix.toarray()
+        top_words = self.top_terms(quantity=5)
         
-        # Iterate over each row (article) in the TF-IDF matrix
-        for i in range(self.dense_tfidf_matrix.shape[0]):
-            # Get the TF-IDF values for the current article
-            tfidf_values = self.dense_tfidf_matrix[i]
+        for article_id, words in zip(self.live_ids(), top_words):
+            # Print the results for the current article
+            print(f"Top 5 words for Article {article_id}: {words}")
+            
+        return top_words
+    
+    
+    def top_terms(self, 
+                  rows:       np.ndarray = None, 
+                  quantity:   int = 5,
+                  block_size: int = 4096) -> list:
+        """
+        Finds the terms with the highest TF-IDF weights in given articles.
+
+        Parameters
+        ----------
+        rows : np.ndarray, optional
+            Rows of the articles. The default is None, meaning all the
+            articles (except for deleted ones).
+        quantity : int, optional
+            Number of terms per article. The default is 5.
+        block_size : int, optional
+            Number of rows processed at once. The default is 4096.
+
+        Returns
+        -------
+        list
+            List of top terms (the best first) of every article.
+        """
         
-            # Get the indices of the top 5 TF-IDF values
-            top_indices = np.argsort(tfidf_values)[-5:][::-1]
+        if rows is None:
+            rows = np.flatnonzero(~self.deleted)
+            
+        top_terms = []
+        for start in range(0, len(rows), block_size):
+            top_terms.extend(self.top_terms_of(self.tfidf_matrix[rows[start:start + block_size]], 
+                                               quantity))
+            
+        return top_terms
+    
+    
+    def top_terms_of(self, matrix: csr_matrix, quantity: int) -> list:
+        """
+        Finds top terms of every row of the (sparse) matrix.
+        Rows are laid out side by side into a dense block, only as wide as
+        the longest row, and reduced through a single per-row `argpartition`.
+
+        Returns
+        -------
+        list
+            List of top-`quantity` terms (the best first) of every row.
+        """
         
-            # Get the corresponding words from the feature names
-            top_words = self.feature_names[top_indices]
+        lengths = np.diff(matrix.indptr)
+        width   = max(int(lengths.max()) if lengths.shape[0] else 0, quantity, 1)
         
-            # Print the results for the current article
-            print(f"Top 5 words for Article {i}: {top_words}")
+        # Position of every stored element within its row
+        row_positions = np.repeat(np.arange(matrix.shape[0]), lengths)
+        col_positions = np.arange(matrix.nnz) - np.repeat(matrix.indptr[:-1], lengths)
+        
+        weights = np.full((matrix.shape[0], width), -np.inf)
+        terms   = np.full((matrix.shape[0], width), -1, dtype=np.int64)
+        weights[row_positions, col_positions] = matrix.data
+        terms[row_positions, col_positions]   = matrix.indices
+        
+        quantity = min(quantity, width)
+        if quantity <= 0:
+            return [[] for _ in range(matrix.shape[0])]
+        
+        chosen = np.argpartition(-weights, quantity - 1, axis=1)[:, :quantity]
+        chosen_weights = np.take_along_axis(weights, chosen, axis=1)
+        chosen_terms   = np.take_along_axis(terms, chosen, axis=1)
+        
+        order = np.lexsort((chosen_terms, -chosen_weights), axis=1)
+        chosen_weights = np.take_along_axis(chosen_weights, order, axis=1)
+        chosen_terms   = np.take_along_axis(chosen_terms, order, axis=1)
+        
+        features = self.features.tolist()
+        
+        return [[features[term] for term, weight in zip(row_terms, row_weights) if weight > 0]
+                for row_terms, row_weights in zip(chosen_terms.tolist(), chosen_weights.tolist())]
+    
+    
+    def suggest_tags(self, title: str, content: str, quantity: int = 5) -> list:
+        """
+        Suggests tags for an article that is yet to be published - its top
+        terms, according to the current vocabulary and IDF weights.
+
+        Returns
+        -------
+        list
+            Suggested tags, the most relevant first.
+        """
+        
+        vector = self.prepare_matrix(self.vectorizer.transform([self.join_title_content(title, content)]))
+        
+        return self.top_terms_of(vector, quantity)[0]
+    
+    
+    def retag(self, articles: Articles, quantity: int = 5) -> int:
+        """
+        Replaces tags of all the articles in the wrapper by their top terms.
+
+        Parameters
+        ----------
+        articles : Articles
+            Articles to be retagged.
+        quantity : int, optional
+            Number of tags per article. The default is 5.
+
+        Returns
+        -------
+        int
+            Number of articles retagged (those the model knows of).
+        """
+        
+        known_articles, rows = [], []
+        for article in articles.articles:
+            try:
+                rows.append(self.row(article.id))
+            except KeyError:
+                continue # Not a part of the model (yet)
+            known_articles.append(article)
+        
+        for article, tags in zip(known_articles, self.top_terms(np.array(rows, dtype=np.int64), quantity)):
+            articles.set_tags(article, tags)
+            
+        return len(known_articles)
         
         
     def calculate_similarities(self):
         """
-        Calculates cosine similarity on model's tfidf matrix.
+        Calculates cosine similarity on model's tfidf matrix, keeping only
+        top-K most similar articles for each article.
+        With "lsh" backend, articles are only hashed into buckets instead,
+        while "lsa" backend needs neither of them.
+        """
+        
+        self.neighbours = None
+        self.lsh        = None
+        
+        if self.recommend_backend == "lsh":
+            self.lsh = RandomProjectionLSH.build(self.tfidf_matrix)
+            
+        elif self.recommend_backend == "exact":
+            self.neighbours = NeighbourTable.build(self.tfidf_matrix, 
+                                                   k=self.NUM_NEIGHBOURS,
+                                                   block_size=self.SIMILARITY_BLOCK_SIZE,
+                                                   num_workers=self.num_workers,
+                                                   progress=self.report_progress)
+            
+        
+    def report_progress(self, rows_done: int, num_rows: int):
+        """
+        Keeps track of how much of the neighbour table has been built.
+        """
+        
+        self.training_progress = rows_done / max(num_rows, 1)
+        
+        
+    def load(self):
+        """
+        Loads the model and other relevant data from disk.
+        All the arrays are memory-mapped, rather than read into memory.
         """
-        self.normalized_tfidf_matrix = normalize(self.tfidf_matrix, norm='l2', axis=1)
         
-        # Compute cosine similarity between articles
-        self.cosine_similarities = cosine_similarity(self.normalized_tfidf_matrix)
+        arrays, metadata = load_artifact(self.path_model)
+        
+        # Loading TF-IDF matrix
+        # It is kept sparse (CSR) and never densified - dense copy of it would
+        # take up most of the memory used by the program.
+        # Rows are stored already L2-normalised.
+        self.tfidf_matrix = csr_matrix((arrays["tfidf_data"], 
+                                        arrays["tfidf_indices"], 
+                                        arrays["tfidf_indptr"]),
+                                       shape=tuple(metadata["shape"]),
+                                       copy=False)
+        
+        # Restoring vectorizer from its parameters, vocabulary and IDF weights.
+        # Loaded model only ever transforms, which does not need scikit-learn.
+        self.features = arrays["features"]
+        self.vectorizer = FrozenVectorizer({feature: idx for idx, feature in enumerate(self.features.tolist())},
+                                           np.array(arrays["idf"]),
+                                           {**metadata["vectorizer"],
+                                            "ngram_range": tuple(metadata["ngram_range"]),
+                                            "stop_words":  arrays["stop_words"].tolist()})
+        self.sklearn_version = metadata.get("sklearn_version")
+        
+        # Loading table of the most similar articles, or LSH buckets
+        if self.recommend_backend == "lsh" and "lsh_planes" in arrays:
+            self.lsh = RandomProjectionLSH(arrays["lsh_planes"],
+                                           arrays["lsh_order"],
+                                           arrays["lsh_sorted_codes"])
+            
+        elif self.recommend_backend == "exact" and "neighbour_ids" in arrays:
+            self.neighbours = NeighbourTable(arrays["neighbour_ids"], 
+                                             arrays["neighbour_scores"])
             
+        # Loading LSA embeddings
+        if self.uses_lsa and "lsa_embeddings" in arrays:
+            self.lsa = LSAEmbedding(arrays["lsa_components"],
+                                    arrays["lsa_embeddings"],
+                                    arrays.get("lsa_scales"))
+        
+        # Loading inverted index, used for searching
+        self.inverted_index = InvertedIndex(arrays["postings_pointers"],
+                                            arrays["postings_rows"],
+                                            arrays["postings_weights"],
+                                            metadata["shape"][0])
+        
+        # Loading term frequencies, used by BM25
+        if "bm25_pointers" in arrays:
+            self.bm25 = BM25Index(arrays["bm25_pointers"],
+                                  arrays["bm25_rows"],
+                                  arrays["bm25_frequencies"],
+                                  arrays["bm25_lengths"])
+        
+        self.num_articles, self.num_features = self.tfidf_matrix.shape
+        
+        # Artifacts saved before ids were stored have them equal to rows
+        if "article_ids" in arrays:
+            self.set_rows(arrays["article_ids"], arrays["deleted"])
+        else:
+            self.set_rows(np.arange(self.num_articles))
+        
+        self.trained = True
+        self.generation = next(generations)
+        
+        # Artifact might have been saved with the other backend
+        if ((self.recommend_backend == "lsh" and self.lsh is None) or
+            (self.recommend_backend == "exact" and self.neighbours is None)):
+            self.calculate_similarities()
+            
+        if self.uses_lsa and self.lsa is None:
+            self.build_embeddings()
+        
         
     def save(self):
         """
         Saves the model and other relevant data onto disk.
         """
-        dump(self.tfidf_matrix, "tfidf_matrix.joblib")
-        dump(self.vectorizer, "tfidf_vectorizer.joblib")
-        dump(self.cosine_similarities, "tfidf_cosine_similarities.joblib")
\ No newline at end of file
+        
+        # Postings of articles added incrementally are not a part of the index yet
+        if self.inverted_index.num_articles != self.num_articles:
+            self.build_index()
+            
+        if self.bm25 is not None and self.bm25.num_articles != self.num_articles:
+            self.bm25 = BM25Index.build(self.bm25.term_frequencies(), 
+                                        k1=self.bm25.k1, b=self.bm25.b)
+            
+        arrays = {"tfidf_data":        self.tfidf_matrix.data,
+                  "tfidf_indices":     self.tfidf_matrix.indices,
+                  "tfidf_indptr":      self.tfidf_matrix.indptr,
+                  "features":          self.features.astype(str),
+                  "idf":               self.vectorizer.idf_,
+                  "stop_words":        np.array(self.vectorizer.stop_words or [], dtype=str),
+                  "postings_pointers": self.inverted_index.pointers,
+                  "postings_rows":     self.inverted_index.rows,
+                  "postings_weights":  self.inverted_index.weights,
+                  "article_ids":       self.row_ids,
+                  "deleted":           self.deleted}
+        
+        if self.bm25 is not None:
+            arrays["bm25_pointers"]    = self.bm25.pointers
+            arrays["bm25_rows"]        = self.bm25.rows
+            arrays["bm25_frequencies"] = self.bm25.weights
+            arrays["bm25_lengths"]     = self.bm25.lengths
+            
+        if self.neighbours is not None:
+            arrays["neighbour_ids"]    = self.neighbours.ids
+            arrays["neighbour_scores"] = self.neighbours.scores
+            
+        if self.lsh is not None:
+            # Inserted articles are hashed into the buckets again
+            if self.lsh.num_articles != self.num_articles:
+                self.lsh = RandomProjectionLSH.build(self.tfidf_matrix)
+                
+            arrays["lsh_planes"]       = self.lsh.planes
+            arrays["lsh_order"]        = self.lsh.order
+            arrays["lsh_sorted_codes"] = self.lsh.sorted_codes
+            
+        if self.lsa is not None:
+            arrays["lsa_components"] = self.lsa.components
+            arrays["lsa_embeddings"] = self.lsa.embeddings
+            if self.lsa.quantized:
+                arrays["lsa_scales"] = self.lsa.scales
+        
+        # Parameters needed to restore the vectorizer (others are defaults)
+        vectorizer_params = {key: self.vectorizer.get_params()[key]
+                             for key in ["analyzer", "lowercase", "token_pattern", 
+                                         "min_df", "max_df", "max_features", 
+                                         "norm", "use_idf", "smooth_idf", "sublinear_tf"]}
+        
+        metadata = {"model_name":      self.model_name,
+                    "sklearn_version": self.sklearn_version,
+                    "shape":           list(self.tfidf_matrix.shape),
+                    "ngram_range":     list(self.vectorizer.ngram_range),
+                    "vectorizer":      vectorizer_params}
+        
+        save_artifact(self.path_model, arrays, metadata)
\ No newline at end of file
@@ -0,0 +1,289 @@
+import numpy as np # Math
+
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED # Blocks in parallel
+import os
+
+from scipy.sparse import csr_matrix # Typehinting
+
+
+class NeighbourTable:
+    def __init__(self, ids: np.ndarray, scores: np.ndarray):
+        """
+        Creates an instance of NeighbourTable - compact replacement for the
+        full matrix of cosine similarities.
+        Only top-K most similar articles (and their scores) are kept
+        for each article, sorted from the most similar one.
+
+        Parameters
+        ----------
+        ids : np.ndarray
+            Matrix (articles x K) of neighbour rows, stored as int32.
+        scores : np.ndarray
+            Matrix (articles x K) of neighbour similarities, stored as float32.
+        """
+
+        self.ids    = ids
+        self.scores = scores
+
+
+    def __len__(self) -> int:
+        return self.ids.shape[0]
+
+
+    def __getitem__(self, row: int) -> np.ndarray:
+        return self.ids[row]
+
+
+    @property
+    def k(self) -> int:
+        """
+        Returns
+        -------
+        int
+            Number of neighbours stored for each article.
+        """
+
+        return self.ids.shape[1]
+
+
+    @classmethod
+    def build(cls,
+              tfidf_matrix: csr_matrix,
+              k:            int = 32,
+              block_size:   int = 1024,
+              num_workers:  int = None,
+              progress = None):
+        """
+        Builds the table from L2-normalised TF-IDF matrix.
+        Similarities are computed one block of rows at a time and every block
+        is reduced to its top-K before moving on, so the full articles x articles
+        matrix never exists in memory. Peak memory is bounded by 
+        `num_workers` blocks (block_size x articles) in flight.
+        Blocks are processed by a pool of threads - sparse products and 
+        selection run in compiled code, releasing the GIL.
+
+        Parameters
+        ----------
+        tfidf_matrix : csr_matrix
+            TF-IDF matrix, whose rows are L2-normalised.
+        k : int, optional
+            Number of neighbours to keep per article. The default is 32.
+        block_size : int, optional
+            Number of rows processed at once. The default is 1024.
+        num_workers : int, optional
+            Number of threads processing blocks. The default is None,
+            meaning the number of CPUs.
+        progress : callable, optional
+            Called with (rows done, all rows) after every finished block.
+            The default is None.
+
+        Returns
+        -------
+        NeighbourTable
+            Table of top-K neighbours for every article.
+        """
+
+        num_articles = tfidf_matrix.shape[0]
+        k = max(min(k, num_articles - 1), 0) # Article is not its own neighbour
+
+        ids    = np.empty((num_articles, k), dtype=np.int32)
+        scores = np.empty((num_articles, k), dtype=np.float32)
+
+        matrix_transposed = tfidf_matrix.T.tocsr()
+
+        def process_block(start: int) -> int:
+            end = min(start + block_size, num_articles)
+
+            block = (tfidf_matrix[start:end] @ matrix_transposed).toarray()
+
+            block_ids, block_scores = cls.select_top_k(block, k, 
+                                                       exclude=np.arange(start, end))
+
+            # Blocks write into disjoint rows, so no locking is needed
+            ids[start:end]    = block_ids
+            scores[start:end] = block_scores
+
+            return end - start
+
+        num_workers = num_workers or os.cpu_count() or 1
+        rows_done = 0
+
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            in_flight = set()
+
+            for start in range(0, num_articles, block_size):
+                # Only a block per worker is kept in flight, bounding the memory
+                if len(in_flight) >= num_workers:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    rows_done += cls.collect(done, rows_done, num_articles, progress)
+
+                in_flight.add(executor.submit(process_block, start))
+
+            rows_done += cls.collect(wait(in_flight)[0], rows_done, num_articles, progress)
+
+        return cls(ids, scores)
+
+
+    @staticmethod
+    def collect(finished: set, rows_done: int, num_articles: int, progress) -> int:
+        """
+        Collects finished blocks, reporting the progress.
+
+        Returns
+        -------
+        int
+            Number of rows the blocks consisted of.
+        """
+
+        rows = 0
+        for future in finished:
+            rows += future.result() # Raises the block's exception, if any
+
+            if progress is not None:
+                progress(rows_done + rows, num_articles)
+
+        return rows
+
+
+    @staticmethod
+    def select_top_k(block: np.ndarray, k: int, exclude: np.ndarray = None) -> tuple:
+        """
+        Reduces a block of similarities to top-K neighbours per row.
+
+        Parameters
+        ----------
+        block : np.ndarray
+            Dense block of similarities (rows x articles).
+        k : int
+            Number of neighbours to keep per row.
+        exclude : np.ndarray, optional
+            Column to leave out of each row - the article itself, since
+            article is not its own neighbour. The default is None.
+
+        Returns
+        -------
+        tuple
+            (ids, scores) of top-K neighbours, sorted by descending similarity.
+        """
+
+        if exclude is not None:
+            block[np.arange(block.shape[0]), exclude] = -np.inf
+
+        if k == 0:
+            return (np.empty((block.shape[0], 0), dtype=np.int32),
+                    np.empty((block.shape[0], 0), dtype=np.float32))
+
+        # Unordered top-K, in linear time
+        top_ids    = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(block, top_ids, axis=1)
+
+        # Sort only K chosen elements (ties broken by lower index)
+        order      = np.lexsort((top_ids, -top_scores), axis=1)
+        top_ids    = np.take_along_axis(top_ids, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        return top_ids.astype(np.int32), top_scores.astype(np.float32)
+
+
+    def neighbours(self, row: int, quantity: int, deleted: np.ndarray = None) -> np.ndarray:
+        """
+        Returns
+        -------
+        np.ndarray
+            Top-`quantity` neighbours of given row, the most similar first.
+            Rows marked as `deleted` (tombstones) are skipped, so there might
+            be less than `quantity` of them.
+        """
+
+        if deleted is None:
+            return self.ids[row, :quantity]
+        
+        ids = self.ids[row]
+        return ids[~deleted[ids]][:quantity]
+
+
+    def compacted(self, 
+                  alive:        np.ndarray, 
+                  tfidf_matrix: csr_matrix,
+                  block_size:   int = 1024):
+        """
+        Leaves deleted rows out of the table, renumbering the rest.
+        Only the articles that have lost some of their neighbours get
+        their neighbours computed again.
+
+        Parameters
+        ----------
+        alive : np.ndarray
+            Mask of rows that are kept.
+        tfidf_matrix : csr_matrix
+            TF-IDF matrix of the kept rows only, L2-normalised.
+        block_size : int, optional
+            Number of rows recomputed at once. The default is 1024.
+
+        Returns
+        -------
+        NeighbourTable
+            Table of the kept rows.
+        """
+
+        num_articles = tfidf_matrix.shape[0]
+        k = max(min(self.k, num_articles - 1), 0)
+
+        # Old row -> new row, -1 for deleted rows
+        new_rows = np.cumsum(alive) - 1
+        new_rows[~alive] = -1
+
+        ids    = new_rows[self.ids[alive, :k]].astype(np.int32)
+        scores = np.array(self.scores[alive, :k])
+
+        stale = np.flatnonzero((ids < 0).any(axis=1))
+        
+        if stale.shape[0] > 0:
+            matrix_transposed = tfidf_matrix.T.tocsr()
+            
+            for start in range(0, stale.shape[0], block_size):
+                rows  = stale[start:start + block_size]
+                block = (tfidf_matrix[rows] @ matrix_transposed).toarray()
+
+                ids[rows], scores[rows] = self.select_top_k(block, k, exclude=rows)
+
+        return NeighbourTable(ids, scores)
+
+
+    def append(self, similarities: np.ndarray):
+        """
+        Appends a new article to the table and updates the neighbours of
+        already existing articles it has become one of.
+
+        Parameters
+        ----------
+        similarities : np.ndarray
+            Similarities between the new article and all articles,
+            new one included as the last element.
+        """
+
+        similarities = np.array(similarities, dtype=np.float32).ravel()
+        new_row      = similarities.shape[0] - 1
+
+        # Neighbours of the new article itself
+        new_ids, new_scores = self.select_top_k(similarities[None, :], self.k, 
+                                                exclude=np.array([new_row]))
+
+        # Only articles whose K-th neighbour is less similar than the new
+        # article are affected - usually just a handful of them
+        existing = similarities[:new_row]
+        affected = np.flatnonzero(existing > self.scores[:, -1]) if self.k > 0 else []
+        
+        # Stacking copies the table, which might be (read-only) memory-mapped
+        self.ids    = np.vstack([self.ids, new_ids])
+        self.scores = np.vstack([self.scores, new_scores])
+
+        for row in affected:
+            # Rows are sorted by descending score, so the position is found
+            # by searching through negated scores
+            pos = np.searchsorted(-self.scores[row], -existing[row], side="right")
+
+            self.ids[row, pos + 1:]    = self.ids[row, pos:-1].copy()
+            self.scores[row, pos + 1:] = self.scores[row, pos:-1].copy()
+            self.ids[row, pos]    = new_row
+            self.scores[row, pos] = existing[row]
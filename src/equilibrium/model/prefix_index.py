@@ -0,0 +1,151 @@
+import numpy as np # Math
+import time        # Latency budget
+
+
+# Sorts after every character, so [prefix, prefix + LAST_CHARACTER) holds
+# exactly the keys starting with the prefix
+LAST_CHARACTER = "\U0010FFFF"
+
+
+class PrefixIndex:
+    def __init__(self,
+                 keys:    list,
+                 values:  np.ndarray = None,
+                 weights: np.ndarray = None):
+        """
+        Creates an instance of PrefixIndex - sorted array of keys, in which
+        all the keys starting with a prefix form a contiguous range, found
+        by binary search.
+        Prefixes are expected to be typed one character at a time, so the
+        range of the previous prefix is kept and only searched within.
+
+        Parameters
+        ----------
+        keys : list
+            Keys (strings) to be looked up. They may repeat.
+        values : np.ndarray, optional
+            Value of every key (e.g. article it comes from). The default is
+            None, meaning the position of the key in `keys`.
+        weights : np.ndarray, optional
+            Weight of every key - heavier keys are returned first.
+            The default is None, meaning equal weights.
+        """
+
+        keys  = np.asarray(keys, dtype=str)
+        order = np.argsort(keys, kind="stable")
+
+        self.keys    = keys[order]
+        self.values  = (np.arange(keys.shape[0]) if values is None else np.asarray(values))[order]
+        self.weights = (np.zeros(keys.shape[0]) if weights is None
+                        else np.asarray(weights, dtype=np.float64))[order]
+
+        # Positions of the keys, the heaviest first. Short prefixes match
+        # too many keys to sort them all - these are scanned instead.
+        self.by_weight = np.argsort(-self.weights, kind="stable")
+
+        # Ranges of the prefixes typed so far - (prefix, start, end),
+        # each prefix extending the one below it
+        self.history = [("", 0, self.keys.shape[0])]
+
+        # Number of keys in the range, above which the heaviest keys get scanned
+        self.SCAN_THRESHOLD = 4096
+
+
+    def __len__(self) -> int:
+        return self.keys.shape[0]
+
+
+    def range(self, prefix: str) -> tuple:
+        """
+        Returns
+        -------
+        tuple
+            (start, end) - positions of the keys starting with the prefix.
+            If the prefix extends one looked up before, only its range
+            gets searched.
+        """
+
+        while not prefix.startswith(self.history[-1][0]):
+            self.history.pop()
+
+        last_prefix, start, end = self.history[-1]
+        if last_prefix == prefix:
+            return start, end
+
+        window = self.keys[start:end]
+        start, end = (start + int(np.searchsorted(window, prefix, side="left")),
+                      start + int(np.searchsorted(window, prefix + LAST_CHARACTER, side="left")))
+
+        self.history.append((prefix, start, end))
+
+        return start, end
+
+
+    def top(self, prefix: str, limit: int, deadline: float = None) -> np.ndarray:
+        """
+        Finds the heaviest keys starting with the prefix.
+
+        Parameters
+        ----------
+        prefix : str
+            Prefix of the keys.
+        limit : int
+            Maximal number of keys to find.
+        deadline : float, optional
+            Moment (`time.perf_counter()`) by which the search has to end,
+            returning the keys found until then. The default is None.
+
+        Returns
+        -------
+        np.ndarray
+            Positions of the keys, the heaviest first.
+        """
+
+        start, end = self.range(prefix)
+
+        if end - start <= self.SCAN_THRESHOLD:
+            positions = np.arange(start, end)
+            if positions.shape[0] > limit:
+                positions = positions[np.argpartition(-self.weights[start:end], limit - 1)[:limit]]
+
+            return positions[np.lexsort((positions, -self.weights[positions]))]
+
+        # Most of the keys match, so the heaviest matching ones come up early
+        found = []
+        for chunk_start in range(0, self.by_weight.shape[0], self.SCAN_THRESHOLD):
+            chunk = self.by_weight[chunk_start:chunk_start + self.SCAN_THRESHOLD]
+            found.extend(chunk[(chunk >= start) & (chunk < end)][:limit - len(found)])
+
+            if len(found) >= limit or (deadline is not None and time.perf_counter() > deadline):
+                break
+
+        return np.array(found, dtype=np.int64)
+
+
+    def complete(self, prefix: str, limit: int, deadline: float = None) -> list:
+        """
+        Returns
+        -------
+        list
+            Up to `limit` distinct keys starting with the prefix,
+            the heaviest first.
+        """
+
+        keys = self.keys[self.top(prefix, limit, deadline)].tolist()
+
+        return list(dict.fromkeys(keys))
+
+
+    def lookup(self, prefix: str, limit: int, deadline: float = None) -> list:
+        """
+        Returns
+        -------
+        list
+            Up to `limit` distinct values of the keys starting with the prefix,
+            the heaviest first.
+        """
+
+        # Values can repeat (e.g. article with several matching words)
+        values = self.values[self.top(prefix, 4 * limit, deadline)].tolist()
+
+        return list(dict.fromkeys(values))[:limit]
@@ -0,0 +1,201 @@
+import numpy as np # Math
+
+import threading # Training in the background
+import time      # Coalescing bursts of changes
+
+from article.articles import Articles # Articles wrapper
+from model.model import Model         # Model being refitted
+
+
+class RefitScheduler:
+    def __init__(self,
+                 model:    Model,
+                 articles: Articles,
+                 delay:    float = 2.0):
+        """
+        Creates an instance of RefitScheduler.
+        Refits are run on a worker thread, from a snapshot of the articles.
+        Current model keeps serving searches and recommendations until the
+        new one is trained, when it gets swapped in.
+        Compactions (removing deleted articles from the model for good) are
+        run the same way, from a snapshot of the model.
+
+        Parameters
+        ----------
+        model : Model
+            Model currently in use.
+        articles : Articles
+            Articles wrapper used by the program.
+        delay : float, optional
+            Number of seconds to wait after a refit is requested,
+            so that a burst of changes results in a single refit.
+            The default is 2.0.
+        """
+
+        self.model    = model    # Always the model to be used
+        self.articles = articles
+        self.delay    = delay
+
+        self.lock      = threading.Lock()  # Guards the model in use (and the wrapper, while changed)
+        self.requested = threading.Event() # Set while there is a pending refit (or compaction)
+        self.refit_requested = False       # Whether the pending job is a refit
+
+        self.refitting = False # Whether the worker is currently training
+        self.num_refits = 0    # Number of refits finished (useful for statistics)
+        self.num_compactions = 0
+
+        self.worker = threading.Thread(target=self.run, daemon=True)
+        self.worker.start()
+
+
+    def schedule(self):
+        """
+        Requests a refit. Requests made before the refit starts are
+        coalesced into one.
+        """
+
+        self.refit_requested = True
+        self.requested.set()
+
+
+    def schedule_compaction(self):
+        """
+        Requests a compaction. Refit compacts the model too, so the two 
+        are coalesced.
+        """
+
+        self.requested.set()
+
+
+    def catch_up(self):
+        """
+        Brings the current model up to date with the wrapper, incrementally -
+        articles it does not know of (added since the model was trained or
+        saved) are added into it, and those removed from the wrapper 
+        are removed from it.
+        If the model's vocabulary has drifted too far, full refit is scheduled.
+        """
+
+        with self.lock:
+            num_removed = self.reconcile(self.model)
+
+            if self.model.needs_refit():
+                self.schedule()
+            elif num_removed:
+                self.schedule_compaction()
+
+
+    def reconcile(self, model: Model) -> int:
+        """
+        Removes articles no longer in the wrapper from the model, and adds
+        those it does not know of. Has to be called with the lock held.
+
+        Returns
+        -------
+        int
+            Number of articles removed from the model.
+        """
+
+        article_ids = self.articles["id"]
+
+        removed_ids = np.setdiff1d(model.live_ids(), article_ids)
+        for article_id in removed_ids.tolist():
+            model.remove_article(article_id)
+
+        unknown = np.isin(article_ids, model.row_ids, invert=True)
+        for article in self.articles.get_many(article_ids[unknown]):
+            model.add_article(article)
+
+        return removed_ids.shape[0]
+
+
+    def save(self):
+        """
+        Saves the current model, so that articles added (or removed) 
+        incrementally are not lost once the program exits.
+        """
+
+        with self.lock:
+            self.model.save()
+
+
+    def remove_article(self, article_id: int):
+        """
+        Removes the article (already removed from the wrapper) from the
+        current model - it stops appearing in results at once, while the 
+        model gets compacted in the background.
+        """
+
+        with self.lock:
+            self.model.remove_article(article_id)
+
+        self.schedule_compaction()
+
+
+    def run(self):
+        """
+        Worker's loop - waits for refit requests and serves them one at a time.
+        """
+
+        while True:
+            self.requested.wait()
+            time.sleep(self.delay) # Let the burst of changes finish
+            self.requested.clear()
+
+            refit, self.refit_requested = self.refit_requested, False
+
+            self.refitting = True
+            try:
+                if refit:
+                    # Articles changed after this point will request another refit
+                    with self.lock:
+                        articles_snapshot = self.articles.snapshot()
+                    new_model = self.model.retrained(articles_snapshot)
+                    
+                else:
+                    with self.lock:
+                        if not self.model.needs_compaction():
+                            continue
+                        new_model = self.model.snapshot()
+                        
+                    new_model.compact()
+
+            except Exception as err:
+                # Keep serving from the current model
+                self.model.inform(f"[BACKGROUND REFIT ERROR]: {err}")
+
+            else:
+                self.swap(new_model)
+                
+                if refit:
+                    self.num_refits += 1
+                else:
+                    self.num_compactions += 1
+
+            finally:
+                self.refitting = False
+
+
+    def swap(self, new_model: Model):
+        """
+        Swaps the new model in, once it has caught up with the articles
+        added and removed while it was being trained, and saves it.
+        Models are only ever saved while the lock is held, so no two saves
+        run at once, and no model is saved before it has caught up.
+
+        Parameters
+        ----------
+        new_model : Model
+            Freshly trained model.
+        """
+
+        with self.lock:
+            self.reconcile(new_model)
+
+            self.model = new_model # Single reference assignment, so it is atomic
+
+            try:
+                new_model.save()
+            except Exception as err:
+                # Model in use is fine, it gets saved again on the next change
+                new_model.inform(f"[MODEL SAVING ERROR]: {err}")
@@ -0,0 +1,148 @@
+from collections import OrderedDict # Least recently used order
+import threading # Model is swapped in from the refit worker
+import time      # Expiration of entries
+
+
+class SearchCache:
+    def __init__(self,
+                 max_size: int = 1024,
+                 ttl:      float = 300.0):
+        """
+        Creates an instance of SearchCache - bounded LRU cache of search
+        results, whose entries also expire after `ttl` seconds.
+        Results are only valid for the model generation they have been
+        computed by - once the model changes, the whole cache is dropped.
+
+        Parameters
+        ----------
+        max_size : int, optional
+            Maximal number of cached searches. The least recently used
+            one is evicted first. The default is 1024.
+        ttl : float, optional
+            Number of seconds a result stays valid. The default is 300.0.
+        """
+
+        self.max_size = max_size
+        self.ttl      = ttl
+
+        self.entries    = OrderedDict() # key -> (time of caching, result)
+        self.generation = None          # Generation of the model the entries belong to
+
+        self.lock = threading.Lock()
+
+        # Statistics
+        self.hits          = 0
+        self.misses        = 0
+        self.invalidations = 0
+
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+    @staticmethod
+    def key(keywords: list, quantity: int) -> tuple:
+        """
+        Normalises the search, so that the same keywords typed differently
+        (case, surrounding whitespace, empty keywords) share an entry.
+        Order of keywords is kept, since it determines the bigrams.
+
+        Returns
+        -------
+        tuple
+            Key of the search.
+        """
+
+        normalised = (' '.join(str(keyword).lower().split()) for keyword in keywords)
+
+        return (tuple(keyword for keyword in normalised if keyword), quantity)
+
+
+    def get(self, key: tuple, generation: int):
+        """
+        Looks the search up.
+
+        Parameters
+        ----------
+        key : tuple
+            Key of the search, see `key`.
+        generation : int
+            Generation of the model asking.
+
+        Returns
+        -------
+        Any
+            Cached result, or `None` if there is none (valid).
+        """
+
+        with self.lock:
+            self.validate(generation)
+
+            entry = self.entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] > self.ttl:
+                del self.entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+
+            return entry[1]
+
+
+    def put(self, key: tuple, generation: int, result):
+        """
+        Caches the result of the search, evicting the least recently
+        used one if the cache is full.
+        """
+
+        with self.lock:
+            self.validate(generation)
+
+            self.entries[key] = (time.monotonic(), result)
+            self.entries.move_to_end(key)
+
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+
+    def validate(self, generation: int):
+        """
+        Drops all the entries if they belong to another model generation.
+        """
+
+        if generation != self.generation:
+            if self.entries:
+                self.invalidations += 1
+
+            self.entries.clear()
+            self.generation = generation
+
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+    def statistics(self) -> dict:
+        """
+        Returns
+        -------
+        dict
+            Hit/miss counters and the current size of the cache.
+        """
+
+        return {"hits":          self.hits,
+                "misses":        self.misses,
+                "hit_rate":      self.hit_rate,
+                "invalidations": self.invalidations,
+                "size":          len(self)}
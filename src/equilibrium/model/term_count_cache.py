@@ -0,0 +1,155 @@
+import numpy as np # Math
+
+from collections import Counter # Uses of the texts
+from pathlib import Path
+import hashlib # Keys of the articles' texts
+import os
+
+
+class TermCountCache:
+    def __init__(self, path: str, signature: str):
+        """
+        Creates an instance of TermCountCache - term counts of every
+        article's text, keyed by a hash of the text.
+        Refitting only needs to tokenize articles that are new or edited,
+        the rest is re-weighted from their cached counts.
+
+        Counts of a text are kept as two parallel arrays - ids of its terms
+        (in the cache's table of terms) and their counts, rather than
+        a dictionary. All the terms of a text are kept - any of them might
+        make it into the vocabulary, once the articles change, and the
+        refit has to match a fit from scratch.
+
+        Parameters
+        ----------
+        path : str
+            Path to the (.npz) file of the cache. Loaded if it exists.
+        signature : str
+            Identifies the analyzer the counts come from. Cache made by
+            any other analyzer (n-grams, stop words, ...) is discarded.
+        """
+
+        self.path      = Path(path)
+        self.signature = signature
+
+        self.terms    = []  # id -> term
+        self.term_ids = {}  # term -> id
+        self.counts   = {}  # key -> (term ids, counts), both np.int32 arrays
+        self.used     = Counter() # Key -> number of documents of the current training with it
+        self.changed  = False
+
+        try:
+            with np.load(self.path, allow_pickle=False) as stored:
+                if str(stored["signature"]) == signature:
+                    self.terms    = stored["terms"].tobytes().decode("utf8").split("\n") if stored["terms"].size else []
+                    self.term_ids = {term: term_id for term_id, term in enumerate(self.terms)}
+
+                    pointers = stored["pointers"].tolist()
+                    term_ids = stored["term_ids"]
+                    counts   = stored["counts"]
+                    for key, start, end in zip(stored["keys"].tolist(), pointers[:-1], pointers[1:]):
+                        self.counts[key.decode("ascii")] = (term_ids[start:end], counts[start:end])
+
+        except (OSError, ValueError, KeyError):
+            pass # No usable cache - everything gets tokenized
+
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.sha1(text.encode("utf8")).hexdigest()
+
+
+    def get(self, key: str) -> tuple:
+        """
+        Returns
+        -------
+        tuple
+            (term ids, counts) of the text with given key, or `None`
+            if not cached.
+        """
+
+        counts = self.counts.get(key)
+        if counts is not None:
+            self.used[key] += 1
+
+        return counts
+
+
+    def put(self, key: str, counts: dict):
+        """
+        Keeps the term counts ({term: count}) of the text with given key.
+        """
+
+        term_ids = self.term_ids
+        for term in counts:
+            if term not in term_ids:
+                term_ids[term] = len(self.terms)
+                self.terms.append(term)
+
+        self.counts[key] = (np.fromiter((term_ids[term] for term in counts), dtype=np.int32, count=len(counts)),
+                            np.fromiter(counts.values(), dtype=np.int32, count=len(counts)))
+        self.used[key] += 1
+        self.changed = True
+
+
+    def save(self):
+        """
+        Saves the cache, keeping only the counts of the texts used since it
+        has been loaded (or last saved), so that counts of deleted and
+        edited articles do not pile up. Terms no longer found in any of
+        the texts are dropped from the table of terms.
+        """
+
+        used, self.used = self.used, Counter()
+
+        if not self.changed and len(used) == len(self.counts):
+            return
+
+        keys = sorted(used)
+
+        # Terms of the kept texts get new ids, in order
+        kept_terms = np.zeros(len(self.terms), dtype=bool)
+        for key in keys:
+            kept_terms[self.counts[key][0]] = True
+
+        kept_terms = np.flatnonzero(kept_terms)
+        new_ids    = np.full(len(self.terms), -1, dtype=np.int32)
+        new_ids[kept_terms] = np.arange(kept_terms.shape[0], dtype=np.int32)
+
+        pointers = np.zeros(len(keys) + 1, dtype=np.int64)
+        term_ids = []
+        counts   = []
+        for position, key in enumerate(keys):
+            document_term_ids, document_counts = self.counts[key]
+
+            term_ids.append(new_ids[document_term_ids])
+            counts.append(document_counts)
+            pointers[position + 1] = pointers[position] + document_counts.shape[0]
+
+        term_ids = np.concatenate(term_ids) if term_ids else np.empty(0, dtype=np.int32)
+        counts   = np.concatenate(counts) if counts else np.empty(0, dtype=np.int32)
+
+        self.terms    = [self.terms[term_id] for term_id in kept_terms.tolist()]
+        self.term_ids = {term: term_id for term_id, term in enumerate(self.terms)}
+        self.counts   = {key: (term_ids[start:end], counts[start:end])
+                         for key, start, end in zip(keys, pointers[:-1].tolist(), pointers[1:].tolist())}
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = self.path.with_name(self.path.name + ".tmp")
+
+        # Terms are packed into a single buffer (analyzed terms never hold a newline)
+        with open(temporary_path, "wb") as cache_file:
+            np.savez_compressed(cache_file,
+                                signature=np.array(self.signature),
+                                terms=np.frombuffer("\n".join(self.terms).encode("utf8"), dtype=np.uint8),
+                                keys=np.array(keys, dtype="S40"),
+                                pointers=pointers,
+                                term_ids=term_ids,
+                                counts=counts)
+
+        os.replace(temporary_path, self.path)
+        self.changed = False
@@ -0,0 +1,464 @@
+import numpy as np # Math
+
+from concurrent.futures import ProcessPoolExecutor # Tokenizing across cores
+import multiprocessing
+from collections import Counter # Counting terms
+from numbers import Integral
+import itertools
+import hashlib # Signature of the analyzer
+import json
+import os
+
+from sklearn.feature_extraction.text import TfidfVectorizer # Tokenization and parameters
+from sklearn.preprocessing import normalize                 # Normalization
+from scipy.sparse import csr_matrix, vstack # Sparse storage of TF-IDF rows
+
+from model.term_count_cache import TermCountCache # Counts of unchanged articles
+
+
+# Analyzer of the vectorizer being trained, set up once in every worker
+analyzer = None
+
+
+def setup_worker(vectorizer: TfidfVectorizer):
+    global analyzer
+    analyzer = vectorizer.build_analyzer()
+
+
+def count_chunk(texts: list) -> tuple:
+    """
+    First pass over a chunk of documents.
+
+    Returns
+    -------
+    tuple
+        (number of documents, document frequencies, term frequencies) 
+        of all terms in the chunk, as Counters.
+    """
+
+    document_frequencies = Counter()
+    term_frequencies     = Counter()
+
+    for text in texts:
+        counts = Counter(analyzer(text))
+
+        document_frequencies.update(counts.keys())
+        term_frequencies.update(counts)
+
+    return len(texts), document_frequencies, term_frequencies
+
+
+def count_texts(documents: list) -> list:
+    """
+    Returns
+    -------
+    list
+        (key, term counts (dict)) of every (key, text) document in the chunk.
+    """
+
+    return [(key, dict(Counter(analyzer(text)))) for key, text in documents]
+
+
+def vectorize_chunk(texts: list, vocabulary: dict) -> csr_matrix:
+    """
+    Second pass over a chunk of documents.
+
+    Returns
+    -------
+    csr_matrix
+        Counts of vocabulary terms (documents x features).
+    """
+
+    return counts_to_matrix((Counter(term for term in analyzer(text) if term in vocabulary)
+                             for text in texts),
+                            vocabulary)
+
+
+def cached_counts_to_matrix(documents_counts, features: np.ndarray, num_features: int) -> csr_matrix:
+    """
+    Parameters
+    ----------
+    documents_counts : iterable
+        (term ids, counts) arrays of every document, as cached.
+    features : np.ndarray
+        Feature index of every cached term id, -1 if it is not a feature.
+    num_features : int
+        Number of features (size of the vocabulary).
+
+    Returns
+    -------
+    csr_matrix
+        Counts of vocabulary terms of every document (documents x features).
+    """
+
+    indices  = []
+    data     = []
+    pointers = [0]
+
+    for term_ids, counts in documents_counts:
+        document_features = features[term_ids]
+        kept = document_features >= 0
+
+        indices.append(document_features[kept])
+        data.append(counts[kept])
+        pointers.append(pointers[-1] + int(np.count_nonzero(kept)))
+
+    matrix = csr_matrix((np.concatenate(data).astype(np.float64) if data else np.empty(0),
+                         np.concatenate(indices).astype(np.int32) if indices else np.empty(0, dtype=np.int32),
+                         np.array(pointers, dtype=np.int64)),
+                        shape=(len(pointers) - 1, num_features))
+    matrix.sort_indices()
+
+    return matrix
+
+
+def counts_to_matrix(documents_counts, vocabulary: dict) -> csr_matrix:
+    """
+    Returns
+    -------
+    csr_matrix
+        Counts of vocabulary terms of every document (documents x features).
+    """
+
+    indices  = []
+    data     = []
+    pointers = [0]
+
+    for counts in documents_counts:
+        terms = [term for term in counts if term in vocabulary]
+
+        indices.extend(vocabulary[term] for term in terms)
+        data.extend(counts[term] for term in terms)
+        pointers.append(len(indices))
+
+    matrix = csr_matrix((np.array(data, dtype=np.float64),
+                         np.array(indices, dtype=np.int32),
+                         np.array(pointers, dtype=np.int64)),
+                        shape=(len(pointers) - 1, len(vocabulary)))
+    matrix.sort_indices()
+
+    return matrix
+
+
+class ParallelTfidfBuilder:
+    def __init__(self,
+                 vectorizer:  TfidfVectorizer,
+                 num_workers: int = None,
+                 chunk_size:  int = 1000):
+        """
+        Creates an instance of ParallelTfidfBuilder - trains the vectorizer
+        the way `TfidfVectorizer.fit_transform` does, but streams the documents
+        in chunks and tokenizes them across a pool of processes.
+
+        The first pass only counts document and term frequencies of every
+        chunk, which get merged and pruned into the vocabulary. The second
+        pass vectorizes the chunks against it. Neither pass holds more than
+        a few chunks of text at once.
+
+        Parameters
+        ----------
+        vectorizer : TfidfVectorizer
+            Vectorizer to be trained. Its parameters (analyzer, n-grams,
+            stop words, `min_df`, `max_df`, `max_features`, IDF smoothing)
+            are respected.
+        num_workers : int, optional
+            Number of worker processes. The default is None, meaning
+            the number of CPUs.
+        chunk_size : int, optional
+            Number of documents sent to a worker at once. The default is 1000.
+        """
+
+        self.vectorizer  = vectorizer
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.chunk_size  = chunk_size
+
+        # Counts of vocabulary terms (documents x features), before weighting
+        self.term_frequencies = None
+
+
+    def chunks(self, documents) -> list:
+        """
+        Splits the documents into chunks, lazily.
+        """
+
+        documents = iter(documents)
+        while True:
+            chunk = list(itertools.islice(documents, self.chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+
+    def map(self, executor, function, documents, *args):
+        """
+        Maps the function over chunks of documents, keeping at most
+        a couple of chunks per worker in flight. Results keep the order.
+        """
+
+        if executor is None:
+            yield from (function(chunk, *args) for chunk in self.chunks(documents))
+            return
+
+        in_flight = []
+        for chunk in self.chunks(documents):
+            in_flight.append(executor.submit(function, chunk, *args))
+
+            if len(in_flight) >= 2 * self.num_workers:
+                yield in_flight.pop(0).result()
+
+        for future in in_flight:
+            yield future.result()
+
+
+    def signature(self) -> str:
+        """
+        Returns
+        -------
+        str
+            Hash of all the vectorizer's parameters affecting the terms
+            a text is analyzed into.
+        """
+
+        parameters = self.vectorizer.get_params()
+        stop_words = parameters["stop_words"]
+
+        analysis = {"analyzer":      str(parameters["analyzer"]),
+                    "ngram_range":   list(parameters["ngram_range"]),
+                    "lowercase":     parameters["lowercase"],
+                    "strip_accents": str(parameters["strip_accents"]),
+                    "token_pattern": parameters["token_pattern"],
+                    "stop_words":    (sorted(stop_words) if isinstance(stop_words, (list, set, frozenset)) 
+                                      else str(stop_words))}
+
+        return hashlib.sha1(json.dumps(analysis, sort_keys=True).encode("utf8")).hexdigest()
+
+
+    def executor(self) -> ProcessPoolExecutor:
+        """
+        Returns
+        -------
+        ProcessPoolExecutor
+            Pool of workers ready to analyze texts, or `None` if texts
+            are to be analyzed in this process.
+        """
+
+        # Workers are spawned (not forked), since training runs on a thread
+        if self.num_workers > 1:
+            return ProcessPoolExecutor(max_workers=self.num_workers,
+                                       mp_context=multiprocessing.get_context("spawn"),
+                                       initializer=setup_worker,
+                                       initargs=(self.vectorizer,))
+
+        setup_worker(self.vectorizer)
+        return None
+
+
+    def fit_transform(self, documents, cache: TermCountCache = None) -> csr_matrix:
+        """
+        Trains the vectorizer and vectorizes the documents.
+
+        Parameters
+        ----------
+        documents : callable
+            Returns a new iterable over the documents (strings) every time
+            it is called, since the documents are read twice.
+        cache : TermCountCache, optional
+            Cache of term counts. If given, only documents missing from it
+            get analyzed (once), and all of them are vectorized from their
+            counts. The default is None.
+
+        Returns
+        -------
+        csr_matrix
+            TF-IDF matrix (documents x features).
+        """
+
+        if cache is not None:
+            return self.fit_transform_cached(documents, cache)
+
+        executor = self.executor()
+
+        try:
+            # First pass - document and term frequencies of the whole corpus
+            num_documents        = 0
+            document_frequencies = Counter()
+            term_frequencies     = Counter()
+
+            for chunk_num_documents, chunk_document_frequencies, chunk_term_frequencies in \
+                    self.map(executor, count_chunk, documents()):
+                num_documents += chunk_num_documents
+                document_frequencies.update(chunk_document_frequencies)
+                term_frequencies.update(chunk_term_frequencies)
+
+            vocabulary = self.prune(document_frequencies, term_frequencies, num_documents)
+            del term_frequencies
+
+            # Second pass - counts of vocabulary terms
+            counts = vstack(list(self.map(executor, vectorize_chunk, documents(), vocabulary)) or
+                            [csr_matrix((0, len(vocabulary)))],
+                            format="csr")
+
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        return self.finish(counts, vocabulary, document_frequencies, num_documents)
+
+
+    def fit_transform_cached(self, documents, cache: TermCountCache) -> csr_matrix:
+        """
+        Trains the vectorizer and vectorizes the documents, using cached
+        term counts. See `fit_transform`.
+        """
+
+        keys = [] # Of all the documents, in order
+
+        def missing():
+            # Documents not cached yet, streamed to the workers as they are read
+            for text in documents():
+                key = cache.key(text)
+                keys.append(key)
+
+                if cache.get(key) is None:
+                    yield key, text
+
+        # Only new and edited documents are analyzed
+        missing_documents = missing()
+        first_missing     = next(missing_documents, None)
+        if first_missing is not None:
+            executor = self.executor()
+            try:
+                for chunk_counts in self.map(executor, count_texts,
+                                             itertools.chain([first_missing], missing_documents)):
+                    for key, counts in chunk_counts:
+                        cache.put(key, counts)
+            finally:
+                if executor is not None:
+                    executor.shutdown()
+
+        # Frequencies of the cached terms, summed up document by document
+        document_frequency = np.zeros(len(cache.terms), dtype=np.int64)
+        term_frequency     = np.zeros(len(cache.terms), dtype=np.int64)
+        for key in keys:
+            term_ids, counts = cache.counts[key]
+            document_frequency[term_ids] += 1
+            term_frequency[term_ids]     += counts
+
+        present = np.flatnonzero(document_frequency).tolist()
+        document_frequencies = Counter({cache.terms[term_id]: int(document_frequency[term_id]) for term_id in present})
+        term_frequencies     = Counter({cache.terms[term_id]: int(term_frequency[term_id]) for term_id in present})
+
+        vocabulary = self.prune(document_frequencies, term_frequencies, len(keys))
+        del term_frequencies
+
+        features = np.full(len(cache.terms), -1, dtype=np.int64) # Feature of every cached term
+        for term, index in vocabulary.items():
+            features[cache.term_ids[term]] = index
+
+        counts = cached_counts_to_matrix((cache.counts[key] for key in keys), features, len(vocabulary))
+
+        return self.finish(counts, vocabulary, document_frequencies, len(keys))
+
+
+    def finish(self,
+               counts:               csr_matrix,
+               vocabulary:           dict,
+               document_frequencies: Counter,
+               num_documents:        int) -> csr_matrix:
+        """
+        Sets the fitted vocabulary and IDF weights onto the vectorizer,
+        keeping the (unweighted) counts as `term_frequencies`.
+
+        Returns
+        -------
+        csr_matrix
+            TF-IDF matrix, made of weighted counts.
+        """
+
+        document_frequency = np.zeros(len(vocabulary), dtype=np.float64)
+        for term, index in vocabulary.items():
+            document_frequency[index] = document_frequencies[term]
+
+        idf = self.idf(document_frequency, num_documents)
+
+        self.vectorizer.vocabulary_ = vocabulary
+        self.vectorizer.idf_        = idf
+
+        self.term_frequencies = counts.astype(np.float32) # Copy, counts get weighted in place
+
+        return self.weight(counts, idf)
+
+
+    def prune(self,
+              document_frequencies: Counter,
+              term_frequencies:     Counter,
+              num_documents:        int) -> dict:
+        """
+        Prunes the terms by `min_df`, `max_df` and `max_features` of the
+        vectorizer, the way `TfidfVectorizer` does.
+
+        Returns
+        -------
+        dict
+            Vocabulary - term -> feature index, with features sorted
+            alphabetically.
+        """
+
+        max_df, min_df = self.vectorizer.max_df, self.vectorizer.min_df
+
+        max_document_count = max_df if isinstance(max_df, Integral) else max_df * num_documents
+        min_document_count = min_df if isinstance(min_df, Integral) else min_df * num_documents
+
+        if max_document_count < min_document_count:
+            raise ValueError("max_df corresponds to < documents than min_df")
+
+        terms = sorted(term for term, frequency in document_frequencies.items()
+                       if min_document_count <= frequency <= max_document_count)
+
+        max_features = self.vectorizer.max_features
+        if max_features is not None and len(terms) > max_features:
+            frequencies = np.array([term_frequencies[term] for term in terms])
+            # Same (unstable) sort as in `TfidfVectorizer`, so that ties 
+            # at the limit are resolved the same way
+            kept = np.sort((-frequencies).argsort()[:max_features])
+            terms = [terms[index] for index in kept]
+
+        if not terms:
+            raise ValueError("After pruning, no terms remain. "
+                             "Try a lower min_df or a higher max_df.")
+
+        return {term: index for index, term in enumerate(terms)}
+
+
+    def idf(self, document_frequency: np.ndarray, num_documents: int) -> np.ndarray:
+        """
+        Returns
+        -------
+        np.ndarray
+            Inverse document frequency of every feature, smoothed
+            like in `TfidfVectorizer`.
+        """
+
+        smoothing = int(self.vectorizer.smooth_idf)
+
+        return np.log((num_documents + smoothing) / (document_frequency + smoothing)) + 1
+
+
+    def weight(self, counts: csr_matrix, idf: np.ndarray) -> csr_matrix:
+        """
+        Returns
+        -------
+        csr_matrix
+            Counts weighted by IDF, L2-normalised (if the vectorizer normalises).
+        """
+
+        if self.vectorizer.sublinear_tf:
+            np.log(counts.data, out=counts.data)
+            counts.data += 1
+
+        counts.data *= idf[counts.indices]
+
+        if self.vectorizer.norm is not None:
+            counts = normalize(counts, norm=self.vectorizer.norm, copy=False)
+
+        return counts
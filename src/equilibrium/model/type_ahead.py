@@ -0,0 +1,168 @@
+import numpy as np # Math
+import threading   # Debouncing
+import time        # Latency budget
+import re          # Words of the titles
+
+from article.articles import Articles # Articles wrapper
+from model.prefix_index import PrefixIndex # Completing prefixes
+
+
+class TypeAhead:
+    def __init__(self,
+                 refit_scheduler,
+                 articles:        Articles,
+                 quantity:        int = 5,
+                 num_suggestions: int = 5,
+                 debounce:        float = 0.15,
+                 budget:          float = 0.005):
+        """
+        Creates an instance of TypeAhead - suggestions and provisional
+        search results, updated while the keywords are being typed.
+
+        Suggestions complete the keyword being typed from the model's
+        vocabulary, and are found on every keystroke, within the latency
+        budget. Provisional results (articles whose titles match, then
+        the search by completed keywords) are only found once typing pauses
+        for `debounce` seconds.
+
+        Provisional results are searched for on a timer's thread, so the
+        model is only used with the scheduler's lock held - the same lock
+        adding and removing articles (of the model and the wrapper) is done
+        under. The model searched through is whichever one is current then.
+
+        Parameters
+        ----------
+        refit_scheduler : RefitScheduler
+            Scheduler owning the model searched through. Vocabulary of its
+            current model is suggested from.
+        articles : Articles
+            All articles available on platform, loaded into a wrapper.
+        quantity : int, optional
+            Number of provisional results. The default is 5.
+        num_suggestions : int, optional
+            Number of suggestions. The default is 5.
+        debounce : float, optional
+            Number of seconds typing has to pause for, before provisional
+            results are searched for. The default is 0.15.
+        budget : float, optional
+            Number of seconds a keystroke may take. The default is 0.005.
+        """
+
+        self.refit_scheduler = refit_scheduler
+        self.articles        = articles
+
+        model = refit_scheduler.model
+        self.model = model # Model the indices are built from
+
+        self.quantity        = quantity
+        self.num_suggestions = num_suggestions
+        self.debounce        = debounce
+        self.budget          = budget
+
+        # Data the indices are built from - they are rebuilt once it changes
+        self.generation   = model.generation
+        self.num_articles = len(articles)
+
+        # Terms of the vocabulary, the more articles contain them, the heavier
+        self.vocabulary = PrefixIndex(model.features.tolist(),
+                                      weights=np.diff(model.inverted_index.pointers))
+
+        # Every word of every title, the more viewed its article, the heavier
+        titles_words = [re.findall(r"\w+", title.lower()) for title in articles["title"]]
+        num_words    = np.array([len(title_words) for title_words in titles_words], dtype=np.int64)
+
+        self.titles = PrefixIndex([word for title_words in titles_words for word in title_words],
+                                  values=np.repeat(articles["id"], num_words),
+                                  weights=np.repeat(articles["views"], num_words))
+
+        self.suggestions = [] # Completions of the keyword being typed
+        self.results     = [] # Provisional results (articles)
+        self.latency     = 0.0 # Seconds the last keystroke took
+
+        self.timer = None
+        self.lock  = threading.Lock() # Provisional results are searched for on timer's thread
+
+        # Called (on timer's thread) whenever provisional results change
+        self.on_update = None
+
+
+    def update(self, text: str):
+        """
+        Updates suggestions for the text typed so far, and schedules
+        provisional results to be searched for once typing pauses.
+
+        Parameters
+        ----------
+        text : str
+            Comma-separated keywords typed so far. The last one is
+            the keyword being typed.
+        """
+
+        start = time.perf_counter()
+
+        keywords = [keyword.strip().lower() for keyword in text.split(",")]
+        prefix   = keywords[-1]
+
+        self.suggestions = (self.vocabulary.complete(prefix, self.num_suggestions,
+                                                     deadline=start + self.budget)
+                            if prefix else [])
+
+        self.latency = time.perf_counter() - start
+
+        self.cancel()
+        self.timer = threading.Timer(self.debounce, self.refresh,
+                                     args=(keywords[:-1], prefix, list(self.suggestions)))
+        self.timer.daemon = True
+        self.timer.start()
+
+
+    def refresh(self, completed: list, prefix: str, suggestions: list):
+        """
+        Searches for provisional results - articles whose titles contain
+        a word starting with the (last word of the) keyword being typed,
+        followed by the search by completed keywords and the best
+        suggestion (or the keyword itself).
+        """
+
+        with self.lock:
+            ids = []
+            if prefix:
+                ids = self.titles.lookup(prefix.split()[-1], self.quantity)
+
+            keywords = [keyword for keyword in completed + [suggestions[0] if suggestions else prefix]
+                        if keyword]
+
+            # Model (and the wrapper) must not change while being searched through
+            with self.refit_scheduler.lock:
+                if keywords:
+                    ids += [article.id for article in self.refit_scheduler.model.search(articles=self.articles,
+                                                                                        keywords=keywords,
+                                                                                        quantity=self.quantity)]
+
+                # Removed articles are not shown
+                self.results = self.articles.get_many(dict.fromkeys(ids))[:self.quantity]
+
+        if self.on_update is not None:
+            self.on_update()
+
+
+    def cancel(self):
+        """
+        Cancels provisional results not searched for yet.
+        """
+
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+
+    def is_current(self, model, articles: Articles) -> bool:
+        """
+        Returns
+        -------
+        bool
+            Whether the indices are built from the current data.
+        """
+
+        return (model is self.model and model.generation == self.generation and
+                articles is self.articles and len(articles) == self.num_articles)
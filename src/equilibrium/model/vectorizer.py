@@ -0,0 +1,165 @@
+import numpy as np # Math
+
+from scipy.sparse import csr_matrix # Sparse storage of TF-IDF rows
+import re # Tokenization
+
+
+def normalize_rows(matrix: csr_matrix) -> csr_matrix:
+    """
+    L2-normalises the rows of the sparse matrix, in place.
+    Rows of zeros are left as they are.
+
+    Returns
+    -------
+    csr_matrix
+        The same matrix.
+    """
+
+    lengths = np.diff(matrix.indptr)
+    norms = np.sqrt(np.bincount(np.repeat(np.arange(matrix.shape[0]), lengths),
+                                weights=matrix.data ** 2,
+                                minlength=matrix.shape[0]))
+    norms[norms == 0] = 1
+
+    matrix.data /= np.repeat(norms, lengths)
+
+    return matrix
+
+
+class FrozenVectorizer:
+    def __init__(self,
+                 vocabulary: dict,
+                 idf:        np.ndarray,
+                 params:     dict):
+        """
+        Creates an instance of FrozenVectorizer - the transforming half of
+        a fitted `TfidfVectorizer`, restored from its vocabulary, IDF weights
+        and parameters. Texts are analyzed exactly the way the fitted one
+        analyzes them (word n-grams), but without importing scikit-learn,
+        which is only needed for training.
+
+        Parameters
+        ----------
+        vocabulary : dict
+            Term -> feature index.
+        idf : np.ndarray
+            IDF weight of every feature.
+        params : dict
+            Parameters of the fitted vectorizer (`get_params()`), at least
+            those affecting the analysis and weighting.
+        """
+
+        self.vocabulary_ = vocabulary
+        self.idf_        = idf
+        self.params      = params
+
+        self.ngram_range = tuple(params["ngram_range"])
+        self.stop_words  = params["stop_words"]
+
+        self.stop_words_set = frozenset(self.stop_words or [])
+        self.token_pattern  = re.compile(params["token_pattern"])
+
+
+    @classmethod
+    def from_vectorizer(cls, vectorizer):
+        """
+        Returns
+        -------
+        FrozenVectorizer
+            Transforming half of the fitted `TfidfVectorizer`.
+        """
+
+        return cls(vectorizer.vocabulary_, vectorizer.idf_, vectorizer.get_params())
+
+
+    def get_params(self) -> dict:
+        return dict(self.params)
+
+
+    def analyze(self, text: str) -> list:
+        """
+        Returns
+        -------
+        list
+            Terms (word n-grams) of the text, in order of appearance.
+        """
+
+        if self.params["lowercase"]:
+            text = text.lower()
+
+        tokens = [token for token in self.token_pattern.findall(text)
+                  if token not in self.stop_words_set]
+
+        min_n, max_n = self.ngram_range
+
+        terms = list(tokens) if min_n == 1 else []
+        for n in range(max(min_n, 2), min(max_n, len(tokens)) + 1):
+            terms.extend(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+
+        return terms
+
+
+    def count(self, texts: list) -> csr_matrix:
+        """
+        Returns
+        -------
+        csr_matrix
+            Counts of vocabulary terms in the texts (texts x features).
+        """
+
+        indices  = []
+        data     = []
+        pointers = [0]
+
+        for text in texts:
+            counts = {}
+            for term in self.analyze(text):
+                feature = self.vocabulary_.get(term)
+                if feature is not None:
+                    counts[feature] = counts.get(feature, 0) + 1
+
+            indices.extend(counts.keys())
+            data.extend(counts.values())
+            pointers.append(len(indices))
+
+        matrix = csr_matrix((np.array(data, dtype=np.float64),
+                             np.array(indices, dtype=np.int32),
+                             np.array(pointers, dtype=np.int64)),
+                            shape=(len(texts), len(self.idf_)))
+        matrix.sort_indices()
+
+        return matrix
+
+
+    def transform(self, texts: list) -> csr_matrix:
+        """
+        Returns
+        -------
+        csr_matrix
+            TF-IDF vectors of the texts (texts x features).
+        """
+
+        return self.weight(self.count(texts))
+
+
+    def weight(self, matrix: csr_matrix) -> csr_matrix:
+        """
+        Weights the counts (see `count`), in place.
+
+        Returns
+        -------
+        csr_matrix
+            TF-IDF vectors of the counts.
+        """
+
+        if self.params["sublinear_tf"]:
+            np.log(matrix.data, out=matrix.data)
+            matrix.data += 1
+
+        if self.params["use_idf"]:
+            matrix.data *= self.idf_[matrix.indices]
+
+        if self.params["norm"] == "l2":
+            normalize_rows(matrix)
+
+        return matrix
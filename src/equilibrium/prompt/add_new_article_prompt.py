@@ -351,6 +351,7 @@ class AddNewArticlePrompt(Prompt):
         self.buffer["Tags"] = "".join(self.buffer["Tags"])
         new_entered_values["tags"] = self.buffer["Tags"].split("_")[0].split(",")
         new_entered_values["tags"] = [tag.strip().lower() for tag in new_entered_values["tags"]]
+        new_entered_values["tags"] = [tag for tag in new_entered_values["tags"] if tag] # Left empty - tagged automatically
             
         new_entered_values["content"] = "\n".join(["".join(row) for row in self.buffer["Content"]])
         new_entered_values["content"] = new_entered_values["content"].replace("_", " ")
@@ -11,7 +11,7 @@ load_dotenv()
 PERMITTED_CHARS = os.getenv("PERMITTED_CHARS") 
 
 class SearchPrompt(Prompt):
-    def __init__(self, prompt_name: str):
+    def __init__(self, prompt_name: str, type_ahead=None):
         """
         Initialize a new instance of class SearchPrompt.
         
@@ -19,8 +19,13 @@ class SearchPrompt(Prompt):
         ----------
         - prompt_name : str
             Name of the SearchPrompt to be created. 
+        - type_ahead : TypeAhead, optional
+            If given, suggestions and provisional results are shown
+            while the keywords are being typed.
         """
         super().__init__(prompt_name)
+        
+        self.type_ahead = type_ahead
 
         self.radio_selection = 0 # Current radio button selection
         self.radio_selection_size = len(self.data["OPTIONS"])
@@ -81,6 +86,31 @@ class SearchPrompt(Prompt):
 
 
             print(line, end="") # Show the line
+            
+        if self.type_ahead is not None:
+            self.show_type_ahead()
+            
+            
+    def show_type_ahead(self):
+        """
+        Show suggestions and provisional results of the type-ahead.
+        """
+        print()
+        print(f"     Suggestions: {', '.join(self.type_ahead.suggestions)}")
+        print("     Top results:")
+        for article in self.type_ahead.results:
+            print(f"       - {article.title[:80]}")
+            
+            
+    def entered_text(self) -> str:
+        """
+        Returns
+        -------
+        str
+            Text entered into "Keywords" field.
+        """
+        # Other half are just empty ("_") characters, so they are not of use
+        return "".join(self.buffer["Keywords"]).split("_")[0]
 
 
     def parse_keypress(self, key: str):
@@ -106,9 +136,7 @@ class SearchPrompt(Prompt):
         if key == "enter":
             # Finalize entered values
             
-            # Other half are just empty ("_") characters, so they are not of use
-            self.keywords = "".join(self.buffer["Keywords"]).split("_")[0]
-            self.keywords = self.keywords.split(",")
+            self.keywords = self.entered_text().split(",")
             self.keywords = [keyword.strip().lower() for keyword in self.keywords]
             
             response = "search keywords" # Response to the main loop updated 
@@ -129,6 +157,12 @@ class SearchPrompt(Prompt):
         elif key == "escape" or key == "esc":
             response = "load user profile"
             
+        if self.type_ahead is not None:
+            if response == -1:
+                self.type_ahead.update(self.entered_text()) # Keywords might have changed
+            else:
+                self.type_ahead.cancel() # Search is over
+            
         # If selection has changed, then set another label as focused
         self.label = self.data["OPTIONS"][self.radio_selection]
         
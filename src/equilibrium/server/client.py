@@ -0,0 +1,247 @@
+import socket
+import itertools
+
+from article.article import Article # Articles received
+from user.user import User          # Users received
+from server.protocol import (ServerError, default_address, encode, decode,
+                             article_from_dict, user_from_dict)
+
+
+class ModelClient:
+    def __init__(self, address=None):
+        """
+        Creates an instance of ModelClient - blocking connection to the model
+        server, which the console loop calls into.
+
+        Parameters
+        ----------
+        address : str | tuple, optional
+            Path of the server's Unix socket, or its (host, port).
+            The default is None, meaning `default_address()`.
+        """
+
+        address = address or default_address()
+
+        if isinstance(address, tuple):
+            self.socket = socket.create_connection(address)
+        else:
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.socket.connect(address)
+
+        self.file = self.socket.makefile("rb")
+        self.ids  = itertools.count()
+
+
+    def close(self):
+        self.file.close()
+        self.socket.close()
+
+
+    def call(self, method: str, **params):
+        """
+        Sends a single request and waits for its result.
+
+        Raises
+        ------
+        ServerError
+            If the server has failed to serve the request.
+        """
+
+        return self.call_many([(method, params)])[0]
+
+
+    def call_many(self, calls: list) -> list:
+        """
+        Pipelines the requests - all of them are sent at once, before any
+        response is waited for, so they cost a single round trip.
+
+        Parameters
+        ----------
+        calls : list
+            List of (method, params) pairs.
+
+        Returns
+        -------
+        list
+            Results of the requests, in the same order.
+        """
+
+        ids = [next(self.ids) for _ in calls]
+        self.socket.sendall(b"".join(encode({"id": request_id, "method": method, "params": params})
+                                     for request_id, (method, params) in zip(ids, calls)))
+
+        # Responses may arrive in any order
+        responses = {}
+        while len(responses) < len(ids):
+            line = self.file.readline()
+            if not line:
+                raise ServerError("Connection to the model server has been closed.")
+
+            response = decode(line)
+            responses[response["id"]] = response
+
+        results = []
+        for request_id in ids:
+            if "error" in responses[request_id]:
+                raise ServerError(responses[request_id]["error"])
+            results.append(responses[request_id]["result"])
+
+        return results
+
+
+class RemoteModel:
+    def __init__(self, client: ModelClient):
+        """
+        Creates an instance of RemoteModel - stands in for the Model,
+        searching and recommending through the server.
+        """
+
+        self.client = client
+
+
+    def search(self,
+               articles,
+               keywords: list,
+               quantity: int = 5,
+               scorer:   str = None,
+               tags:     list = None) -> list:
+        found_articles = self.client.call("search", keywords=keywords, quantity=quantity,
+                                          scorer=scorer, tags=tags)
+
+        return [articles.cache(article_from_dict(article)) for article in found_articles]
+
+
+    def recommend(self, article_id: int, quantity: int = 10) -> list:
+        return self.client.call("recommend", article_id=article_id, quantity=quantity)
+
+
+class RemoteArticles:
+    def __init__(self, client: ModelClient):
+        """
+        Creates an instance of RemoteArticles - stands in for the Articles
+        wrapper, fetching articles from the server (once) and liking,
+        disliking and saving them through it. The server persists all the
+        changes itself.
+        """
+
+        self.client = client
+
+        self.fetched = {} # id -> Article, fetched so far
+
+
+    def __getitem__(self, article_id: int) -> Article:
+        if article_id not in self.fetched:
+            article = self.client.call("article", article_id=article_id)
+            if article is None:
+                return None
+
+            self.cache(article_from_dict(article))
+
+        return self.fetched[article_id]
+
+
+    def cache(self, article: Article) -> Article:
+        """
+        Keeps the fetched article, unless a copy of it is kept already.
+
+        Returns
+        -------
+        Article
+            Kept copy of the article.
+        """
+
+        return self.fetched.setdefault(article.id, article)
+
+
+    def get_many(self, article_ids: list) -> list:
+        """
+        Returns
+        -------
+        list
+            Articles with given ids (all of them, if `None`), fetched
+            in a single request.
+        """
+
+        missing = None if article_ids is None else [article_id for article_id in article_ids
+                                                    if article_id not in self.fetched]
+        if missing is None or missing:
+            for article in self.client.call("articles", article_ids=missing):
+                self.cache(article_from_dict(article))
+
+        if article_ids is None:
+            return list(self.fetched.values())
+
+        return [self.fetched[article_id] for article_id in article_ids if article_id in self.fetched]
+
+
+    @property
+    def articles(self) -> list:
+        return self.get_many(None)
+
+
+    def with_tags(self, tags: list) -> list:
+        return [self.cache(article_from_dict(article))
+                for article in self.client.call("articles", tags=tags)]
+
+
+    def interact(self, method: str, article_id: int, user: User) -> bool:
+        """
+        Likes, dislikes or saves the article through the server, then updates
+        the local copies of the user and the article. Server acts on behalf
+        of the user logged in on the connection, which is the given user.
+        """
+
+        result = self.client.call(method, article_id=article_id)
+
+        remote_user = user_from_dict(result["user"])
+        for field in ["articles_liked", "articles_disliked", "articles_saved"]:
+            setattr(user, field, getattr(remote_user, field))
+
+        if article_id in self.fetched:
+            self.fetched[article_id].likes    = result["likes"]
+            self.fetched[article_id].dislikes = result["dislikes"]
+
+        return result["changed"]
+
+
+    def like(self, article_id: int, user: User) -> bool:
+        return self.interact("like", article_id, user)
+
+
+    def dislike(self, article_id: int, user: User) -> bool:
+        return self.interact("dislike", article_id, user)
+
+
+    def save(self, article_id: int, user: User) -> bool:
+        return self.interact("save", article_id, user)
+
+
+    def read_ahead(self, article_ids: list):
+        pass # Fetched articles are whole
+
+
+    def write_metadata(self):
+        pass # Server writes down the changes
+
+
+class RemoteUsers:
+    def __init__(self, client: ModelClient):
+        """
+        Creates an instance of RemoteUsers - stands in for the Users
+        wrapper, logging in and signing up through the server.
+        """
+
+        self.client = client
+
+
+    def validate_login(self, username: str, password: str) -> User:
+        user = self.client.call("login", username=username, password=password)
+        return user_from_dict(user) if user is not None else None
+
+
+    def sign_up_user(self, user_data: dict, data_path: str = None) -> bool:
+        return self.client.call("sign_up", user_data=user_data)
+
+
+    def rewrite_csv(self):
+        pass # Server writes down the changes
@@ -0,0 +1,349 @@
+"""
+Local model server - holds a single loaded model, articles and users, and
+serves them to any number of console clients (`python main.py --client`),
+so that they all share one warm in-memory index.
+
+Run from `src/equilibrium`:
+    python -m server.model_server
+"""
+
+from concurrent.futures import ThreadPoolExecutor # Serving requests one at a time
+from collections import deque # Recent latencies
+import argparse
+import asyncio
+import time
+import os
+
+import numpy as np # Math
+
+from dotenv import load_dotenv
+
+from article.articles import Articles # Articles wrapper
+from user.users import Users           # Users wrapper
+from server.protocol import (PROJECT_ROOT, ServerError, default_address, encode, decode,
+                             article_to_dict, user_to_dict)
+
+
+class Session:
+    def __init__(self):
+        """
+        Creates an instance of Session - state of a single connection.
+        The user is bound to it by a successful login, and everything the
+        connection likes, dislikes or saves is done by that user.
+        """
+
+        self.user_id = None
+
+
+class ModelServer:
+    def __init__(self,
+                 articles:        Articles,
+                 users:           Users,
+                 refit_scheduler,
+                 path_users_data: str = None):
+        """
+        Creates an instance of ModelServer.
+
+        Requests are read from all the connections concurrently, and
+        a client may pipeline them. They are served one at a time,
+        on a single worker thread, since neither the model nor the wrappers
+        are meant to be used from several threads at once - the event loop
+        itself only moves the messages. Requests of a connection are started
+        in the order they have been sent, so a pipelined login is served
+        before the requests after it.
+
+        Parameters
+        ----------
+        articles : Articles
+            All articles available on platform, loaded into a wrapper.
+        users : Users
+            All users of the platform, loaded into a wrapper.
+        refit_scheduler : RefitScheduler
+            Scheduler owning the model being served.
+        path_users_data : str, optional
+            Path to users' .csv file, new users are written into.
+            The default is None.
+        """
+
+        self.articles        = articles
+        self.users           = users
+        self.refit_scheduler = refit_scheduler
+        self.path_users_data = path_users_data
+
+        self.handlers = {"search":    self.search,
+                         "recommend": self.recommend,
+                         "article":   self.article,
+                         "articles":  self.articles_of,
+                         "like":      self.like,
+                         "dislike":   self.dislike,
+                         "save":      self.save,
+                         "login":     self.login,
+                         "sign_up":   self.sign_up,
+                         "stats":     self.statistics}
+
+        # Handlers acting on behalf of the connection's user get its session
+        self.session_handlers = {"like", "dislike", "save", "login"}
+
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+        # Latencies (seconds) of the most recent requests, per endpoint
+        self.latencies = {method: deque(maxlen=1000) for method in self.handlers}
+        self.num_requests = {method: 0 for method in self.handlers}
+        self.num_errors   = {method: 0 for method in self.handlers}
+
+
+    @property
+    def model(self):
+        return self.refit_scheduler.model # Swapped after every refit
+
+
+    async def serve(self, address):
+        """
+        Serves until cancelled.
+
+        Parameters
+        ----------
+        address : str | tuple
+            Path of the Unix socket, or (host, port) to serve on.
+        """
+
+        if isinstance(address, tuple):
+            server = await asyncio.start_server(self.handle_connection, *address)
+        else:
+            if os.path.exists(address):
+                os.remove(address) # Left behind by a server that has not exited cleanly
+            server = await asyncio.start_unix_server(self.handle_connection, address)
+
+        async with server:
+            await server.serve_forever()
+
+
+    async def handle_connection(self,
+                                reader: asyncio.StreamReader,
+                                writer: asyncio.StreamWriter):
+        """
+        Reads requests of a single client, without waiting for the previous
+        ones to be served, and writes responses as they are ready.
+        """
+
+        write_lock = asyncio.Lock() # Responses must not interleave
+        session    = Session()
+        pending    = set()
+
+        try:
+            while line := await reader.readline():
+                task = asyncio.create_task(self.respond(decode(line), session, writer, write_lock))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+
+            if pending:
+                await asyncio.wait(pending)
+
+        except (ConnectionError, ValueError):
+            pass # Client has gone away, or has sent garbage
+
+        finally:
+            writer.close()
+
+
+    async def respond(self,
+                      request:    dict,
+                      session:    Session,
+                      writer:     asyncio.StreamWriter,
+                      write_lock: asyncio.Lock):
+        """
+        Serves a single request and writes its response.
+        """
+
+        method = request.get("method")
+        params = request.get("params") or {}
+        start  = time.perf_counter()
+
+        try:
+            if method not in self.handlers:
+                raise ServerError(f"Unknown method {method!r}.")
+
+            self.num_requests[method] += 1
+            if method in self.session_handlers:
+                params = {**params, "session": session}
+
+            result   = await asyncio.get_running_loop().run_in_executor(self.executor,
+                                                                        lambda: self.handlers[method](**params))
+            response = {"id": request.get("id"), "result": result}
+
+        except Exception as err:
+            if method in self.handlers:
+                self.num_errors[method] += 1
+            response = {"id": request.get("id"), "error": f"{type(err).__name__}: {err}"}
+
+        if method in self.handlers:
+            self.latencies[method].append(time.perf_counter() - start)
+
+        async with write_lock:
+            writer.write(encode(response))
+            await writer.drain()
+
+
+    def search(self,
+               keywords: list,
+               quantity: int = 5,
+               scorer:   str = None,
+               tags:     list = None) -> list:
+        found_articles = self.model.search(articles=self.articles, keywords=keywords,
+                                           quantity=quantity, scorer=scorer, tags=tags)
+
+        return [article_to_dict(article) for article in found_articles]
+
+
+    def recommend(self, article_id: int, quantity: int = 10) -> list:
+        return [int(article_id) for article_id in self.model.recommend(article_id=article_id,
+                                                                       quantity=quantity)]
+
+
+    def article(self, article_id: int) -> dict:
+        article = self.articles[article_id]
+        return article_to_dict(article) if article is not None else None
+
+
+    def articles_of(self, article_ids: list = None, tags: list = None) -> list:
+        """
+        Returns the articles with given ids (all of them, if not given),
+        or those tagged by all of the tags.
+        """
+
+        if tags:
+            found_articles = self.articles.with_tags(tags)
+        elif article_ids is None:
+            found_articles = self.articles.articles
+        else:
+            found_articles = self.articles.get_many(article_ids)
+
+        return [article_to_dict(article) for article in found_articles if article is not None]
+
+
+    def interact(self, interaction, article_id: int, session: Session) -> dict:
+        """
+        Likes, dislikes or saves the article, by the user logged in
+        on the connection.
+
+        Raises
+        ------
+        ServerError
+            If no user has logged in on the connection.
+
+        Returns
+        -------
+        dict
+            Whether anything has changed, the user's lists and the article's
+            new counts - so that the client can update its copies.
+        """
+
+        if session.user_id is None:
+            raise ServerError("Not logged in.")
+
+        user    = self.users[session.user_id]
+        changed = interaction(article_id=article_id, user=user)
+
+        if changed:
+            self.users.rewrite_csv()
+            self.articles.write_metadata()
+
+        article = self.articles[article_id]
+
+        return {"changed":  changed,
+                "user":     user_to_dict(user),
+                "likes":    article.likes,
+                "dislikes": article.dislikes}
+
+
+    def like(self, article_id: int, session: Session) -> dict:
+        return self.interact(self.articles.like, article_id, session)
+
+
+    def dislike(self, article_id: int, session: Session) -> dict:
+        return self.interact(self.articles.dislike, article_id, session)
+
+
+    def save(self, article_id: int, session: Session) -> dict:
+        return self.interact(self.articles.save, article_id, session)
+
+
+    def login(self, username: str, password: str, session: Session) -> dict:
+        user = self.users.validate_login(username, password)
+        session.user_id = user.id if user is not None else None # Failed login logs out
+
+        return user_to_dict(user) if user is not None else None
+
+
+    def sign_up(self, user_data: dict) -> bool:
+        return self.users.sign_up_user(user_data, data_path=self.path_users_data)
+
+
+    def statistics(self) -> dict:
+        """
+        Returns
+        -------
+        dict
+            Number of requests and errors, and latency percentiles
+            (milliseconds, over the most recent requests) of every endpoint.
+        """
+
+        statistics = {}
+        for method, latencies in self.latencies.items():
+            if not latencies:
+                continue # Not served yet, or still being served
+
+            milliseconds = np.array(latencies) * 1000
+            statistics[method] = {"requests": self.num_requests[method],
+                                  "errors":   self.num_errors[method],
+                                  "p50_ms":   float(np.percentile(milliseconds, 50)),
+                                  "p95_ms":   float(np.percentile(milliseconds, 95)),
+                                  "max_ms":   float(milliseconds.max())}
+
+        return statistics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--socket", help="Path of the Unix socket to serve on")
+    parser.add_argument("--port", type=int, help="Port to serve on (localhost), instead of a socket")
+    args = parser.parse_args()
+
+    load_dotenv()
+
+    from model.model import Model
+    from model.refit_scheduler import RefitScheduler
+
+    path_users_data = PROJECT_ROOT / os.getenv("PATH_USERS_DATA_CSV")
+
+    users = Users(path_users_data=path_users_data)
+    users.load()
+
+    articles = Articles(path_articles_content=PROJECT_ROOT / os.getenv("PATH_ARTICLES_CONTENT"),
+                        path_articles_metadata=PROJECT_ROOT / os.getenv("PATH_ARTICLES_METADATA"),
+                        lazy_content=True)
+    articles.load()
+
+    model = Model(path_model=PROJECT_ROOT / os.getenv("PATH_MODEL"))
+    if not model.trained:
+        model.refit(articles=articles)
+
+    refit_scheduler = RefitScheduler(model=model, articles=articles)
+    refit_scheduler.catch_up() # Saved model might be behind the articles added and removed
+
+    address = ("127.0.0.1", args.port) if args.port else (args.socket or default_address())
+    server  = ModelServer(articles, users, refit_scheduler, path_users_data=path_users_data)
+
+    print(f"[Model Server]: Serving on {address}.")
+    try:
+        asyncio.run(server.serve(address))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        refit_scheduler.save() # Keep articles added incrementally
+        print(f"[Model Server]: Stopped. {server.statistics()}")
+
+
+if __name__ == "__main__":
+    main()
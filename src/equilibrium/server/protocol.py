@@ -0,0 +1,86 @@
+"""
+Protocol spoken between the model server and its clients.
+
+Every message is a single line of JSON. Requests carry an id, which their
+response repeats, so a client can send many requests without waiting for
+responses (pipelining) and still match every response to its request:
+    request:  {"id": 7, "method": "search", "params": {"keywords": ["ai"]}}
+    response: {"id": 7, "result": [...]}  or  {"id": 7, "error": "..."}
+"""
+
+from pathlib import Path
+import socket
+import json
+import os
+
+from article.article import Article # Articles sent over
+from user.user import User          # Users sent over
+
+
+# Gets the current working directory. Every other path is concatenated to it.
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent.parent
+
+# Port served on, if Unix sockets are not available (Windows)
+DEFAULT_PORT = 8765
+
+ARTICLE_FIELDS = ["id", "author_id", "title", "tags", "content", "likes",
+                  "dislikes", "views", "reading_time", "formatted"]
+
+USER_LIST_FIELDS = ["articles_created", "articles_liked", "articles_disliked", "articles_saved"]
+
+
+class ServerError(RuntimeError):
+    """
+    Raised by the client, when the server has failed to serve a request.
+    """
+
+
+def default_address():
+    """
+    Returns
+    -------
+    str | tuple
+        Path of the Unix socket served on (set by `PATH_MODEL_SERVER_SOCKET`),
+        or (host, port) where Unix sockets are not available.
+    """
+
+    if hasattr(socket, "AF_UNIX"):
+        return str(PROJECT_ROOT / os.getenv("PATH_MODEL_SERVER_SOCKET", "data/model_server.sock"))
+
+    return ("127.0.0.1", DEFAULT_PORT)
+
+
+def encode(message: dict) -> bytes:
+    return (json.dumps(message) + "\n").encode("utf8")
+
+
+def decode(line: bytes) -> dict:
+    return json.loads(line.decode("utf8"))
+
+
+def article_to_dict(article: Article) -> dict:
+    return {field: getattr(article, field) for field in ARTICLE_FIELDS}
+
+
+def article_from_dict(data: dict) -> Article:
+    return Article(**data)
+
+
+def user_to_dict(user: User) -> dict:
+    # Password never leaves the server
+    data = {field: value for field, value in vars(user).items()
+            if field not in USER_LIST_FIELDS and field != "password"}
+    data.update({field: list(getattr(user, field)) for field in USER_LIST_FIELDS})
+
+    return data
+
+
+def user_from_dict(data: dict) -> User:
+    # Lists are set afterwards, User would parse them from their CSV form
+    user = User({key: (str(value) if key == "id" else value) for key, value in data.items()
+                 if key not in USER_LIST_FIELDS})
+
+    for field in USER_LIST_FIELDS:
+        setattr(user, field, list(data[field]))
+
+    return user
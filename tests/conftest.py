@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Modules of the program are imported the way the program imports them
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "equilibrium"))
@@ -0,0 +1,78 @@
+import json
+
+import numpy as np
+import pytest
+
+import model.artifact as artifact
+from model.artifact import save_artifact, load_artifact, ArtifactError, MANIFEST_NAME
+
+
+def versions(path) -> list:
+    return sorted(entry.name for entry in path.iterdir() if entry.name.startswith(artifact.VERSION_PREFIX))
+
+
+def test_save_then_load(tmp_path):
+    save_artifact(tmp_path, {"a": np.arange(5), "b": np.eye(2, dtype=np.float32)}, {"name": "test"})
+
+    arrays, metadata = load_artifact(tmp_path, verify=True)
+    assert arrays["a"].tolist() == [0, 1, 2, 3, 4]
+    assert arrays["b"].dtype == np.float32
+    assert metadata == {"name": "test"}
+
+
+def test_previous_version_is_removed(tmp_path):
+    save_artifact(tmp_path, {"a": np.arange(5)}, {"version": 1})
+    first = versions(tmp_path)
+
+    save_artifact(tmp_path, {"a": np.arange(3)}, {"version": 2})
+    second = versions(tmp_path)
+
+    assert len(first) == len(second) == 1
+    assert first != second
+    assert load_artifact(tmp_path)[0]["a"].tolist() == [0, 1, 2]
+
+
+def test_failed_save_keeps_previous_version(tmp_path, monkeypatch):
+    save_artifact(tmp_path, {"a": np.arange(5), "b": np.arange(2)}, {"version": 1})
+
+    def failing_checksum(path):
+        raise OSError("Disk full")
+
+    # Save crashes after the first array is written
+    monkeypatch.setattr(artifact, "checksum", failing_checksum)
+    with pytest.raises(OSError):
+        save_artifact(tmp_path, {"a": np.arange(3), "b": np.arange(7)}, {"version": 2})
+    monkeypatch.undo()
+
+    arrays, metadata = load_artifact(tmp_path, verify=True)
+    assert metadata == {"version": 1}
+    assert arrays["a"].tolist() == [0, 1, 2, 3, 4]
+    assert len(versions(tmp_path)) == 1
+
+
+def test_mismatched_array_is_refused(tmp_path):
+    save_artifact(tmp_path, {"a": np.arange(5)}, {})
+
+    manifest = json.loads((tmp_path / MANIFEST_NAME).read_text(encoding="utf8"))
+    manifest["arrays"]["a"]["shape"] = [6]
+    (tmp_path / MANIFEST_NAME).write_text(json.dumps(manifest), encoding="utf8")
+
+    with pytest.raises(ArtifactError):
+        load_artifact(tmp_path)
+
+
+def test_old_layout_is_loaded(tmp_path):
+    np.save(tmp_path / "a.npy", np.arange(4))
+    manifest = {"format_version": 1,
+                "arrays":         {"a": {"file": "a.npy", "dtype": np.arange(4).dtype.str,
+                                         "shape": [4], "sha256": artifact.checksum(tmp_path / "a.npy")}},
+                "metadata":       {"old": True}}
+    (tmp_path / MANIFEST_NAME).write_text(json.dumps(manifest), encoding="utf8")
+
+    arrays, metadata = load_artifact(tmp_path, verify=True)
+    assert arrays["a"].tolist() == [0, 1, 2, 3]
+
+    # Saving over it removes the old files
+    del arrays
+    save_artifact(tmp_path, {"a": np.arange(2)}, {})
+    assert not (tmp_path / "a.npy").exists()
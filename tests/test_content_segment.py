@@ -0,0 +1,185 @@
+import os
+
+import pytest
+
+from article.content_segment import ContentSegment
+
+
+@pytest.fixture
+def segment(tmp_path) -> ContentSegment:
+    segment = ContentSegment(tmp_path)
+    yield segment
+    segment.close()
+
+
+def test_write_then_read(segment):
+    segment.write(3, "Content of article 3.")
+    segment.write(7, "Sadržaj članka 7.") # Not ASCII
+
+    assert segment.read(3) == "Content of article 3."
+    assert segment.read(7) == "Sadržaj članka 7."
+    assert segment.read_many([7, 5, 3]) == ["Sadržaj članka 7.", None, "Content of article 3."]
+    assert segment.live_ids().tolist() == [3, 7]
+
+
+def test_replaced_content_is_read(segment, tmp_path):
+    segment.write(3, "First version.")
+    segment.write(3, "Second version.")
+
+    assert segment.read(3) == "Second version."
+    assert segment.dead_size() == len("First version.")
+
+    segment.close()
+    reopened = ContentSegment(tmp_path)
+    assert reopened.read(3) == "Second version."
+    reopened.close()
+
+
+def test_removed_content_is_not_read(segment, tmp_path):
+    segment.write(3, "Removed.")
+    segment.write(4, "Kept.")
+    segment.remove(3)
+
+    with pytest.raises(KeyError):
+        segment.read(3)
+    with pytest.raises(KeyError):
+        segment.remove(3)
+    assert 3 not in segment
+
+    segment.close()
+    reopened = ContentSegment(tmp_path)
+    with pytest.raises(KeyError):
+        reopened.read(3)
+    assert reopened.read(4) == "Kept."
+    reopened.close()
+
+
+def test_corrupted_content_is_detected(segment, tmp_path):
+    segment.write(3, "Content to be corrupted.")
+    segment.write(4, "Intact content.")
+    segment.close()
+
+    # Files are older than the last sync, so they are not read again
+    for path in tmp_path.glob("article_*.txt"):
+        os.utime(path, ns=(0, 0))
+
+    # Flips a byte inside the first record
+    path = tmp_path / "contents_0.seg"
+    data = bytearray(path.read_bytes())
+    data[2] ^= 0xFF
+    path.write_bytes(bytes(data))
+
+    reopened = ContentSegment(tmp_path)
+    with pytest.raises(ValueError):
+        reopened.read(3)
+    assert reopened.read(4) == "Intact content."
+    assert reopened.read_many([3, 4]) == [None, "Intact content."]
+    reopened.close()
+
+
+def test_compact_keeps_only_live_contents(segment, tmp_path):
+    segment.write(1, "one")
+    segment.write(2, "two")
+    segment.write(3, "three")
+    segment.remove(2)
+    segment.write(3, "three, replaced")
+
+    segment.compact()
+
+    assert segment.generation == 1
+    assert not (tmp_path / "contents_0.seg").exists()
+    assert not (tmp_path / "contents_0.idx").exists()
+
+    assert segment.live_ids().tolist() == [1, 3]
+    assert segment.dead_size() == 0
+    assert segment.segment_size == len("one") + len("three, replaced")
+    assert segment.read(1) == "one"
+    assert segment.read(3) == "three, replaced"
+    with pytest.raises(KeyError):
+        segment.read(2)
+
+    segment.close()
+    reopened = ContentSegment(tmp_path)
+    assert reopened.generation == 1
+    assert reopened.read_many([1, 2, 3]) == ["one", None, "three, replaced"]
+    reopened.close()
+
+
+def test_compacted_once_dead_contents_take_too_much(tmp_path):
+    segment = ContentSegment(tmp_path, compaction_threshold=0.5, min_compaction_size=10)
+    segment.write(1, "x" * 10)
+    segment.write(2, "y" * 10)
+
+    segment.remove(1) # Half of the segment is dead
+    assert segment.generation == 1
+    assert segment.dead_size() == 0
+    assert segment.read(2) == "y" * 10
+    segment.close()
+
+
+def test_reopened_after_interrupted_compaction(segment, tmp_path):
+    segment.write(1, "one")
+    segment.write(2, "two")
+    segment.close()
+
+    # Compaction got as far as writing the next segment and part of its index
+    (tmp_path / "contents_1.seg").write_bytes(b"partly written")
+    (tmp_path / "contents_1.idx.tmp").write_bytes(b"\x00" * 7)
+
+    reopened = ContentSegment(tmp_path)
+
+    assert reopened.generation == 0
+    assert reopened.read_many([1, 2]) == ["one", "two"]
+    assert sorted(path.name for path in tmp_path.glob("contents_*")) == ["contents_0.idx", "contents_0.seg"]
+    reopened.close()
+
+
+def test_built_from_content_files(tmp_path):
+    (tmp_path / "article_2.txt").write_text("two", encoding="utf8")
+    (tmp_path / "article_10.txt").write_text("ten", encoding="utf8")
+    (tmp_path / "notes.txt").write_text("not an article", encoding="utf8")
+
+    segment = ContentSegment(tmp_path)
+
+    assert segment.live_ids().tolist() == [2, 10]
+    assert segment.read(10) == "ten"
+    assert (tmp_path / "article_2.txt").exists() # Left where they are
+    segment.close()
+
+
+def test_content_files_are_kept_in_sync(segment, tmp_path):
+    segment.write(3, "Written.")
+    segment.write(4, "Removed.")
+    segment.remove(4)
+
+    assert (tmp_path / "article_3.txt").read_text(encoding="utf8") == "Written."
+    assert not (tmp_path / "article_4.txt").exists()
+
+    # Segment is only a cache - the contents survive its removal
+    segment.close()
+    for path in tmp_path.glob("contents_*"):
+        path.unlink()
+
+    rebuilt = ContentSegment(tmp_path)
+    assert rebuilt.live_ids().tolist() == [3]
+    assert rebuilt.read(3) == "Written."
+    rebuilt.close()
+
+
+def test_synced_with_content_files_changed_since(segment, tmp_path):
+    segment.write(1, "one")
+    segment.write(2, "two")
+    segment.write(3, "three")
+    segment.close()
+
+    # Files changed while the program was not running
+    stamp = (tmp_path / "contents.synced").stat().st_mtime_ns
+    (tmp_path / "article_2.txt").write_text("two, edited", encoding="utf8")
+    os.utime(tmp_path / "article_2.txt", ns=(stamp + 1, stamp + 1))
+    (tmp_path / "article_3.txt").unlink()
+    (tmp_path / "article_4.txt").write_text("four", encoding="utf8")
+
+    reopened = ContentSegment(tmp_path)
+    assert reopened.live_ids().tolist() == [1, 2, 4]
+    assert reopened.read_many([1, 2, 3, 4]) == ["one", "two, edited", None, "four"]
+    reopened.close()
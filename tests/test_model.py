@@ -0,0 +1,202 @@
+import threading
+
+import pytest
+
+pytest.importorskip("sklearn")
+
+from article.article import Article
+from article.articles import Articles
+from model.model import Model
+from model.refit_scheduler import RefitScheduler
+
+
+TOPICS = {"bitcoin":  "bitcoin blockchain wallet mining exchange ledger token",
+          "learning": "neural network training model gradient dataset layer",
+          "cloud":    "cloud server container cluster deployment storage scaling",
+          "design":   "design interface user layout colour typography prototype"}
+
+# Ids are not rows - some are skipped, as if the articles had been removed
+ARTICLE_IDS = [0, 2, 3, 5, 8, 9, 11, 14, 15, 17, 20, 21]
+
+
+def make_articles() -> Articles:
+    articles = Articles()
+
+    for position, article_id in enumerate(ARTICLE_IDS):
+        topic, words = list(TOPICS.items())[position % len(TOPICS)]
+        words = words.split()
+        content = " ".join(words[(position + shift) % len(words)] for shift in range(40))
+
+        articles.append(Article(id=article_id, title=f"{topic} {position}", content=content))
+
+    return articles
+
+
+def remove_from_wrapper(articles: Articles, article_id: int):
+    """
+    Removes the article from the wrapper only (no files involved).
+    """
+
+    removed_article = articles.by_id.pop(article_id)
+    articles.articles.remove(removed_article)
+    articles.row_cache = None
+
+
+@pytest.fixture
+def articles() -> Articles:
+    return make_articles()
+
+
+@pytest.fixture
+def model(articles, tmp_path) -> Model:
+    nltk_corpus = pytest.importorskip("nltk.corpus")
+    try:
+        nltk_corpus.stopwords.words("english")
+    except LookupError:
+        pytest.skip("NLTK stopwords are not installed")
+
+    model = Model(path_model=tmp_path / "model")
+    model.NUM_NEIGHBOURS = 5
+    model.refit(articles=articles)
+
+    return model
+
+
+def test_rows_map_to_ids(model):
+    for row, article_id in enumerate(ARTICLE_IDS):
+        assert model.row(article_id) == row
+        assert model.row_ids[row] == article_id
+
+    for missing_id in [1, 4, 19, 22, 1000]:
+        with pytest.raises(KeyError):
+            model.row(missing_id)
+
+
+def test_recommend_returns_ids(model):
+    recommended = model.recommend(article_id=20, quantity=3)
+
+    assert set(recommended.tolist()) <= set(ARTICLE_IDS) - {20}
+    # Articles of the same topic come first
+    assert set(recommended.tolist()[:2]) == {3, 11}
+
+
+def test_removed_article_is_skipped(model):
+    model.remove_article(3)
+
+    with pytest.raises(KeyError):
+        model.row(3)
+
+    assert 3 not in model.live_ids()
+    assert 3 not in model.recommend(article_id=20, quantity=5)
+
+
+def test_tombstone_survives_snapshot(model):
+    model.remove_article(8)
+    snapshot = model.snapshot()
+
+    # Changes made to either of them afterwards are not seen by the other
+    model.remove_article(9)
+    snapshot.remove_article(11)
+
+    with pytest.raises(KeyError):
+        snapshot.row(8)
+    assert snapshot.row(9) == ARTICLE_IDS.index(9)
+    assert model.row(11) == ARTICLE_IDS.index(11)
+
+
+def test_compact_keeps_ids_of_rows(model):
+    model.remove_article(3)
+    model.remove_article(15)
+    model.compact()
+
+    live_ids = [article_id for article_id in ARTICLE_IDS if article_id not in (3, 15)]
+
+    assert model.num_articles == len(live_ids)
+    assert model.num_deleted == 0
+    assert model.row_ids.tolist() == live_ids
+    for row, article_id in enumerate(live_ids):
+        assert model.row(article_id) == row
+
+    with pytest.raises(KeyError):
+        model.row(3)
+    assert not {3, 15} & set(model.recommend(article_id=20, quantity=8).tolist())
+
+
+def test_tombstone_survives_save_and_load(model, tmp_path):
+    model.remove_article(3)
+    model.save()
+
+    loaded = Model(path_model=tmp_path / "model")
+
+    assert loaded.trained
+    assert loaded.live_ids().tolist() == model.live_ids().tolist()
+    with pytest.raises(KeyError):
+        loaded.row(3)
+    assert 3 not in loaded.recommend(article_id=20, quantity=5)
+
+
+def test_catch_up_removes_articles_deleted_before_restart(model, articles, tmp_path):
+    # Article got removed, but the model was saved before it was
+    model.save()
+    remove_from_wrapper(articles, 3)
+
+    loaded = Model(path_model=tmp_path / "model")
+    refit_scheduler = RefitScheduler(model=loaded, articles=articles, delay=60)
+    refit_scheduler.catch_up()
+
+    with pytest.raises(KeyError):
+        refit_scheduler.model.row(3)
+    assert 3 not in refit_scheduler.model.recommend(article_id=20, quantity=5)
+
+
+def test_retrained_model_is_saved_only_once_swapped_in(model, articles, tmp_path):
+    manifest = tmp_path / "model" / "manifest.json"
+    saved_at = manifest.stat().st_mtime_ns
+
+    refit_scheduler = RefitScheduler(model=model, articles=articles, delay=60)
+    new_model = model.retrained(articles.snapshot())
+    assert manifest.stat().st_mtime_ns == saved_at
+
+    # Article removed while the new model was being trained
+    remove_from_wrapper(articles, 3)
+    refit_scheduler.swap(new_model)
+
+    loaded = Model(path_model=tmp_path / "model")
+    assert 3 not in loaded.live_ids()
+    assert loaded.num_live_articles == len(ARTICLE_IDS) - 1
+
+
+def test_type_ahead_searches_with_the_lock_held(model, articles):
+    from model.type_ahead import TypeAhead
+
+    refit_scheduler = RefitScheduler(model=model, articles=articles, delay=60)
+    type_ahead = TypeAhead(refit_scheduler=refit_scheduler, articles=articles)
+
+    # Articles are being added (or the model swapped) on another thread
+    with refit_scheduler.lock:
+        refreshing = threading.Thread(target=type_ahead.refresh, args=([], "blockchain", []))
+        refreshing.start()
+        refreshing.join(timeout=0.2)
+
+        assert refreshing.is_alive()
+        assert type_ahead.results == []
+
+    refreshing.join()
+    assert {0, 8, 15} <= {article.id for article in type_ahead.results} # Articles about bitcoin
+
+
+def test_articles_snapshot_keeps_its_columns(articles):
+    articles_snapshot = articles.snapshot()
+
+    # Changed in place, after the snapshot has been taken
+    articles.set_tags(articles[2], ["retagged"])
+    articles[2].likes += 1
+    articles.append(Article(id=30, title="added", content="added"))
+
+    assert articles_snapshot["id"].tolist() == ARTICLE_IDS
+    assert articles_snapshot["tags"][1] == []
+    assert articles_snapshot["likes"][1] == 0
+    assert articles_snapshot["title"] == [f"{title} {position}" for position, title
+                                          in zip(range(len(ARTICLE_IDS)), list(TOPICS) * 3)]
+    assert list(articles_snapshot.iter_contents()) == list(articles.iter_contents())[:-1]
+    assert articles["tags"][1] == ["retagged"]
@@ -0,0 +1,140 @@
+import asyncio
+import socket
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("sklearn")
+
+from article.article import Article
+from article.articles import Articles
+from model.model import Model
+from model.refit_scheduler import RefitScheduler
+from server.client import ModelClient
+from server.model_server import ModelServer
+from server.protocol import ServerError
+from user.user import User
+from user.users import Users
+
+if not hasattr(socket, "AF_UNIX"):
+    pytest.skip("Unix sockets are not available", allow_module_level=True)
+
+
+CONTENTS = {1: "bitcoin blockchain wallet mining exchange ledger token",
+            2: "bitcoin wallet exchange token ledger mining blockchain",
+            4: "neural network training model gradient dataset layer",
+            6: "network training gradient layer neural dataset model"}
+
+USERS_HEADER = "id,username,password,name,surname,date_of_birth,residence," \
+               "articles_created,articles_liked,articles_disliked,articles_saved\n"
+
+
+async def cancel_all():
+    """
+    Cancels the server and all the connections it is serving.
+    """
+
+    tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+    for task in tasks:
+        task.cancel()
+
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@pytest.fixture
+def address(tmp_path):
+    nltk_corpus = pytest.importorskip("nltk.corpus")
+    try:
+        nltk_corpus.stopwords.words("english")
+    except LookupError:
+        pytest.skip("NLTK stopwords are not installed")
+
+    articles = Articles(path_articles_metadata=tmp_path / "metadata.csv")
+    for article_id, content in CONTENTS.items():
+        articles.append(Article(id=article_id, title=f"article {article_id}", content=content))
+
+    users = Users(path_users_data=tmp_path / "users.csv")
+    (tmp_path / "users.csv").write_text(USERS_HEADER, encoding="utf8")
+    for user_id, username in enumerate(["alice", "bob"]):
+        users.users.append(User({"id": str(user_id), "username": username, "password": "secret",
+                                 "name": username.title(), "surname": "Smith",
+                                 "date_of_birth": "01.01.2000.", "residence": "Novi Sad"}))
+
+    model = Model(path_model=tmp_path / "model")
+    model.NUM_NEIGHBOURS = 2
+    model.refit(articles=articles)
+
+    server  = ModelServer(articles, users, RefitScheduler(model=model, articles=articles, delay=60))
+    address = str(tmp_path / "server.sock")
+
+    # Served on a loop of its own, the way `server.model_server` serves
+    loop    = asyncio.new_event_loop()
+    thread  = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    asyncio.run_coroutine_threadsafe(server.serve(address), loop)
+
+    deadline = time.monotonic() + 10
+    while True:
+        try:
+            ModelClient(address).close()
+            break
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.01)
+
+    yield address
+
+    asyncio.run_coroutine_threadsafe(cancel_all(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+def test_pipelined_requests_act_as_logged_in_user(address):
+    client = ModelClient(address)
+
+    login, liked, saved, found, recommended = client.call_many(
+        [("login",     {"username": "bob", "password": "secret"}),
+         ("like",      {"article_id": 4}),
+         ("save",      {"article_id": 4}),
+         ("search",    {"keywords": ["bitcoin"], "quantity": 2}),
+         ("recommend", {"article_id": 4, "quantity": 1})])
+
+    assert login["username"] == "bob"
+    assert liked["changed"] and liked["likes"] == 1
+    assert saved["user"]["id"] == 1
+    assert saved["user"]["articles_liked"] == [4]
+    assert saved["user"]["articles_saved"] == [4]
+    assert {article["id"] for article in found} == {1, 2}
+    assert recommended == [6]
+
+    client.close()
+
+
+def test_interactions_need_a_login_on_the_connection(address):
+    client = ModelClient(address)
+    other  = ModelClient(address)
+
+    with pytest.raises(ServerError, match="Not logged in"):
+        client.call("like", article_id=1)
+
+    # User can not be picked by the client
+    with pytest.raises(ServerError):
+        client.call("like", article_id=1, user_id=0)
+
+    assert client.call("login", username="alice", password="secret")["id"] == 0
+    assert client.call("dislike", article_id=1)["user"]["articles_disliked"] == [1]
+
+    # Login is bound to the connection it was made on
+    with pytest.raises(ServerError, match="Not logged in"):
+        other.call("dislike", article_id=1)
+
+    # Failed login logs out
+    assert client.call("login", username="alice", password="wrong") is None
+    with pytest.raises(ServerError, match="Not logged in"):
+        client.call("save", article_id=1)
+
+    client.close()
+    other.close()
@@ -0,0 +1,49 @@
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from model.term_count_cache import TermCountCache
+from model.tfidf_builder import ParallelTfidfBuilder
+
+
+CORPUS = ["the rare word shows up once",
+          "apples and pears",
+          "apples and plums",
+          "pears and plums",
+          "apples pears plums"]
+
+ADDED = ["another rare word", "one more rare word"]
+
+
+def fit(documents: list, path_cache=None) -> tuple:
+    """
+    Returns
+    -------
+    tuple
+        (vocabulary, dense TF-IDF matrix) of a fit, with given cache of term counts.
+    """
+
+    builder = ParallelTfidfBuilder(TfidfVectorizer(min_df=3), num_workers=1)
+
+    if path_cache is None:
+        matrix = builder.fit_transform(lambda: iter(documents))
+    else:
+        cache  = TermCountCache(path_cache, builder.signature())
+        matrix = builder.fit_transform(lambda: iter(documents), cache=cache)
+        cache.save()
+
+    return builder.vectorizer.vocabulary_, matrix.toarray()
+
+
+def test_warm_refit_after_adding_articles_matches_cold_fit(tmp_path):
+    path_cache = tmp_path / "term_counts.npz"
+
+    vocabulary, _ = fit(CORPUS, path_cache)
+    assert "rare" not in vocabulary # Found in a single document
+
+    # "rare" makes it into the vocabulary only with the cached counts of the first document
+    warm_vocabulary, warm_matrix = fit(CORPUS + ADDED, path_cache)
+    cold_vocabulary, cold_matrix = fit(CORPUS + ADDED)
+
+    assert "rare" in cold_vocabulary
+    assert warm_vocabulary == cold_vocabulary
+    np.testing.assert_allclose(warm_matrix, cold_matrix)